@@ -0,0 +1,62 @@
+import asyncio
+import json
+import os
+
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+from stub_agent import StubTriage
+
+app = FastAPI(
+    title="Triage Stand-in",
+    description="Deterministic local replacement for the Gemini triage service (load testing)",
+    version="1.0.0",
+)
+
+stub = StubTriage()
+
+
+async def _analyze(file: UploadFile) -> dict:
+    content = await file.read()
+    outcome = stub.plan(content, file.filename or "upload")
+    await asyncio.sleep(outcome.latency_s)
+    if outcome.kind == "timeout":
+        raise HTTPException(status_code=504, detail="stand-in triage timed out")
+    if outcome.kind == "error":
+        raise HTTPException(status_code=503, detail="stand-in triage failed")
+    return json.loads(outcome.raw)
+
+
+@app.get("/health")
+def health():
+    p = stub.profile
+    return {
+        "ok": True,
+        "latency": p.latency,
+        "error_rate": p.error_rate,
+        "timeout_rate": p.timeout_rate,
+        "timeout_s": p.timeout_s,
+        "seed": p.seed,
+    }
+
+
+@app.post("/analyze")
+async def analyze(file: UploadFile = File(...)):
+    return JSONResponse(await _analyze(file))
+
+
+@app.post("/bulk-analyze")
+async def bulk_analyze(files: list[UploadFile] = File(...)):
+    results = []
+    for file in files:
+        try:
+            results.append(await _analyze(file))
+        except HTTPException as e:
+            results.append({"filename": file.filename, "error": e.detail, "status_code": e.status_code})
+    return {"total_documents": len(results), "results": results}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="127.0.0.1", port=int(os.getenv("STUB_LLM_PORT") or "8090"))
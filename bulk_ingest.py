@@ -0,0 +1,423 @@
+import argparse
+import csv
+import gzip
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from disease_mapper import DiseaseCodeMapper
+from fabric_adapter.mock_fabric import MockFabricAdapter
+from fabric_adapter.rest_fabric import FabricRestAdapter
+from patient_data import PatientDocument, iter_patient_documents
+from peer_nodes.peer_nmk import PeerNMKStore
+from storage.object_store import LocalObjectStore
+from trusted_authority_service.ta_core import BatchUploadItem, TrustedAuthorityCore
+
+
+@dataclass(frozen=True)
+class IngestItem:
+    item_id: str
+    patient_id: str
+    filename: str
+    payload: bytes | None = None
+    path: str | None = None
+
+    def read(self) -> bytes:
+        if self.payload is not None:
+            return self.payload
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+def _build_ta(runtime_dir: Path, peer_ids: list[str], *, live: bool, fabric_rest_url: str | None) -> TrustedAuthorityCore:
+    if live:
+        base_url = (fabric_rest_url or os.getenv("FABRIC_REST_URL") or "http://127.0.0.1:8800").strip()
+        fabric = FabricRestAdapter(base_url)
+    else:
+        fabric = MockFabricAdapter(str(runtime_dir / "ledger" / "ledger.json"))
+    store = LocalObjectStore(str(runtime_dir / "object_store"))
+    nmk = PeerNMKStore(str(runtime_dir / "nmks"), peer_ids=peer_ids)
+    return TrustedAuthorityCore(fabric=fabric, store=store, nmk_store=nmk, peer_ids=peer_ids)
+
+
+def _peer_ids(n_peers: int) -> list[str]:
+    peer_ids_env = os.getenv("TA_PEER_IDS")
+    if peer_ids_env:
+        return [p.strip() for p in peer_ids_env.split(",") if p.strip()]
+    return [f"peer{i}" for i in range(1, max(2, n_peers) + 1)]
+
+
+def _doc_item(item_id: str, d: dict, mapper: DiseaseCodeMapper) -> IngestItem:
+    doc = PatientDocument(
+        patient_number=int(d["patient_number"]),
+        patient_name=str(d.get("patient_name") or ""),
+        disease=str(d["disease"]),
+        priority=str(d.get("priority") or ""),
+    )
+    patient_id = d.get("patient_id") or d.get("record_key") or mapper.make_standard_record_key(doc.patient_number, doc.disease)
+    body = d.get("body")
+    payload = body.encode("utf-8") if isinstance(body, str) else doc.to_text().encode("utf-8")
+    return IngestItem(item_id=item_id, patient_id=str(patient_id), filename=f"{patient_id}.txt", payload=payload)
+
+
+def iter_directory(root: Path, *, patient_id_from: str = "stem") -> Iterator[IngestItem]:
+    # <root>/<anything>/<PATIENT>__<label>.<ext> or <PATIENT>.<ext>; with patient_id_from=parent
+    # the containing directory name is used instead.
+    for p in sorted(root.rglob("*")):
+        if not p.is_file() or p.name.startswith("."):
+            continue
+        if patient_id_from == "parent":
+            patient_id = p.parent.name
+        else:
+            patient_id = p.stem.split("__", 1)[0]
+        yield IngestItem(item_id=str(p.relative_to(root)), patient_id=patient_id, filename=p.name, path=str(p))
+
+
+def iter_dataset(path: Path, mapper: DiseaseCodeMapper) -> Iterator[IngestItem]:
+    # Accepts a JSON array (data/sample_patient_dataset.json), JSONL (optionally .gz), one
+    # document per line, or a generate_dataset.py output directory (its shards in order).
+    if path.is_dir():
+        for shard in sorted(path.glob("shard-*.jsonl*")):
+            if shard.name.endswith((".jsonl", ".jsonl.gz")):
+                yield from iter_dataset(shard, mapper)
+        return
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        head = f.read(1)
+        while head and head.isspace():
+            head = f.read(1)
+        f.seek(0)
+        if head == "[":
+            for i, d in enumerate(json.load(f)):
+                yield _doc_item(f"{path.name}:{i}", d, mapper)
+            return
+        for i, line in enumerate(f):
+            if line.strip():
+                yield _doc_item(f"{path.name}:{i}", json.loads(line), mapper)
+
+
+def iter_csv(path: Path, mapper: DiseaseCodeMapper) -> Iterator[IngestItem]:
+    with path.open("r", encoding="utf-8", newline="") as f:
+        for i, row in enumerate(csv.DictReader(f)):
+            yield _doc_item(f"{path.name}:{i}", row, mapper)
+
+
+def iter_generated(n: int, *, seed: int, start_patient_number: int, mapper: DiseaseCodeMapper) -> Iterator[IngestItem]:
+    for d in iter_patient_documents(n, seed=seed, start_patient_number=start_patient_number):
+        yield _doc_item(f"gen:{seed}:{d.patient_number}", d.__dict__, mapper)
+
+
+def plan_chunks(items: list[IngestItem], chunk_size: int) -> list[list[IngestItem]]:
+    # All items of a patient go to the same chunk (in input order) so no two workers ever
+    # seal versions for the same patient.
+    by_patient: dict[str, list[IngestItem]] = {}
+    for it in items:
+        by_patient.setdefault(it.patient_id, []).append(it)
+    chunks: list[list[IngestItem]] = []
+    cur: list[IngestItem] = []
+    for group in by_patient.values():
+        cur.extend(group)
+        if len(cur) >= chunk_size:
+            chunks.append(cur)
+            cur = []
+    if cur:
+        chunks.append(cur)
+    return chunks
+
+
+class Checkpoint:
+    # One completed item id per line, appended per chunk, so a save costs the chunk rather than
+    # the whole done set. JSON checkpoints ({"done": [...]}) from older runs still load and are
+    # rewritten as a log on the first save, as is a log whose last append was cut short.
+    def __init__(self, path: Path):
+        self.path = path
+        self.done: set[str] = set()
+        self._pending: list[str] = []
+        self._rewrite = False
+        if path.exists():
+            text = path.read_text(encoding="utf-8")
+            if text.lstrip().startswith("{"):
+                self.done = set(json.loads(text).get("done", []))
+                self._rewrite = True
+            else:
+                lines = text.split("\n")
+                self.done = {line for line in lines[:-1] if line}
+                self._rewrite = lines[-1] != ""
+
+    def mark(self, item_ids: list[str]) -> None:
+        for item_id in item_ids:
+            if item_id not in self.done:
+                self.done.add(item_id)
+                self._pending.append(item_id)
+
+    def save(self) -> None:
+        if not self._rewrite and not self._pending:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self._rewrite:
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp.write_text("".join(f"{i}\n" for i in self.done), encoding="utf-8")
+            os.replace(tmp, self.path)
+            self._rewrite = False
+        else:
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write("".join(f"{i}\n" for i in self._pending))
+        self._pending.clear()
+
+
+_WORKER_TA: TrustedAuthorityCore | None = None
+
+
+def _init_worker(runtime_dir: str, peer_ids: list[str], live: bool, fabric_rest_url: str | None) -> None:
+    global _WORKER_TA
+    _WORKER_TA = _build_ta(Path(runtime_dir), peer_ids, live=live, fabric_rest_url=fabric_rest_url)
+
+
+def _seal_chunk(chunk: list[IngestItem], requester: str, threads: int):
+    items = [BatchUploadItem(patient_id=it.patient_id, file_bytes=it.read(), filename=it.filename) for it in chunk]
+    # The parent owns ledger writes; workers only triage and seal.
+    return _WORKER_TA.upload_many(items, requester, max_workers=threads, commit=False)
+
+
+class Progress:
+    def __init__(self, total: int | None):
+        self.total = total
+        self.ok = 0
+        self.failed = 0
+        self.t0 = time.perf_counter()
+        self.tty = sys.stdout.isatty()
+
+    def update(self, ok: int, failed: int) -> None:
+        self.ok += ok
+        self.failed += failed
+        done = self.ok + self.failed
+        elapsed = max(time.perf_counter() - self.t0, 1e-9)
+        rate = done / elapsed
+        if self.total is None:
+            # Streaming source of unknown length: no percentage or ETA.
+            line = f"[ingest] {done} items ok={self.ok} failed={self.failed} {rate:.1f} items/s"
+        else:
+            eta = (self.total - done) / rate if rate > 0 else 0.0
+            pct = 100.0 * done / self.total if self.total else 100.0
+            line = (
+                f"[ingest] {done}/{self.total} items ({pct:.1f}%) ok={self.ok} failed={self.failed} "
+                f"{rate:.1f} items/s eta {eta:.0f}s"
+            )
+        print(("\r" + line) if self.tty else line, end="" if self.tty else "\n", flush=True)
+
+    def finish(self) -> None:
+        if self.tty:
+            print()
+
+
+def run(
+    items: Iterable[IngestItem],
+    *,
+    runtime_dir: Path,
+    peer_ids: list[str],
+    checkpoint: Checkpoint,
+    processes: int,
+    threads: int,
+    chunk_size: int,
+    requester: str,
+    live: bool,
+    fabric_rest_url: str | None,
+    dry_run: bool,
+    total: int | None = None,
+) -> dict:
+    # items is consumed lazily, one window of chunks at a time, so a generator over millions
+    # of documents never sits in memory; total (if known) only feeds the progress line.
+    if total is None and isinstance(items, list):
+        total = len(items)
+    stream = iter(items)
+    seen = 0
+    skipped = 0
+    patients: set[str] = set()
+
+    def next_window(n: int) -> list[IngestItem]:
+        nonlocal seen, skipped
+        window: list[IngestItem] = []
+        for it in stream:
+            seen += 1
+            if it.item_id in checkpoint.done:
+                skipped += 1
+                continue
+            patients.add(it.patient_id)
+            window.append(it)
+            if len(window) >= n:
+                break
+        return window
+
+    window_items = max(chunk_size, chunk_size * processes * 4)
+    print(
+        f"[ingest] items={total if total is not None else 'streaming'} already_done={len(checkpoint.done)} "
+        f"chunk_size={chunk_size} window={window_items} processes={processes} peers={len(peer_ids)}"
+    )
+    if dry_run:
+        shown = 0
+        while window := next_window(window_items):
+            for it in window[: 10 - shown]:
+                print(f"[dry-run] {it.item_id} -> {it.patient_id} ({it.filename})")
+            shown = min(10, shown + len(window))
+        todo = seen - skipped
+        if todo > 10:
+            print(f"[dry-run] ... {todo - 10} more")
+        return {"items": seen, "todo": todo, "patients": len(patients), "dry_run": True}
+
+    # Built in the parent first so NMKs exist before workers start; the parent commits all ledger writes.
+    ta = _build_ta(runtime_dir, peer_ids, live=live, fabric_rest_url=fabric_rest_url)
+    progress = Progress(None if total is None else max(0, total - len(checkpoint.done)))
+    stage_busy: dict[str, float] = {}
+    failures: list[dict] = []
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_worker,
+        initargs=(str(runtime_dir), peer_ids, live, fabric_rest_url),
+    ) as pool:
+        remaining: deque[list[IngestItem]] = deque()
+        exhausted = False
+        inflight = {}
+        busy: dict[str, int] = {}  # patient -> in-flight chunks holding it
+        while True:
+            if not exhausted and len(remaining) < processes * 2:
+                window = next_window(window_items)
+                exhausted = not window
+                remaining.extend(plan_chunks(window, chunk_size))
+            # A patient can span windows. Its next chunk waits (in order) until the previous
+            # one is committed, so it is sealed against the version that chunk wrote.
+            while remaining and len(inflight) < processes * 2:
+                chunk = remaining[0]
+                if any(it.patient_id in busy for it in chunk):
+                    break
+                remaining.popleft()
+                for pid in {it.patient_id for it in chunk}:
+                    busy[pid] = busy.get(pid, 0) + 1
+                inflight[pool.submit(_seal_chunk, chunk, requester, threads)] = chunk
+            if not inflight:
+                if exhausted and not remaining:
+                    break
+                continue
+            finished, _ = wait(list(inflight), return_when=FIRST_COMPLETED)
+            for fut in finished:
+                chunk = inflight.pop(fut)
+                for pid in {it.patient_id for it in chunk}:
+                    busy[pid] -= 1
+                    if not busy[pid]:
+                        del busy[pid]
+                try:
+                    res = fut.result()
+                except Exception as e:
+                    failures.extend({"item_id": it.item_id, "error": str(e)} for it in chunk)
+                    progress.update(0, len(chunk))
+                    continue
+
+                start = time.perf_counter()
+                errors = {
+                    (rec.patient_id, rec.version): err for rec, err in zip(res.records, ta.commit_records(res.records))
+                }
+                stage_busy["ledger"] = stage_busy.get("ledger", 0.0) + time.perf_counter() - start
+                for stage, st in res.stages.items():
+                    if stage != "total":
+                        stage_busy[stage] = stage_busy.get(stage, 0.0) + st["busy_s"]
+
+                done_ids: list[str] = []
+                n_ok = 0
+                for it, r in zip(chunk, res.items):
+                    err = r.error if not r.ok else errors.get((r.patient_id, r.version), "not committed")
+                    if err is None:
+                        done_ids.append(it.item_id)
+                        n_ok += 1
+                    else:
+                        failures.append({"item_id": it.item_id, "patient_id": it.patient_id, "error": err})
+                checkpoint.mark(done_ids)
+                checkpoint.save()
+                progress.update(n_ok, len(chunk) - n_ok)
+    progress.finish()
+
+    elapsed = time.perf_counter() - progress.t0
+    summary = {
+        "items": seen - skipped,
+        "already_done": skipped,
+        "patients": len(patients),
+        "ok": progress.ok,
+        "failed": progress.failed,
+        "elapsed_s": elapsed,
+        "items_per_s": progress.ok / elapsed if elapsed > 0 else 0.0,
+        "stage_busy_s": stage_busy,
+        "failures": failures[:50],
+    }
+    print(f"[ingest] done ok={progress.ok} failed={progress.failed} in {elapsed:.1f}s ({summary['items_per_s']:.1f} items/s)")
+    for f in failures[:10]:
+        print(f"[ingest] failed {f['item_id']}: {f['error']}")
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline bulk ingest of patient documents through TrustedAuthorityCore.")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--dir", type=Path, help="Directory of files; patient id from <PATIENT>__*.ext or the file stem")
+    src.add_argument("--dataset", type=Path, help="JSON array, JSONL(.gz) or generate_dataset.py output directory of patient documents")
+    src.add_argument("--csv", type=Path, help="CSV with patient_number,patient_name,disease,priority[,body,patient_id]")
+    src.add_argument("--generate", type=int, metavar="N", help="Generate N synthetic documents (iter_patient_documents)")
+    parser.add_argument("--patient-id-from", default="stem", choices=["stem", "parent"], help="Patient id source (--dir)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--start-patient-number", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=None, help="Only ingest the first N items")
+    parser.add_argument("--runtime-dir", type=Path, default=Path(__file__).resolve().parent / "runtime")
+    parser.add_argument("--checkpoint", type=Path, default=None, help="Checkpoint file, one done item id per line (default: <runtime-dir>/ingest_checkpoint.json)")
+    parser.add_argument("--n-peers", type=int, default=int(os.getenv("TA_NUM_PEERS") or "5"))
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, default=4, help="upload_many worker threads per process")
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument("--requester", default="bulk_ingest")
+    parser.add_argument("--live", action="store_true", help="Use real Fabric via FabricRestAdapter (requires running gateway).")
+    parser.add_argument("--fabric-rest-url", default=None)
+    parser.add_argument("--dry-run", action="store_true", help="List what would be ingested without writing anything")
+    parser.add_argument("--summary-json", type=Path, default=None)
+    args = parser.parse_args()
+
+    mapper = DiseaseCodeMapper()
+    if args.dir is not None:
+        source = iter_directory(args.dir, patient_id_from=args.patient_id_from)
+    elif args.dataset is not None:
+        source = iter_dataset(args.dataset, mapper)
+    elif args.csv is not None:
+        source = iter_csv(args.csv, mapper)
+    else:
+        source = iter_generated(args.generate, seed=args.seed, start_patient_number=args.start_patient_number, mapper=mapper)
+
+    total = args.generate if args.generate is not None else None
+    if args.limit is not None:
+        source = itertools.islice(source, max(0, args.limit))
+        total = min(total, args.limit) if total is not None else None
+
+    runtime_dir = args.runtime_dir.resolve()
+    checkpoint = Checkpoint(args.checkpoint or (runtime_dir / "ingest_checkpoint.json"))
+    summary = run(
+        source,
+        runtime_dir=runtime_dir,
+        peer_ids=_peer_ids(args.n_peers),
+        checkpoint=checkpoint,
+        processes=max(1, args.processes),
+        threads=max(1, args.threads),
+        chunk_size=max(1, args.chunk_size),
+        requester=args.requester,
+        live=bool(args.live),
+        fabric_rest_url=args.fabric_rest_url,
+        dry_run=bool(args.dry_run),
+        total=total,
+    )
+    if args.summary_json is not None:
+        args.summary_json.parent.mkdir(parents=True, exist_ok=True)
+        args.summary_json.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@ from crypto.shamir import reconstruct_secret
 from fabric_adapter.mock_fabric import MockFabricAdapter
 from peer_nodes.peer_nmk import PeerNMKStore
 from storage.object_store import LocalObjectStore
-from trusted_authority_service.ta_core import TrustedAuthorityCore
+from trusted_authority_service.ta_core import BatchUploadItem, TrustedAuthorityCore
 
 
 def main() -> None:
@@ -66,6 +66,20 @@ def main() -> None:
     pt = aes_decrypt(new_key, nonce_new, ct_new, aad=aad_new)
     print(pt.decode("utf-8"))
 
+    print("--- Sealed batch vs concurrent upload ---")
+    batch = ta.upload_many(
+        [BatchUploadItem(patient_id=patient_id, file_bytes=b"Patient report v3: batch", filename="v3.txt")],
+        requester="doctor1",
+        commit=False,
+    )
+    ta.update_record(patient_id=patient_id, new_file_bytes=b"Patient report v3: concurrent", filename="v3b.txt", requester="doctor1")
+    err = ta.commit_records(batch.records)[0]
+    latest = fabric.getLatestRecord(patient_id)
+    if err is not None and "version conflict" in err and latest.encrypted_file_path != batch.records[0].encrypted_file_path:
+        print(f"OK: stale batch record rejected ({err})")
+    else:
+        print("UNEXPECTED: stale batch record overwrote the concurrent update")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,151 @@
+import argparse
+import csv
+import json
+import shutil
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+_REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(_REPO_ROOT))
+
+from experiments.run_ledger_scalability import _audit_entry, synthetic_records
+from fabric_adapter import codec
+from fabric_adapter.mock_fabric import MockFabricAdapter
+from fabric_adapter.models import FabricRecord
+
+
+def _encoders() -> dict[str, tuple[Callable[[dict[str, Any]], bytes], Callable[[bytes], dict[str, Any]]]]:
+    return {
+        # json_pretty is what the mock ledger file holds per record, json what the REST adapters send.
+        "json_pretty": (lambda d: json.dumps(d, ensure_ascii=False, indent=2).encode("utf-8"), json.loads),
+        "json": (lambda d: json.dumps(d).encode("utf-8"), json.loads),
+        "binary": (codec.encode_record, codec.decode_record),
+    }
+
+
+def _mean_us(fn: Callable[[], Any], n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def _median_ms(fn: Callable[[], Any], n: int) -> float:
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def run(
+    out_csv: Path,
+    *,
+    peer_counts: list[int],
+    n_records: int = 2000,
+    audit_len: int = 5,
+    ops: int = 20,
+    seed: int = 7,
+) -> list[dict]:
+    base = Path(__file__).resolve().parents[1]
+    runtime_dir = base / "runtime_experiments" / f"codec_bench_{time.time_ns()}"
+    rows: list[dict] = []
+
+    for n_peers in peer_counts:
+        records = synthetic_records(n_records, n_peers=n_peers, seed=seed)
+        for r in records:
+            r["audit_logs"] = [_audit_entry(i) for i in range(audit_len)]
+        sample = records[: min(200, len(records))]
+        targets = [r["patient_id"] for r in records[: min(ops, len(records))]]
+        baseline: dict[str, float] = {}
+        for enc, (encode, decode) in _encoders().items():
+            sizes = [len(encode(r)) for r in sample]
+            blobs = [encode(r) for r in sample]
+            encode_us = _mean_us(lambda: [encode(r) for r in sample], 5) / len(sample)
+            decode_us = _mean_us(lambda: [decode(b) for b in blobs], 5) / len(sample)
+
+            # Whole mock ledger: the pretty-printed JSON file versus the binary one.
+            ledger_bytes: int | str = ""
+            get_ms: float | str = ""
+            update_ms: float | str = ""
+            if enc != "json":
+                workdir = runtime_dir / f"{enc}_{n_peers}"
+                path = workdir / "ledger.json"
+                seed_mock = MockFabricAdapter(str(path), encoding="json")
+                patients = {r["patient_id"]: [r] for r in records}
+                seed_mock._save({"patients": patients})
+                mock = MockFabricAdapter(str(path), encoding="binary" if enc == "binary" else "json")
+                if enc == "binary":
+                    mock.appendAuditLog(targets[0], _audit_entry(0))  # converts the file
+                ledger_bytes = path.stat().st_size
+                picks = iter(targets * 4)
+                get_ms = _median_ms(lambda: mock.getLatestRecord(next(picks)), len(targets))
+                versions = {pid: mock.getLatestRecord(pid).version for pid in targets}
+                picks = iter(targets)
+
+                def _update() -> None:
+                    pid = next(picks)
+                    v = versions[pid]
+                    rec = FabricRecord(**{**patients[pid][0], "version": v + 1, "audit_logs": []})
+                    mock.updateRecord(rec, expected_version=v)
+                    versions[pid] = v + 1
+
+                update_ms = _median_ms(_update, len(targets))
+                shutil.rmtree(workdir, ignore_errors=True)
+
+            mean_size = statistics.fmean(sizes)
+            baseline.setdefault("size", mean_size)
+            row = {
+                "n_peers": n_peers,
+                "encoding": enc,
+                "record_bytes": round(mean_size, 1),
+                "vs_json_pretty": round(mean_size / baseline["size"], 3),
+                "encode_us": round(encode_us, 2),
+                "decode_us": round(decode_us, 2),
+                "ledger_records": n_records if ledger_bytes != "" else "",
+                "ledger_bytes": ledger_bytes,
+                "getLatestRecord_p50_ms": round(get_ms, 3) if get_ms != "" else "",
+                "updateRecord_p50_ms": round(update_ms, 3) if update_ms != "" else "",
+            }
+            rows.append(row)
+            print(
+                f"[codec] peers={n_peers} {enc:<11} record={row['record_bytes']}B ({row['vs_json_pretty']:.2f}x) "
+                f"enc={row['encode_us']}us dec={row['decode_us']}us ledger={ledger_bytes}B "
+                f"get={row['getLatestRecord_p50_ms']}ms update={row['updateRecord_p50_ms']}ms"
+            )
+
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
+    with out_csv.open("w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        w.writeheader()
+        w.writerows(rows)
+    shutil.rmtree(runtime_dir, ignore_errors=True)
+    print(f"Wrote: {out_csv}")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ledger record size and codec cost: JSON versus the binary encoding.")
+    parser.add_argument("--peers", default="5,50", help="Comma-separated wrapped shares per record")
+    parser.add_argument("--records", type=int, default=2000, help="Records in the mock ledger file")
+    parser.add_argument("--audit-len", type=int, default=5, help="Audit entries per record")
+    parser.add_argument("--ops", type=int, default=20, help="Measured ledger calls per operation")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default=None, help="Results CSV (default: runtime_experiments/codec_bench_results.csv)")
+    args = parser.parse_args()
+
+    base = Path(__file__).resolve().parents[1]
+    out = Path(args.out) if args.out else base / "runtime_experiments" / "codec_bench_results.csv"
+    run(
+        out,
+        peer_counts=[int(x) for x in args.peers.split(",") if x.strip()],
+        n_records=max(1, args.records),
+        audit_len=max(0, args.audit_len),
+        ops=max(1, args.ops),
+        seed=args.seed,
+    )
@@ -1,9 +1,19 @@
 import csv
+import json
+import math
+import random
 import time
 import sys
 import argparse
+from collections import Counter
+from dataclasses import dataclass
 from pathlib import Path
 
+try:
+    import numpy as np
+except ImportError:  # the pure-Python DP below is exact and fast enough for n in the hundreds
+    np = None
+
 
 _REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(_REPO_ROOT) not in sys.path:
@@ -13,22 +23,146 @@ from trusted_authority_service.policy import priority_to_threshold
 from patient_data import generate_patient_documents
 from disease_mapper import DiseaseCodeMapper
 
+PRIORITIES = ["LOW", "MEDIUM", "HIGH"]
 
-def run(
-    out_csv: Path,
-    n_peers: int = 5,
-    *,
-    mode: str = "single",
-    n_docs: int = 50,
-    seed: int = 7,
-) -> None:
+
+def _convolve(a: list[float], b: list[float]) -> list[float]:
+    if np is not None:
+        return np.convolve(a, b).tolist()
+    out = [0.0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x == 0.0:
+            continue
+        for j, y in enumerate(b):
+            out[i + j] += x * y
+    return out
+
+
+def poisson_binomial_pmf(probs: list[float]) -> list[float]:
+    # pmf[c] = P(exactly c of the independent events happen); O(n^2) DP, one peer at a time.
+    if np is not None:
+        pmf = np.zeros(len(probs) + 1)
+        pmf[0] = 1.0
+        for i, p in enumerate(probs):
+            pmf[1 : i + 2] = pmf[1 : i + 2] * (1 - p) + pmf[: i + 1] * p
+            pmf[0] *= 1 - p
+        return pmf.tolist()
+    pmf = [1.0] + [0.0] * len(probs)
+    for i, p in enumerate(probs):
+        q = 1.0 - p
+        for c in range(i + 1, 0, -1):
+            pmf[c] = pmf[c] * q + pmf[c - 1] * p
+        pmf[0] *= q
+    return pmf
+
+
+def hosted_pmf(peer_probs: list[float], hosts: list[list[int]], host_probs: list[float]) -> list[float]:
+    # Correlated model: compromising a host exposes every peer on it; otherwise its peers fall
+    # independently. Hosts are independent, so the total count is a convolution of per-host pmfs.
+    total = [1.0]
+    for members, q in zip(hosts, host_probs):
+        local = poisson_binomial_pmf([peer_probs[i] for i in members])
+        host = [(1.0 - q) * x for x in local]
+        host[-1] += q
+        total = _convolve(total, host)
+    return total
+
+
+def tail(pmf: list[float], k: int) -> float:
+    # P(count >= k); clamped because float error can leave a tiny negative or > 1 sum.
+    return min(1.0, max(0.0, sum(pmf[k:])))
+
+
+@dataclass(frozen=True)
+class ThresholdPolicy:
+    name: str
+    kind: str  # priority | scaled | fraction | fixed
+    value: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "ThresholdPolicy":
+        spec = spec.strip().lower()
+        if spec in ("priority", "scaled"):
+            return cls(spec, spec)
+        if spec.startswith("fraction:"):
+            frac = float(spec.split(":", 1)[1])
+            if not 0 < frac <= 1:
+                raise ValueError("fraction policy expects 0 < f <= 1")
+            return cls(spec, "fraction", frac)
+        if spec.startswith("fixed:"):
+            return cls(spec, "fixed", int(spec.split(":", 1)[1]))
+        raise ValueError(f"invalid policy {spec!r} (expected: priority | scaled | fraction:<f> | fixed:<k>)")
+
+    def threshold(self, priority: str, n_peers: int) -> int:
+        if self.kind == "priority":
+            k = priority_to_threshold(priority)
+        elif self.kind == "scaled":
+            # Keep each priority's share of the 5-peer default (LOW = 4/5 of n, ...).
+            k = math.ceil(n_peers * priority_to_threshold(priority) / 5)
+        elif self.kind == "fraction":
+            k = math.ceil(self.value * n_peers)
+        else:
+            k = int(self.value)
+        return max(1, min(n_peers, k))
+
+
+def _peer_probs(n_peers: int, p_mean: float, spread: float, rng: random.Random, base: list[float] | None) -> list[float]:
+    # Heterogeneous peers: either a fixed per-peer profile rescaled to p_mean, or uniform
+    # draws in p_mean * [1 - spread, 1 + spread].
+    if base is not None:
+        mean = sum(base) / len(base)
+        scale = p_mean / mean if mean > 0 else 0.0
+        return [min(1.0, max(0.0, b * scale)) for b in base]
+    return [min(1.0, max(0.0, p_mean * (1 + spread * (2 * rng.random() - 1)))) for _ in range(n_peers)]
+
+
+def _load_peer_profile(path: str | None, n_peers: int) -> list[float] | None:
+    if not path:
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        probs = [float(x) for x in json.load(f)]
+    if len(probs) != n_peers:
+        raise ValueError(f"peer profile has {len(probs)} entries, expected {n_peers}")
+    return probs
+
+
+def _hosts(n_peers: int, peers_per_host: int) -> list[list[int]]:
+    size = max(1, peers_per_host)
+    return [list(range(i, min(i + size, n_peers))) for i in range(0, n_peers, size)]
+
+
+def _load_priority_mix(mode: str, n_docs: int, seed: int) -> Counter:
+    mix: Counter = Counter()
+    if mode == "single":
+        for prio in PRIORITIES:
+            mix[prio] = 1
+    elif mode == "patient_docs":
+        for d in generate_patient_documents(n_docs, seed=seed, start_patient_number=21):
+            mix[d.priority] += 1
+    else:
+        raise ValueError("invalid mode (expected: single | patient_docs)")
+    return mix
+
+
+def _p_grid(spec: str) -> list[float]:
+    # "0.01:0.5:50" -> 50 evenly spaced points, or an explicit comma list.
+    if ":" in spec:
+        lo, hi, steps = spec.split(":")
+        lo_f, hi_f, n = float(lo), float(hi), int(steps)
+        if n < 2:
+            return [lo_f]
+        return [lo_f + (hi_f - lo_f) * i / (n - 1) for i in range(n)]
+    return [float(x) for x in spec.split(",") if x.strip()]
+
+
+def _count_rows(mode: str, n_peers: int, n_docs: int, seed: int) -> list[dict]:
+    # Deterministic view: attacker holds exactly c peers' NMKs.
     rows: list[dict] = []
     mapper = DiseaseCodeMapper()
 
     def _emit_rows(*, prio: str, patient_name: str | None, disease: str | None, record_key: str | None) -> None:
         k = int(priority_to_threshold(prio))
         for compromised in range(0, n_peers + 1):
-            attacker_can_decrypt = compromised >= k
             rows.append(
                 {
                     "mode": mode,
@@ -39,19 +173,17 @@ def run(
                     "n_peers": n_peers,
                     "threshold_k": k,
                     "compromised_peers_c": compromised,
-                    "attacker_can_reconstruct": attacker_can_decrypt,
+                    "attacker_can_reconstruct": compromised >= k,
                 }
             )
 
-    if (mode or "").strip().lower() == "single":
-        priorities = ["LOW", "MEDIUM", "HIGH"]
-        print(f"[compromise_resistance] mode=single priorities={priorities} n_peers={n_peers}")
-        for prio in priorities:
+    if mode == "single":
+        print(f"[compromise_resistance] mode=single priorities={PRIORITIES} n_peers={n_peers}")
+        for prio in PRIORITIES:
             _emit_rows(prio=prio, patient_name=None, disease=None, record_key=None)
-    elif (mode or "").strip().lower() == "patient_docs":
+    elif mode == "patient_docs":
         print(f"[compromise_resistance] mode=patient_docs n_docs={n_docs} n_peers={n_peers}")
-        docs = generate_patient_documents(n_docs, seed=seed, start_patient_number=21)
-        for d in docs:
+        for d in generate_patient_documents(n_docs, seed=seed, start_patient_number=21):
             dc = mapper.ensure_disease(d.disease)
             record_key = mapper.make_standard_record_key(d.patient_number, d.disease)
             print(
@@ -60,6 +192,120 @@ def run(
             _emit_rows(prio=d.priority, patient_name=d.patient_name, disease=dc.disease, record_key=record_key)
     else:
         raise ValueError("invalid mode (expected: single | patient_docs)")
+    return rows
+
+
+def _curve_rows(
+    *,
+    mode: str,
+    n_peers: int,
+    n_docs: int,
+    seed: int,
+    model: str,
+    policies: list[ThresholdPolicy],
+    p_grid: list[float],
+    spread: float,
+    peer_profile: list[float] | None,
+    peers_per_host: int,
+    p_host: float,
+) -> list[dict]:
+    # One pmf per grid point serves every policy/priority, since only the threshold differs.
+    mix = _load_priority_mix(mode, n_docs, seed)
+    total_docs = sum(mix.values())
+    hosts = _hosts(n_peers, peers_per_host)
+    rng = random.Random(seed)
+    print(
+        f"[compromise_resistance] model={model} n_peers={n_peers} hosts={len(hosts) if model == 'correlated' else '-'} "
+        f"points={len(p_grid)} policies={[p.name for p in policies]} mix={dict(mix)} numpy={np is not None}"
+    )
+
+    rows: list[dict] = []
+    for p_mean in p_grid:
+        probs = _peer_probs(n_peers, p_mean, spread, rng, peer_profile)
+        if model == "correlated":
+            pmf = hosted_pmf(probs, hosts, [p_host] * len(hosts))
+        else:
+            pmf = poisson_binomial_pmf(probs)
+        expected = sum(c * x for c, x in enumerate(pmf))
+        for policy in policies:
+            weighted = 0.0
+            for prio in PRIORITIES:
+                if prio not in mix:
+                    continue
+                k = policy.threshold(prio, n_peers)
+                prob = tail(pmf, k)
+                weighted += prob * mix[prio]
+                rows.append(
+                    {
+                        "mode": mode,
+                        "model": model,
+                        "policy": policy.name,
+                        "priority": prio,
+                        "docs": mix[prio],
+                        "n_peers": n_peers,
+                        "threshold_k": k,
+                        "p_compromise_mean": round(p_mean, 6),
+                        "p_host": p_host if model == "correlated" else "",
+                        "peers_per_host": peers_per_host if model == "correlated" else "",
+                        "expected_compromised": expected,
+                        "p_attacker_reconstruct": prob,
+                    }
+                )
+            # Share of the document mix an attacker is expected to be able to open.
+            rows.append(
+                {
+                    "mode": mode,
+                    "model": model,
+                    "policy": policy.name,
+                    "priority": "ALL",
+                    "docs": total_docs,
+                    "n_peers": n_peers,
+                    "threshold_k": "",
+                    "p_compromise_mean": round(p_mean, 6),
+                    "p_host": p_host if model == "correlated" else "",
+                    "peers_per_host": peers_per_host if model == "correlated" else "",
+                    "expected_compromised": expected,
+                    "p_attacker_reconstruct": weighted / total_docs,
+                }
+            )
+    return rows
+
+
+def run(
+    out_csv: Path,
+    n_peers: int = 5,
+    *,
+    mode: str = "single",
+    n_docs: int = 50,
+    seed: int = 7,
+    model: str = "count",
+    policies: list[str] | None = None,
+    p_grid: list[float] | None = None,
+    spread: float = 0.0,
+    peer_profile: str | None = None,
+    peers_per_host: int = 1,
+    p_host: float = 0.0,
+) -> None:
+    mode = (mode or "").strip().lower()
+    t0 = time.perf_counter()
+    if model == "count":
+        rows = _count_rows(mode, n_peers, n_docs, seed)
+    elif model in ("independent", "correlated"):
+        rows = _curve_rows(
+            mode=mode,
+            n_peers=n_peers,
+            n_docs=n_docs,
+            seed=seed,
+            model=model,
+            policies=[ThresholdPolicy.parse(p) for p in (policies or ["priority"])],
+            p_grid=p_grid or _p_grid("0:0.5:51"),
+            spread=spread,
+            peer_profile=_load_peer_profile(peer_profile, n_peers),
+            peers_per_host=peers_per_host,
+            p_host=p_host,
+        )
+    else:
+        raise ValueError("invalid model (expected: count | independent | correlated)")
 
     out_csv.parent.mkdir(parents=True, exist_ok=True)
     with out_csv.open("w", newline="", encoding="utf-8") as f:
@@ -67,7 +313,7 @@ def run(
         w.writeheader()
         w.writerows(rows)
 
-    print(f"Wrote: {out_csv}")
+    print(f"Wrote: {out_csv} ({len(rows)} rows in {time.perf_counter() - t0:.2f}s)")
 
 
 if __name__ == "__main__":
@@ -76,8 +322,37 @@ if __name__ == "__main__":
     parser.add_argument("--seed", type=int, default=7)
     parser.add_argument("--mode", default="single", choices=["single", "patient_docs"], help="Execution mode")
     parser.add_argument("--n-docs", type=int, default=50, help="Number of patient documents (mode=patient_docs)")
+    parser.add_argument(
+        "--model",
+        default="count",
+        choices=["count", "independent", "correlated"],
+        help="count: exactly c compromised peers; independent: per-peer probabilities; correlated: plus shared hosts",
+    )
+    parser.add_argument(
+        "--policies",
+        default="priority",
+        help="Comma-separated threshold policies: priority | scaled | fraction:<f> | fixed:<k>",
+    )
+    parser.add_argument("--p-grid", default="0:0.5:51", help="Mean per-peer compromise probabilities (lo:hi:steps or a,b,c)")
+    parser.add_argument("--spread", type=float, default=0.0, help="Per-peer heterogeneity: p_mean * [1 - s, 1 + s]")
+    parser.add_argument("--peer-profile", default=None, help="JSON list of per-peer relative probabilities (rescaled per point)")
+    parser.add_argument("--peers-per-host", type=int, default=1, help="Peers sharing a host (model=correlated)")
+    parser.add_argument("--p-host", type=float, default=0.0, help="Probability a whole host is compromised (model=correlated)")
     args = parser.parse_args()
 
     base = Path(__file__).resolve().parents[1]
     out = base / "runtime_experiments" / "compromise_resistance_results.csv"
-    run(out_csv=out, n_peers=args.n_peers, mode=args.mode, n_docs=args.n_docs, seed=args.seed)
+    run(
+        out_csv=out,
+        n_peers=args.n_peers,
+        mode=args.mode,
+        n_docs=args.n_docs,
+        seed=args.seed,
+        model=args.model,
+        policies=[p for p in args.policies.split(",") if p.strip()],
+        p_grid=_p_grid(args.p_grid),
+        spread=args.spread,
+        peer_profile=args.peer_profile,
+        peers_per_host=args.peers_per_host,
+        p_host=args.p_host,
+    )
@@ -0,0 +1,267 @@
+import csv
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+_REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(_REPO_ROOT))
+
+import cryptography
+
+from crypto.aes_gcm import encrypt, decrypt
+from crypto.shamir import generate_secret_32, reconstruct_secret, split_secret
+from peer_nodes.peer_nmk import PeerNMKStore
+
+DEFAULT_BASELINE = _REPO_ROOT / "experiments" / "baselines" / "crypto_baseline.json"
+
+
+@dataclass
+class BenchResult:
+    name: str
+    params: dict[str, Any]
+    ops_s: float
+    ops_s_stdev: float
+    us_per_op: float
+    alloc_peak_bytes: int
+    alloc_blocks: int
+    rounds: int
+    iterations: int
+
+    @property
+    def key(self) -> str:
+        return self.name + "/" + ",".join(f"{k}={v}" for k, v in self.params.items())
+
+
+def parse_size(s: str) -> int:
+    s = s.strip().upper()
+    for suffix, mult in (("MB", 1024 * 1024), ("KB", 1024), ("B", 1)):
+        if s.endswith(suffix):
+            return int(float(s[: -len(suffix)]) * mult)
+    return int(s)
+
+
+def _measure_allocations(fn: Callable[[], Any]) -> tuple[int, int]:
+    # Peak traced memory above the starting point during one call, and the number of blocks
+    # that call leaves allocated (its result plus anything it retains).
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        base_current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        blocks = sum(max(0, s.count_diff) for s in after.compare_to(before, "lineno"))
+        del result
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - base_current), blocks
+
+
+def bench(name: str, params: dict[str, Any], fn: Callable[[], Any], *, rounds: int, min_time_s: float) -> BenchResult:
+    fn()  # warm caches / imports outside the timed rounds
+    # Size the inner loop so each round runs for about min_time_s.
+    iterations = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time_s / 4 or iterations >= 1 << 20:
+            break
+        iterations *= 2
+    iterations = max(1, int(iterations * min_time_s / max(elapsed, 1e-9)))
+
+    rates: list[float] = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        rates.append(iterations / (time.perf_counter() - t0))
+    peak, blocks = _measure_allocations(fn)
+    ops_s = statistics.median(rates)
+    return BenchResult(
+        name=name,
+        params=params,
+        ops_s=ops_s,
+        ops_s_stdev=statistics.stdev(rates) if len(rates) > 1 else 0.0,
+        us_per_op=1e6 / ops_s,
+        alloc_peak_bytes=peak,
+        alloc_blocks=blocks,
+        rounds=rounds,
+        iterations=iterations,
+    )
+
+
+def run(
+    *,
+    n_list: list[int],
+    k_list: list[int],
+    payload_sizes: list[int],
+    rounds: int = 5,
+    min_time_s: float = 0.2,
+    only: set[str] | None = None,
+) -> list[BenchResult]:
+    results: list[BenchResult] = []
+
+    def _add(name: str, params: dict[str, Any], fn: Callable[[], Any]) -> None:
+        if only and name not in only:
+            return
+        r = bench(name, params, fn, rounds=rounds, min_time_s=min_time_s)
+        print(f"[bench] {r.key:<40} {r.ops_s:>12.1f} ops/s  {r.us_per_op:>10.1f} us/op  peak={r.alloc_peak_bytes}B blocks={r.alloc_blocks}")
+        results.append(r)
+
+    secret = generate_secret_32()
+    for n in n_list:
+        for k in k_list:
+            if not 1 < k <= n <= 255:
+                continue
+            _add("shamir_split", {"k": k, "n": n}, lambda n=n, k=k: split_secret(secret, n=n, k=k))
+            shares = split_secret(secret, n=n, k=k)[-k:]
+            _add("shamir_reconstruct", {"k": k, "n": n}, lambda shares=shares: reconstruct_secret(shares))
+
+    key = os.urandom(32)
+    aad = b"P001_HA:1"
+    for size in payload_sizes:
+        payload = os.urandom(size)
+        enc = encrypt(key, payload, aad=aad)
+        _add("aes_encrypt", {"bytes": size}, lambda payload=payload: encrypt(key, payload, aad=aad))
+        _add("aes_decrypt", {"bytes": size}, lambda enc=enc: decrypt(key, enc.nonce, enc.ciphertext, aad=aad))
+
+    with tempfile.TemporaryDirectory(prefix="ta_crypto_bench_") as tmp:
+        nmk = PeerNMKStore(tmp, peer_ids=["peer1"])
+        share = split_secret(secret, n=5, k=3)[0]
+        wrapped = nmk.wrap_share("peer1", share, aad)
+        _add("nmk_wrap", {"share_bytes": len(share)}, lambda: nmk.wrap_share("peer1", share, aad))
+        _add("nmk_unwrap", {"share_bytes": len(share)}, lambda: nmk.unwrap_share("peer1", wrapped, aad))
+    return results
+
+
+def _environment() -> dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cryptography": cryptography.__version__,
+    }
+
+
+def compare_baseline(
+    results: list[BenchResult], baseline: dict[str, Any], tolerance: float, alloc_tolerance: float
+) -> list[str]:
+    # Throughput regresses when ops/s drops by more than `tolerance`; allocations when the
+    # peak grows by more than `alloc_tolerance` and at least 1KB (ignores interpreter noise).
+    entries = baseline.get("results", {})
+    problems: list[str] = []
+    for r in results:
+        old = entries.get(r.key)
+        if old is None:
+            continue
+        if r.ops_s < old["ops_s"] * (1 - tolerance):
+            problems.append(f"{r.key}: {old['ops_s']:.1f} -> {r.ops_s:.1f} ops/s ({(r.ops_s / old['ops_s'] - 1) * 100:.1f}%)")
+        old_peak = old.get("alloc_peak_bytes", 0)
+        if r.alloc_peak_bytes > old_peak * (1 + alloc_tolerance) and r.alloc_peak_bytes - old_peak > 1024:
+            problems.append(f"{r.key}: peak alloc {old_peak}B -> {r.alloc_peak_bytes}B")
+    return problems
+
+
+def write_baseline(path: Path, results: list[BenchResult]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    doc = {
+        "environment": _environment(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": {
+            r.key: {"ops_s": round(r.ops_s, 1), "alloc_peak_bytes": r.alloc_peak_bytes, "alloc_blocks": r.alloc_blocks}
+            for r in results
+        },
+    }
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2, sort_keys=False)
+        f.write("\n")
+
+
+def write_results(out_csv: Path, results: list[BenchResult]) -> None:
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
+    with out_csv.open("w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(
+            f,
+            fieldnames=[
+                "name", "key", "k", "n", "bytes", "ops_s", "ops_s_stdev", "us_per_op",
+                "alloc_peak_bytes", "alloc_blocks", "rounds", "iterations",
+            ],
+        )
+        w.writeheader()
+        for r in results:
+            w.writerow(
+                {
+                    "name": r.name,
+                    "key": r.key,
+                    "k": r.params.get("k", ""),
+                    "n": r.params.get("n", ""),
+                    "bytes": r.params.get("bytes", r.params.get("share_bytes", "")),
+                    "ops_s": r.ops_s,
+                    "ops_s_stdev": r.ops_s_stdev,
+                    "us_per_op": r.us_per_op,
+                    "alloc_peak_bytes": r.alloc_peak_bytes,
+                    "alloc_blocks": r.alloc_blocks,
+                    "rounds": r.rounds,
+                    "iterations": r.iterations,
+                }
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Microbenchmarks for Shamir, AES-GCM and NMK share wrapping.")
+    parser.add_argument("--n-list", default="5,50,255", help="Comma-separated share counts n")
+    parser.add_argument("--k-list", default="2,3,4,25,128", help="Comma-separated thresholds k (pairs with k > n are skipped)")
+    parser.add_argument("--payload-sizes", default="1KB,64KB,1MB,10MB", help="AES-GCM payload sizes")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed rounds per benchmark (median is reported)")
+    parser.add_argument("--min-time-ms", type=float, default=200, help="Target duration of one round")
+    parser.add_argument("--only", default=None, help="Comma-separated benchmark names to run")
+    parser.add_argument("--out", default=None, help="Results CSV (default: runtime_experiments/crypto_bench_results.csv)")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline JSON to compare against")
+    parser.add_argument("--no-compare", action="store_true", help="Skip the baseline comparison")
+    parser.add_argument("--write-baseline", action="store_true", help="Overwrite --baseline with this run's results")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative ops/s drop vs baseline")
+    parser.add_argument("--alloc-tolerance", type=float, default=0.25, help="Allowed relative peak-allocation growth")
+    args = parser.parse_args()
+
+    results = run(
+        n_list=[int(x) for x in args.n_list.split(",") if x.strip()],
+        k_list=[int(x) for x in args.k_list.split(",") if x.strip()],
+        payload_sizes=[parse_size(s) for s in args.payload_sizes.split(",") if s.strip()],
+        rounds=max(1, args.rounds),
+        min_time_s=args.min_time_ms / 1000,
+        only={s.strip() for s in args.only.split(",")} if args.only else None,
+    )
+
+    out = Path(args.out) if args.out else _REPO_ROOT / "runtime_experiments" / "crypto_bench_results.csv"
+    write_results(out, results)
+    print(f"Wrote: {out}")
+
+    baseline_path = Path(args.baseline)
+    if args.write_baseline:
+        write_baseline(baseline_path, results)
+        print(f"Wrote baseline: {baseline_path}")
+    elif not args.no_compare and baseline_path.exists():
+        with baseline_path.open("r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("environment") != _environment():
+            print(f"[baseline] recorded on {baseline.get('environment')}; this run: {_environment()}")
+        problems = compare_baseline(results, baseline, args.tolerance, args.alloc_tolerance)
+        for p in problems:
+            print(f"[regression] {p}")
+        if problems:
+            sys.exit(1)
+        print("[baseline] no regressions")
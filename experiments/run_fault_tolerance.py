@@ -1,9 +1,12 @@
 import csv
+import math
 import os
 import random
 import sys
 import time
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 
 _REPO_ROOT = Path(__file__).resolve().parents[1]
@@ -14,10 +17,24 @@ from fabric_adapter.mock_fabric import MockFabricAdapter
 from fabric_adapter.rest_fabric import FabricRestAdapter
 from peer_nodes.peer_nmk import PeerNMKStore
 from storage.object_store import LocalObjectStore
+from trusted_authority_service.policy import priority_to_threshold
 from trusted_authority_service.ta_core import TrustedAuthorityCore
 from patient_data import generate_patient_documents
 from disease_mapper import DiseaseCodeMapper
 
+METHODS = ("full", "availability", "exact")
+
+
+@dataclass
+class DocSpec:
+    record_key: str
+    payload: bytes
+    priority: str
+    patient_name: str = ""
+    disease: str = ""
+    threshold_k: int = 0
+    holders: tuple[str, ...] = ()  # peers holding a wrapped share (from the ledger, or all peers)
+
 
 def _build_ta(runtime_dir: Path, peer_ids: list[str], *, live: bool, fabric_rest_url: str | None) -> TrustedAuthorityCore:
     if live:
@@ -30,6 +47,133 @@ def _build_ta(runtime_dir: Path, peer_ids: list[str], *, live: bool, fabric_rest
     return TrustedAuthorityCore(fabric=fabric, store=store, nmk_store=nmk, peer_ids=peer_ids)
 
 
+def exact_success_probability(n_peers: int, holders: int, k: int, f: int) -> float:
+    # f of n_peers fail uniformly at random; the number of failed share holders is
+    # hypergeometric, and reconstruction succeeds while holders - failed_holders >= k.
+    if f > n_peers:
+        return 0.0
+    ok = 0
+    for x in range(0, min(f, holders - k) + 1):
+        if f - x <= n_peers - holders:
+            ok += math.comb(holders, x) * math.comb(n_peers - holders, f - x)
+    return ok / math.comb(n_peers, f)
+
+
+def _trial_rng(seed: int, record_key: str, f: int) -> random.Random:
+    # Per-task stream so results do not depend on worker count or scheduling.
+    return random.Random(f"{seed}:{record_key}:{f}")
+
+
+def _availability_task(args: tuple) -> list[tuple[int, int]]:
+    peer_ids, holders, k, record_key, trials, seed = args
+    held = set(holders)
+    holder_idx = {i for i, p in enumerate(peer_ids) if p in held}
+    n = len(peer_ids)
+    out: list[tuple[int, int]] = []
+    for f in range(0, n + 1):
+        # Losing at most f holders is always survivable when f <= h - k, and fewer than k
+        # peers left can never suffice; only the band in between needs sampling.
+        if f <= len(holder_idx) - k:
+            out.append((f, trials))
+            continue
+        if n - f < k:
+            out.append((f, 0))
+            continue
+        rng = _trial_rng(seed, record_key, f)
+        success = 0
+        for _ in range(trials):
+            down = rng.sample(range(n), f) if f > 0 else ()
+            lost = sum(1 for i in down if i in holder_idx)
+            if len(holder_idx) - lost >= k:
+                success += 1
+        out.append((f, success))
+    return out
+
+
+_WORKER_TA: TrustedAuthorityCore | None = None
+_WORKER_PEERS: list[str] = []
+
+
+def _init_full_worker(runtime_dir: str, peer_ids: list[str], live: bool, fabric_rest_url: str | None) -> None:
+    global _WORKER_TA, _WORKER_PEERS
+    _WORKER_PEERS = list(peer_ids)
+    _WORKER_TA = _build_ta(Path(runtime_dir), _WORKER_PEERS, live=live, fabric_rest_url=fabric_rest_url)
+
+
+def _full_task(args: tuple) -> tuple[int, int]:
+    record_key, f, trials, seed = args
+    rng = _trial_rng(seed, record_key, f)
+    success = 0
+    for _ in range(trials):
+        down = set(rng.sample(_WORKER_PEERS, k=f)) if f > 0 else set()
+        available = [p for p in _WORKER_PEERS if p not in down]
+        try:
+            _WORKER_TA.reconstruct_latest_with_peer_availability(
+                patient_id=record_key,
+                requester="experiment",
+                available_peer_ids=available,
+            )
+            success += 1
+        except Exception:
+            pass
+    return f, success
+
+
+def _seal_docs(ta: TrustedAuthorityCore, docs: list[DocSpec], group: int = 256) -> None:
+    # Seal at each document's policy threshold and commit in groups (one ledger write per
+    # group), then read back which peers actually hold shares.
+    for start in range(0, len(docs), group):
+        chunk = docs[start : start + group]
+        records = [
+            ta._build_record(
+                d.record_key,
+                d.payload,
+                version=1,
+                priority=d.priority,
+                audit_logs=[],
+                event="CREATE",
+                requester="experiment",
+            )
+            for d in chunk
+        ]
+        errors = ta.commit_records(records)
+        for d, err in zip(chunk, errors):
+            if err is not None:
+                raise ValueError(f"sealing {d.record_key} failed: {err}")
+    latest = ta._get_latest_many([d.record_key for d in docs])
+    for d in docs:
+        rec = latest[d.record_key]
+        d.threshold_k = rec.threshold
+        d.holders = tuple(p for p in ta.peer_ids if rec.shares_wrapped.get(p) is not None)
+
+
+def _load_docs(mode: str, patient_id: str, n_docs: int, seed: int, peer_ids: list[str]) -> list[DocSpec]:
+    docs: list[DocSpec] = []
+    if mode == "single":
+        original = b"Patient report for evaluation"
+        for prio in ["LOW", "MEDIUM", "HIGH"]:
+            docs.append(DocSpec(record_key=f"{patient_id}_{prio}", payload=original, priority=prio))
+    elif mode == "patient_docs":
+        mapper = DiseaseCodeMapper()
+        for d in generate_patient_documents(n_docs, seed=seed, start_patient_number=21):
+            dc = mapper.ensure_disease(d.disease)
+            docs.append(
+                DocSpec(
+                    record_key=mapper.make_standard_record_key(d.patient_number, d.disease),
+                    payload=d.to_text().encode("utf-8"),
+                    priority=d.priority,
+                    patient_name=d.patient_name,
+                    disease=dc.disease,
+                )
+            )
+    else:
+        raise ValueError("invalid mode (expected: single | patient_docs)")
+    for d in docs:
+        d.threshold_k = priority_to_threshold(d.priority)
+        d.holders = tuple(peer_ids)
+    return docs
+
+
 def run(
     out_csv: Path,
     n_peers: int = 5,
@@ -40,75 +184,93 @@ def run(
     fabric_rest_url: str | None = None,
     mode: str = "single",
     n_docs: int = 50,
+    method: str = "full",
+    workers: int = 1,
+    seal: bool | None = None,
 ) -> None:
+    if method not in METHODS:
+        raise ValueError(f"invalid method (expected: {' | '.join(METHODS)})")
+    if not 2 <= n_peers <= 255:
+        raise ValueError("n_peers must be between 2 and 255")
     random.seed(seed)
+    mode = (mode or "").strip().lower()
 
     base = Path(__file__).resolve().parents[1]
-    runtime_dir = base / "runtime_experiments" / f"fault_tolerance_{int(time.time())}"
+    runtime_dir = base / "runtime_experiments" / f"fault_tolerance_{time.time_ns()}"
     runtime_dir.mkdir(parents=True, exist_ok=True)
 
     peer_ids = [f"peer{i}" for i in range(1, n_peers + 1)]
-    ta = _build_ta(runtime_dir, peer_ids, live=live, fabric_rest_url=fabric_rest_url)
+    docs = _load_docs(mode, patient_id, n_docs, seed, peer_ids)
+    # Full trials need real records; availability checks the sealed records by default;
+    # exact mode is analytic over the policy thresholds unless sealing is requested.
+    if seal is None:
+        seal = method != "exact"
+    if method == "full":
+        seal = True
+    print(
+        f"[fault_tolerance] mode={mode} method={method} docs={len(docs)} n_peers={n_peers} "
+        f"trials={trials_per_f if method != 'exact' else '-'} workers={workers} seal={seal}"
+    )
 
-    rows: list[dict] = []
-    mapper = DiseaseCodeMapper()
-
-    def _run_one(record_key: str, payload: bytes, *, prio: str, patient_name: str | None, disease: str | None) -> None:
-        os.environ["MOCK_LLM_PRIORITY"] = prio
-        up = ta.upload_new_record(patient_id=record_key, file_bytes=payload, filename="eval.txt")
-
-        for f in range(0, n_peers + 1):
-            success = 0
-            for _ in range(trials_per_f):
-                down = set(random.sample(peer_ids, k=f)) if f > 0 else set()
-                available = [p for p in peer_ids if p not in down]
-                try:
-                    _ = ta.reconstruct_latest_with_peer_availability(
-                        patient_id=up.patient_id,
-                        requester="experiment",
-                        available_peer_ids=available,
-                    )
-                    success += 1
-                except Exception:
-                    pass
+    t0 = time.perf_counter()
+    if seal:
+        ta = _build_ta(runtime_dir, peer_ids, live=live, fabric_rest_url=fabric_rest_url)
+        _seal_docs(ta, docs)
+        print(f"[seal] {len(docs)} records in {time.perf_counter() - t0:.1f}s")
+
+    results: dict[str, list[tuple[int, int | float]]] = {}
+    if method == "exact":
+        for d in docs:
+            results[d.record_key] = [
+                (f, exact_success_probability(n_peers, len(d.holders), d.threshold_k, f)) for f in range(0, n_peers + 1)
+            ]
+    elif method == "availability":
+        tasks = [(peer_ids, d.holders, d.threshold_k, d.record_key, trials_per_f, seed) for d in docs]
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                outs = list(pool.map(_availability_task, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+        else:
+            outs = [_availability_task(t) for t in tasks]
+        for d, out in zip(docs, outs):
+            results[d.record_key] = list(out)
+    else:
+        tasks = [(d.record_key, f, trials_per_f, seed) for d in docs for f in range(0, n_peers + 1)]
+        init_args = (str(runtime_dir), peer_ids, live, fabric_rest_url)
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_full_worker, initargs=init_args) as pool:
+                outs = list(pool.map(_full_task, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+        else:
+            _init_full_worker(*init_args)
+            outs = [_full_task(t) for t in tasks]
+        for (record_key, _, _, _), out in zip(tasks, outs):
+            results.setdefault(record_key, []).append(out)
+    print(f"[{method}] done in {time.perf_counter() - t0:.1f}s")
 
+    rows: list[dict] = []
+    for d in docs:
+        if mode == "patient_docs":
+            print(f"[doc] name={d.patient_name} disease={d.disease} prio={d.priority} code={d.record_key}")
+        for f, value in sorted(results[d.record_key]):
+            exact = method == "exact"
             rows.append(
                 {
                     "mode": mode,
-                    "patient_name": patient_name or "",
-                    "disease": disease or "",
-                    "priority": prio,
-                    "record_key": record_key,
-                    "threshold_k": up.threshold,
+                    "method": method,
+                    "patient_name": d.patient_name,
+                    "disease": d.disease,
+                    "priority": d.priority,
+                    "record_key": d.record_key,
+                    "threshold_k": d.threshold_k,
                     "n_peers": n_peers,
+                    "share_holders": len(d.holders),
                     "failed_peers_f": f,
                     "available_peers": n_peers - f,
-                    "trials": trials_per_f,
-                    "success": success,
-                    "success_rate": success / float(trials_per_f),
+                    "trials": "" if exact else trials_per_f,
+                    "success": "" if exact else value,
+                    "success_rate": value if exact else value / float(trials_per_f),
                 }
             )
 
-    if (mode or "").strip().lower() == "single":
-        original = b"Patient report for evaluation"
-        priorities = ["LOW", "MEDIUM", "HIGH"]
-        print(f"[fault_tolerance] mode=single priorities={priorities} trials={trials_per_f} n_peers={n_peers}")
-        for prio in priorities:
-            _run_one(patient_id + f"_{prio}", original, prio=prio, patient_name=None, disease=None)
-    elif (mode or "").strip().lower() == "patient_docs":
-        print(f"[fault_tolerance] mode=patient_docs n_docs={n_docs} trials={trials_per_f} n_peers={n_peers}")
-        docs = generate_patient_documents(n_docs, seed=seed, start_patient_number=21)
-        for d in docs:
-            dc = mapper.ensure_disease(d.disease)
-            record_key = mapper.make_standard_record_key(d.patient_number, d.disease)
-            payload = d.to_text().encode("utf-8")
-            print(
-                f"[doc] name={d.patient_name} disease={dc.disease} prio={d.priority} code={record_key} legacy={dc.legacy_code or ''}"
-            )
-            _run_one(record_key, payload, prio=d.priority, patient_name=d.patient_name, disease=dc.disease)
-    else:
-        raise ValueError("invalid mode (expected: single | patient_docs)")
-
     out_csv.parent.mkdir(parents=True, exist_ok=True)
     with out_csv.open("w", newline="", encoding="utf-8") as f:
         w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
@@ -126,11 +288,20 @@ if __name__ == "__main__":
         default=None,
         help="Fabric gateway base URL (default: FABRIC_REST_URL env or http://127.0.0.1:8800)",
     )
-    parser.add_argument("--n-peers", type=int, default=5)
+    parser.add_argument("--n-peers", type=int, default=5, help="Number of peers (2..255)")
     parser.add_argument("--trials", type=int, default=50, help="Trials per failure count f")
     parser.add_argument("--seed", type=int, default=7)
     parser.add_argument("--mode", default="single", choices=["single", "patient_docs"], help="Execution mode")
     parser.add_argument("--n-docs", type=int, default=50, help="Number of patient documents (mode=patient_docs)")
+    parser.add_argument(
+        "--method",
+        default="full",
+        choices=list(METHODS),
+        help="full: decrypt every trial; availability: Monte Carlo share-sufficiency check; exact: hypergeometric",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Process-pool size for full/availability trials")
+    parser.add_argument("--seal", dest="seal", action="store_true", default=None, help="Seal records even for method=exact")
+    parser.add_argument("--no-seal", dest="seal", action="store_false", help="Use policy thresholds without sealing (availability/exact)")
     args = parser.parse_args()
 
     base = Path(__file__).resolve().parents[1]
@@ -144,4 +315,7 @@ if __name__ == "__main__":
         fabric_rest_url=args.fabric_rest_url,
         mode=args.mode,
         n_docs=args.n_docs,
+        method=args.method,
+        workers=max(1, args.workers),
+        seal=args.seal,
     )
@@ -1,9 +1,14 @@
 import csv
+import math
 import os
+import statistics
+import subprocess
 import sys
 import time
 import argparse
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any
 
 _REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(_REPO_ROOT) not in sys.path:
@@ -11,24 +16,187 @@ if str(_REPO_ROOT) not in sys.path:
 
 from fabric_adapter.mock_fabric import MockFabricAdapter
 from fabric_adapter.rest_fabric import FabricRestAdapter
+from observability import spans
 from peer_nodes.peer_nmk import PeerNMKStore
 from storage.object_store import LocalObjectStore
+from trusted_authority_service.policy import priority_to_threshold
 from trusted_authority_service.ta_core import TrustedAuthorityCore
 from patient_data import generate_patient_documents
 from disease_mapper import DiseaseCodeMapper
 
+STAGES = ("ledger_get", "unwrap", "reconstruct", "store_get", "verify", "decrypt", "audit_write", "total")
+SUMMARY_KEYS = ("mode", "payload_bytes", "n_peers", "threshold_k", "priority", "audit", "stage")
 
-def _build_ta(runtime_dir: Path, peer_ids: list[str], *, live: bool, fabric_rest_url: str | None) -> TrustedAuthorityCore:
+# Two-sided 95% Student t critical values by degrees of freedom; 1.96 beyond the table.
+_T95 = [
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+]
+
+
+class _NoAuditFabric:
+    # Drops READ audit appends so repeated reads see the same record and the audit write is
+    # excluded from the read path (--audit off).
+    def __init__(self, inner: Any):
+        self.inner = inner
+
+    def appendAuditLog(self, patient_id: str, audit_entry: dict) -> None:
+        return None
+
+    def appendAuditLogs(self, entries: list) -> None:
+        return None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inner, name)
+
+
+@dataclass(frozen=True)
+class Config:
+    payload_bytes: int
+    n_peers: int
+    threshold_k: int
+    priority: str
+
+
+def parse_size(text: str) -> int:
+    t = text.strip().upper()
+    for suffix, mult in (("GB", 1024**3), ("MB", 1024**2), ("KB", 1024), ("B", 1)):
+        if t.endswith(suffix):
+            return int(float(t[: -len(suffix)]) * mult)
+    return int(t)
+
+
+def make_payload(size: int) -> bytes:
+    chunk = b"Latency evaluation payload. "
+    return (chunk * (size // len(chunk) + 1))[:size]
+
+
+def _git_rev() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=_REPO_ROOT, capture_output=True, text=True, timeout=5)
+        return out.stdout.strip()
+    except Exception:
+        return ""
+
+
+def _build_ta(
+    runtime_dir: Path,
+    peer_ids: list[str],
+    *,
+    live: bool,
+    fabric_rest_url: str | None,
+    audit: bool = True,
+) -> TrustedAuthorityCore:
     if live:
         base_url = (fabric_rest_url or os.getenv("FABRIC_REST_URL") or "http://127.0.0.1:8800").strip()
         fabric = FabricRestAdapter(base_url)
     else:
         fabric = MockFabricAdapter(str(runtime_dir / "ledger" / "ledger.json"))
+    if not audit:
+        fabric = _NoAuditFabric(fabric)
     store = LocalObjectStore(str(runtime_dir / "object_store"))
     nmk = PeerNMKStore(str(runtime_dir / "nmks"), peer_ids=peer_ids)
     return TrustedAuthorityCore(fabric=fabric, store=store, nmk_store=nmk, peer_ids=peer_ids)
 
 
+def _seal(ta: TrustedAuthorityCore, record_key: str, payload: bytes, *, priority: str, threshold: int) -> None:
+    rec = ta._build_record(
+        record_key,
+        payload,
+        version=1,
+        priority=priority,
+        audit_logs=[],
+        event="CREATE",
+        requester="experiment",
+        threshold=threshold,
+    )
+    ta.fabric.createRecord(rec)
+
+
+def _measure(ta: TrustedAuthorityCore, record_key: str) -> spans.OpTimings:
+    with spans.collect() as ops:
+        ta.reconstruct_latest(patient_id=record_key, requester="experiment")
+    return ops[-1]
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    rank = max(1, math.ceil(p / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(rows: list[dict]) -> list[dict]:
+    groups: dict[tuple, list[float]] = {}
+    for r in rows:
+        groups.setdefault(tuple(r[k] for k in SUMMARY_KEYS), []).append(float(r["seconds"]))
+    out: list[dict] = []
+    for key, values in groups.items():
+        values.sort()
+        n = len(values)
+        mean = sum(values) / n
+        sd = statistics.stdev(values) if n > 1 else 0.0
+        t = _T95[n - 2] if 1 < n <= len(_T95) + 1 else 1.96
+        half = t * sd / math.sqrt(n) if n > 1 else 0.0
+        out.append(
+            {
+                **dict(zip(SUMMARY_KEYS, key)),
+                "n": n,
+                "mean_s": mean,
+                "stdev_s": sd,
+                "ci95_low_s": mean - half,
+                "ci95_high_s": mean + half,
+                "min_s": values[0],
+                "p50_s": percentile(values, 50),
+                "p90_s": percentile(values, 90),
+                "p95_s": percentile(values, 95),
+                "p99_s": percentile(values, 99),
+                "max_s": values[-1],
+            }
+        )
+    return out
+
+
+def compare_baseline(summary: list[dict], baseline_csv: Path, tolerance: float, min_delta_s: float, stages: set[str]) -> list[str]:
+    # A configuration regresses when its p50 grows by more than `tolerance` (relative) and
+    # `min_delta_s` (absolute, to ignore timer noise on microsecond stages).
+    with baseline_csv.open(newline="", encoding="utf-8") as f:
+        baseline = {tuple(r[k] for k in SUMMARY_KEYS): float(r["p50_s"]) for r in csv.DictReader(f)}
+    problems: list[str] = []
+    for r in summary:
+        if r["stage"] not in stages:
+            continue
+        key = tuple(str(r[k]) for k in SUMMARY_KEYS)
+        old = baseline.get(key)
+        if old is None:
+            continue
+        new = r["p50_s"]
+        if new > old * (1 + tolerance) and new - old > min_delta_s:
+            problems.append(
+                f"{dict(zip(SUMMARY_KEYS, key))}: p50 {old * 1000:.3f}ms -> {new * 1000:.3f}ms (+{(new / old - 1) * 100:.1f}%)"
+            )
+    return problems
+
+
+def _configs_for(
+    payload_sizes: list[int], n_peers_list: list[int], thresholds: list[str]
+) -> list[Config]:
+    configs: list[Config] = []
+    for n in n_peers_list:
+        for size in payload_sizes:
+            for t in thresholds:
+                if t.upper() in {"HIGH", "MEDIUM", "LOW"}:
+                    priority, k = t.upper(), priority_to_threshold(t)
+                else:
+                    priority, k = "CUSTOM", int(t)
+                if not 2 <= k <= n <= 255:  # what crypto.shamir.split_secret accepts
+                    print(f"[skip] threshold k={k} with n_peers={n}")
+                    continue
+                configs.append(Config(payload_bytes=size, n_peers=n, threshold_k=k, priority=priority))
+    return configs
+
+
 def run(
     out_csv: Path,
     n_peers: int = 5,
@@ -39,51 +207,71 @@ def run(
     mode: str = "single",
     n_docs: int = 50,
     seed: int = 7,
-) -> None:
+    warmup: int = 3,
+    payload_sizes: list[int] | None = None,
+    n_peers_list: list[int] | None = None,
+    thresholds: list[str] | None = None,
+    audit: bool = True,
+    label: str = "",
+) -> tuple[list[dict], list[dict]]:
     base = Path(__file__).resolve().parents[1]
     runtime_dir = base / "runtime_experiments" / f"latency_{int(time.time())}"
     runtime_dir.mkdir(parents=True, exist_ok=True)
 
-    peer_ids = [f"peer{i}" for i in range(1, n_peers + 1)]
-    ta = _build_ta(runtime_dir, peer_ids, live=live, fabric_rest_url=fabric_rest_url)
-
+    mode = (mode or "").strip().lower()
+    rev = _git_rev()
     rows: list[dict] = []
-    mapper = DiseaseCodeMapper()
+    tas: dict[int, TrustedAuthorityCore] = {}
+
+    def _ta(n: int) -> TrustedAuthorityCore:
+        if n not in tas:
+            peer_ids = [f"peer{i}" for i in range(1, n + 1)]
+            tas[n] = _build_ta(runtime_dir / f"n{n}", peer_ids, live=live, fabric_rest_url=fabric_rest_url, audit=audit)
+        return tas[n]
 
-    def _run_one(record_key: str, payload: bytes, *, prio: str, patient_name: str | None, disease: str | None) -> None:
-        os.environ["MOCK_LLM_PRIORITY"] = prio
-        up = ta.upload_new_record(patient_id=record_key, file_bytes=payload, filename="lat.txt")
+    def _run_one(cfg: Config, record_key: str, payload: bytes, *, patient_name: str = "", disease: str = "") -> None:
+        ta = _ta(cfg.n_peers)
+        _seal(ta, record_key, payload, priority=cfg.priority if cfg.priority != "CUSTOM" else "HIGH", threshold=cfg.threshold_k)
+        for _ in range(warmup):
+            _measure(ta, record_key)
         for i in range(repeats):
-            res = ta.reconstruct_latest_with_metrics(patient_id=up.patient_id, requester="experiment")
-            t = res["timings"]
-            rows.append(
-                {
-                    "mode": mode,
-                    "patient_name": patient_name or "",
-                    "disease": disease or "",
-                    "priority": prio,
-                    "record_key": record_key,
-                    "threshold_k": up.threshold,
-                    "n_peers": n_peers,
-                    "repeat": i,
-                    "fabric_get_latest_s": t["fabric_get_latest_s"],
-                    "unwrap_shares_s": t["unwrap_shares_s"],
-                    "reconstruct_secret_s": t["reconstruct_secret_s"],
-                    "object_store_get_s": t["object_store_get_s"],
-                    "decrypt_s": t["decrypt_s"],
-                    "total_s": t["total_s"],
-                }
-            )
+            op = _measure(ta, record_key)
+            timings = {**{s: op.stages.get(s, 0.0) for s in STAGES if s != "total"}, "total": op.total_s}
+            for stage, seconds in timings.items():
+                rows.append(
+                    {
+                        "label": label,
+                        "git_rev": rev,
+                        "mode": mode,
+                        "record_key": record_key,
+                        "patient_name": patient_name,
+                        "disease": disease,
+                        "payload_bytes": cfg.payload_bytes,
+                        "n_peers": cfg.n_peers,
+                        "threshold_k": cfg.threshold_k,
+                        "priority": cfg.priority,
+                        "audit": "on" if audit else "off",
+                        "repeat": i,
+                        "stage": stage,
+                        "seconds": seconds,
+                    }
+                )
 
-    if (mode or "").strip().lower() == "single":
-        payload = b"Latency evaluation payload. " * 1024  # ~26KB
-        priorities = ["LOW", "MEDIUM", "HIGH"]
-        print(f"[latency] mode=single priorities={priorities} repeats={repeats} n_peers={n_peers}")
-        for prio in priorities:
-            record_key = f"{patient_id_prefix}_{prio}"
-            _run_one(record_key, payload, prio=prio, patient_name=None, disease=None)
-    elif (mode or "").strip().lower() == "patient_docs":
-        print(f"[latency] mode=patient_docs n_docs={n_docs} repeats={repeats} n_peers={n_peers}")
+    if mode in {"single", "sweep"}:
+        sizes = payload_sizes or [26 * 1024]
+        peers = n_peers_list or [n_peers]
+        ths = thresholds or ["LOW", "MEDIUM", "HIGH"]
+        configs = _configs_for(sizes, peers, ths)
+        print(
+            f"[latency] mode={mode} configs={len(configs)} repeats={repeats} warmup={warmup} audit={'on' if audit else 'off'}"
+        )
+        for n, cfg in enumerate(configs):
+            record_key = f"{patient_id_prefix}_{n}_{cfg.priority}"
+            print(f"[cfg] payload={cfg.payload_bytes}B n_peers={cfg.n_peers} k={cfg.threshold_k} priority={cfg.priority}")
+            _run_one(cfg, record_key, make_payload(cfg.payload_bytes))
+    elif mode == "patient_docs":
+        mapper = DiseaseCodeMapper()
+        print(f"[latency] mode=patient_docs n_docs={n_docs} repeats={repeats} warmup={warmup} n_peers={n_peers}")
         docs = generate_patient_documents(n_docs, seed=seed, start_patient_number=21)
         for d in docs:
             dc = mapper.ensure_disease(d.disease)
@@ -92,17 +280,32 @@ def run(
             print(
                 f"[doc] name={d.patient_name} disease={dc.disease} prio={d.priority} code={record_key} legacy={dc.legacy_code or ''}"
             )
-            _run_one(record_key, payload, prio=d.priority, patient_name=d.patient_name, disease=dc.disease)
+            cfg = Config(
+                payload_bytes=len(payload), n_peers=n_peers, threshold_k=priority_to_threshold(d.priority), priority=d.priority
+            )
+            _run_one(cfg, record_key, payload, patient_name=d.patient_name, disease=dc.disease)
     else:
-        raise ValueError("invalid mode (expected: single | patient_docs)")
+        raise ValueError("invalid mode (expected: single | sweep | patient_docs)")
+
+    summary = summarize(rows)
+    for r in summary:
+        r["label"] = label
+        r["git_rev"] = rev
 
     out_csv.parent.mkdir(parents=True, exist_ok=True)
     with out_csv.open("w", newline="", encoding="utf-8") as f:
         w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
         w.writeheader()
         w.writerows(rows)
+    summary_csv = out_csv.with_name(out_csv.stem + "_summary.csv")
+    with summary_csv.open("w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=["label", "git_rev", *[k for k in summary[0] if k not in {"label", "git_rev"}]])
+        w.writeheader()
+        w.writerows(summary)
 
     print(f"Wrote: {out_csv}")
+    print(f"Wrote: {summary_csv}")
+    return rows, summary
 
 
 if __name__ == "__main__":
@@ -115,14 +318,36 @@ if __name__ == "__main__":
     )
     parser.add_argument("--n-peers", type=int, default=5)
     parser.add_argument("--repeats", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed reads per configuration before measuring")
     parser.add_argument("--seed", type=int, default=7)
-    parser.add_argument("--mode", default="single", choices=["single", "patient_docs"], help="Execution mode")
+    parser.add_argument("--mode", default="single", choices=["single", "sweep", "patient_docs"], help="Execution mode")
     parser.add_argument("--n-docs", type=int, default=50, help="Number of patient documents (mode=patient_docs)")
+    parser.add_argument(
+        "--payload-sizes",
+        default=None,
+        help="Comma-separated sizes for mode=sweep, e.g. 1KB,10KB,100KB,1MB,10MB,100MB (default: 26KB)",
+    )
+    parser.add_argument("--n-peers-list", default=None, help="Comma-separated peer counts for mode=sweep (default: --n-peers)")
+    parser.add_argument(
+        "--thresholds",
+        default=None,
+        help="Comma-separated thresholds: priorities (LOW,MEDIUM,HIGH -> policy k) and/or explicit k values",
+    )
+    parser.add_argument("--audit", default="on", choices=["on", "off"], help="off: drop READ audit writes (isolates the read path)")
+    parser.add_argument("--label", default="", help="Build/config label stored in every row")
+    parser.add_argument("--out", default=None, help="Raw tidy CSV path (summary is written next to it)")
+    parser.add_argument("--baseline", default=None, help="Summary CSV from an earlier build to regression-check against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative p50 growth vs baseline")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="Ignore p50 growth below this many ms")
+    parser.add_argument("--check-stages", default="total", help="Stages to regression-check (comma-separated or 'all')")
     args = parser.parse_args()
 
+    if args.mode == "sweep" and not args.payload_sizes:
+        args.payload_sizes = "1KB,10KB,100KB,1MB,10MB,100MB"
+
     base = Path(__file__).resolve().parents[1]
-    out = base / "runtime_experiments" / "latency_breakdown_results.csv"
-    run(
+    out = Path(args.out) if args.out else base / "runtime_experiments" / "latency_breakdown_results.csv"
+    _, summary = run(
         out_csv=out,
         n_peers=args.n_peers,
         repeats=args.repeats,
@@ -131,4 +356,19 @@ if __name__ == "__main__":
         mode=args.mode,
         n_docs=args.n_docs,
         seed=args.seed,
+        warmup=args.warmup,
+        payload_sizes=[parse_size(s) for s in args.payload_sizes.split(",")] if args.payload_sizes else None,
+        n_peers_list=[int(x) for x in args.n_peers_list.split(",")] if args.n_peers_list else None,
+        thresholds=[t.strip() for t in args.thresholds.split(",") if t.strip()] if args.thresholds else None,
+        audit=args.audit == "on",
+        label=args.label,
     )
+
+    if args.baseline:
+        stages = set(STAGES) if args.check_stages == "all" else {s.strip() for s in args.check_stages.split(",")}
+        problems = compare_baseline(summary, Path(args.baseline), args.tolerance, args.min_delta_ms / 1000, stages)
+        for p in problems:
+            print(f"[regression] {p}")
+        if problems:
+            sys.exit(1)
+        print("[baseline] no regressions")
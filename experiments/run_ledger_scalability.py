@@ -0,0 +1,290 @@
+import base64
+import csv
+import json
+import random
+import resource
+import shutil
+import statistics
+import sys
+import time
+import tracemalloc
+import argparse
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Callable
+
+_REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(_REPO_ROOT))
+
+from fabric_adapter.cached_fabric import _REQUESTS as _CACHE_REQUESTS
+from fabric_adapter.cached_fabric import CachedFabricAdapter
+from fabric_adapter.mock_fabric import MockFabricAdapter
+from fabric_adapter.models import FabricRecord
+from fabric_adapter.rest_fabric import FabricRestAdapter
+from fabric_adapter.stub_gateway import StubGateway
+from trusted_authority_service.policy import priority_to_threshold
+from patient_data import generate_patient_documents
+
+ADAPTERS = ("mock", "rest", "cached")
+OPS = ("getLatestRecord", "updateRecord", "appendAuditLog")
+
+
+def _percentile(values: list[float], q: float) -> float:
+    s = sorted(values)
+    if not s:
+        return 0.0
+    idx = min(len(s) - 1, max(0, int(round(q * (len(s) - 1)))))
+    return s[idx]
+
+
+def synthetic_records(n: int, *, n_peers: int, seed: int) -> list[dict[str, Any]]:
+    # One version-1 record per generated patient document, in the ledger's dict form. Wrapped
+    # shares are random bytes of the real size (12-byte nonce + 33-byte share + 16-byte tag).
+    rng = random.Random(seed)
+    out: list[dict[str, Any]] = []
+    for d in generate_patient_documents(n, seed=seed, start_patient_number=1):
+        out.append(
+            {
+                "patient_id": f"P{d.patient_number}",
+                "priority": d.priority,
+                "threshold": priority_to_threshold(d.priority),
+                "version": 1,
+                "encrypted_file_path": f"objects/P{d.patient_number}_v1.bin",
+                "encrypted_file_hash": rng.randbytes(32).hex(),
+                "shares_wrapped": {
+                    f"peer{i}": base64.b64encode(rng.randbytes(61)).decode("ascii") for i in range(1, n_peers + 1)
+                },
+                "timestamp": 1_700_000_000.0 + d.patient_number,
+                "audit_logs": [],
+            }
+        )
+    return out
+
+
+def _audit_entry(i: int) -> dict[str, Any]:
+    return {"event": "READ", "requester": "bench", "timestamp": 1_700_000_000.0 + i, "version": 1}
+
+
+def _with_audit(records: list[dict[str, Any]], targets: list[str], audit_len: int) -> list[dict[str, Any]]:
+    # Shallow copies so the shared base list stays untouched across audit lengths.
+    wanted = set(targets)
+    out = []
+    for r in records:
+        if r["patient_id"] in wanted:
+            r = dict(r, audit_logs=[_audit_entry(i) for i in range(audit_len)])
+        out.append(r)
+    return out
+
+
+def _cache_hits() -> tuple[float, float]:
+    hits = _CACHE_REQUESTS.value(result="hit") + _CACHE_REQUESTS.value(result="revalidated")
+    return hits, hits + _CACHE_REQUESTS.value(result="miss") + _CACHE_REQUESTS.value(result="refreshed")
+
+
+def _time_op(
+    fn: Callable[[str], Any], pids: list[str], budget_s: float, prepare: Callable[[str], Any] | None = None
+) -> tuple[list[float], float | str]:
+    # prepare(pid) runs untimed before each call, e.g. to set the cache state being measured.
+    # The hit rate covers only the timed calls ("" if they made no cache lookups).
+    samples: list[float] = []
+    hits = lookups = 0.0
+    deadline = time.perf_counter() + budget_s
+    for pid in pids:
+        if prepare is not None:
+            prepare(pid)
+        h0, l0 = _cache_hits()
+        t0 = time.perf_counter()
+        fn(pid)
+        samples.append(time.perf_counter() - t0)
+        h1, l1 = _cache_hits()
+        hits += h1 - h0
+        lookups += l1 - l0
+        if time.perf_counter() > deadline:
+            break
+    return samples, round(hits / lookups, 3) if lookups else ""
+
+
+def _peak_alloc(fn: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - base)
+
+
+def _rss_mb() -> float:
+    # ru_maxrss is KB on Linux, bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+class _Target:
+    def __init__(self, adapter: str, records: list[dict[str, Any]], workdir: Path, latency: dict[str, float]):
+        self.adapter = adapter
+        self.ledger_path = workdir / "ledger.json"
+        self.gateway: StubGateway | None = None
+        if adapter == "rest":
+            self.gateway = StubGateway(**latency).start()
+            self.gateway.ledger.preload(records)
+            self.fabric: Any = FabricRestAdapter(self.gateway.url)
+        else:
+            # Written the way MockFabricAdapter saves, so the file size is what it would be.
+            workdir.mkdir(parents=True, exist_ok=True)
+            patients: dict[str, list[dict[str, Any]]] = {}
+            for r in records:
+                patients.setdefault(r["patient_id"], []).append(r)
+            with self.ledger_path.open("w", encoding="utf-8") as f:
+                json.dump({"patients": patients}, f, ensure_ascii=False, indent=2)
+            mock = MockFabricAdapter(str(self.ledger_path))
+            self.fabric = CachedFabricAdapter(mock) if adapter == "cached" else mock
+
+    def ledger_bytes(self) -> int | str:
+        if self.adapter == "rest":
+            return ""
+        return self.ledger_path.stat().st_size
+
+    def close(self) -> None:
+        if self.gateway is not None:
+            self.gateway.stop()
+
+
+def run(
+    out_csv: Path,
+    *,
+    adapters: list[str],
+    sizes: list[int],
+    audit_lens: list[int],
+    ops: int = 20,
+    n_peers: int = 5,
+    seed: int = 7,
+    budget_s: float = 30.0,
+    read_latency_ms: float = 0.0,
+    write_latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+) -> list[dict]:
+    base = Path(__file__).resolve().parents[1]
+    runtime_dir = base / "runtime_experiments" / f"ledger_scalability_{time.time_ns()}"
+    latency = {"read_latency_ms": read_latency_ms, "write_latency_ms": write_latency_ms, "jitter_ms": jitter_ms}
+    rng = random.Random(seed)
+    rows: list[dict] = []
+
+    for n in sizes:
+        t0 = time.perf_counter()
+        records = synthetic_records(n, n_peers=n_peers, seed=seed)
+        print(f"[records] n={n} generated in {time.perf_counter() - t0:.1f}s")
+        targets = [r["patient_id"] for r in rng.sample(records, min(ops, n))]
+        for audit_len in audit_lens:
+            preload = _with_audit(records, targets, audit_len)
+            for adapter in adapters:
+                t0 = time.perf_counter()
+                target = _Target(adapter, preload, runtime_dir / f"{adapter}_{n}_{audit_len}", latency)
+                preload_s = time.perf_counter() - t0
+                try:
+                    fabric = target.fabric
+                    versions = {pid: 1 for pid in targets}
+                    latest = {r["patient_id"]: FabricRecord(**r) for r in preload if r["patient_id"] in versions}
+
+                    def _get(pid: str) -> Any:
+                        return fabric.getLatestRecord(pid)
+
+                    def _update(pid: str) -> None:
+                        v = versions[pid]
+                        fabric.updateRecord(replace(latest[pid], version=v + 1, audit_logs=[]), expected_version=v)
+                        versions[pid] = v + 1
+
+                    def _audit(pid: str) -> None:
+                        fabric.appendAuditLog(pid, _audit_entry(0))
+
+                    # The cached adapter's reads are measured twice: "miss" drops each target from
+                    # the cache before its call, "hit" fetches it right before, so neither phase
+                    # depends on the TTL or on the order targets are visited in.
+                    phases: list[tuple[str, Callable[[str], Any], str, Callable[[str], Any] | None]] = [
+                        (OPS[0], _get, "", None),
+                        (OPS[1], _update, "", None),
+                        (OPS[2], _audit, "", None),
+                    ]
+                    if adapter == "cached":
+                        phases[0:1] = [(OPS[0], _get, "miss", fabric.cache.invalidate), (OPS[0], _get, "hit", _get)]
+                    for op, fn, cache, prepare in phases:
+                        if prepare is not None:
+                            prepare(targets[0])
+                        alloc = _peak_alloc(lambda: fn(targets[0]))
+                        samples, hit_rate = _time_op(fn, targets, budget_s, prepare)
+                        row = {
+                            "adapter": adapter,
+                            "n_records": n,
+                            "audit_len": audit_len,
+                            "op": op,
+                            "cache": cache,
+                            "ops": len(samples),
+                            "mean_ms": statistics.fmean(samples) * 1000,
+                            "p50_ms": _percentile(samples, 0.50) * 1000,
+                            "p95_ms": _percentile(samples, 0.95) * 1000,
+                            "max_ms": max(samples) * 1000,
+                            "preload_s": preload_s,
+                            "ledger_bytes": target.ledger_bytes(),
+                            "alloc_peak_bytes": alloc,
+                            "cache_hit_rate": hit_rate,
+                            "rss_max_mb": round(_rss_mb(), 1),
+                            "read_latency_ms": read_latency_ms if adapter == "rest" else "",
+                            "write_latency_ms": write_latency_ms if adapter == "rest" else "",
+                        }
+                        rows.append(row)
+                        print(
+                            f"[{adapter}] n={n} audit_len={audit_len} {op:<16}{' cache=' + cache if cache else ''} p50={row['p50_ms']:.2f}ms "
+                            f"p95={row['p95_ms']:.2f}ms{' hit_rate=' + str(hit_rate) if hit_rate != '' else ''} ops={row['ops']} ledger={row['ledger_bytes']}B alloc={alloc}B"
+                        )
+                finally:
+                    target.close()
+                    shutil.rmtree(runtime_dir / f"{adapter}_{n}_{audit_len}", ignore_errors=True)
+        del records
+
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
+    with out_csv.open("w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        w.writeheader()
+        w.writerows(rows)
+    shutil.rmtree(runtime_dir, ignore_errors=True)
+    print(f"Wrote: {out_csv}")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ledger adapter latency vs ledger size and audit-log length.")
+    parser.add_argument("--adapters", default="mock,rest,cached", help=f"Comma-separated: {', '.join(ADAPTERS)}")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated record counts (up to 1000000)")
+    parser.add_argument("--audit-lens", default="0,1000", help="Audit entries on the measured records")
+    parser.add_argument("--ops", type=int, default=20, help="Measured calls per operation")
+    parser.add_argument("--n-peers", type=int, default=5, help="Wrapped shares per record")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--budget-s", type=float, default=30.0, help="Stop measuring an operation after this long")
+    parser.add_argument("--read-latency-ms", type=float, default=0.0, help="Stub gateway delay per GET (adapter=rest)")
+    parser.add_argument("--write-latency-ms", type=float, default=0.0, help="Stub gateway delay per POST/PUT (adapter=rest)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Stub gateway uniform extra delay")
+    parser.add_argument("--out", default=None, help="Results CSV (default: runtime_experiments/ledger_scalability_results.csv)")
+    args = parser.parse_args()
+
+    adapters = [a.strip() for a in args.adapters.split(",") if a.strip()]
+    for a in adapters:
+        if a not in ADAPTERS:
+            raise ValueError(f"invalid adapter {a!r} (expected: {' | '.join(ADAPTERS)})")
+    base = Path(__file__).resolve().parents[1]
+    out = Path(args.out) if args.out else base / "runtime_experiments" / "ledger_scalability_results.csv"
+    run(
+        out,
+        adapters=adapters,
+        sizes=[int(x) for x in args.sizes.split(",") if x.strip()],
+        audit_lens=[int(x) for x in args.audit_lens.split(",") if x.strip()],
+        ops=max(1, args.ops),
+        n_peers=args.n_peers,
+        seed=args.seed,
+        budget_s=args.budget_s,
+        read_latency_ms=args.read_latency_ms,
+        write_latency_ms=args.write_latency_ms,
+        jitter_ms=args.jitter_ms,
+    )
@@ -0,0 +1,392 @@
+import argparse
+import asyncio
+import csv
+import json
+import math
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import httpx
+
+_REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(_REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(_REPO_ROOT))
+
+from patient_data import PayloadSizes
+
+OPS = ("upload", "view", "update", "history")
+PRIORITIES = ("HIGH", "MEDIUM", "LOW")
+
+
+@dataclass
+class Sample:
+    op: str
+    scheduled_s: float
+    latency_s: float
+    status: str
+    ok: bool
+    payload_bytes: int
+
+
+def _parse_mix(spec: str) -> dict[str, float]:
+    mix: dict[str, float] = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip().lower()
+        if name not in OPS:
+            raise ValueError(f"unknown op in mix: {name}")
+        mix[name] = float(weight)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("mix must have at least one positive weight")
+    return mix
+
+
+def make_payload(rng: random.Random, size: int) -> bytes:
+    # Clinical-looking text with an explicit priority line (honoured by the stub LLM backend).
+    head = (
+        f"Priority: {rng.choice(PRIORITIES)}\n"
+        f"Patient report generated by load test\n"
+        f"Vitals: BP {rng.randint(90, 180)}/{rng.randint(50, 110)} HR {rng.randint(45, 150)}\n"
+    ).encode("utf-8")
+    filler = b"Observation notes. " * (max(0, size - len(head)) // 19 + 1)
+    return (head + filler)[:size]
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    rank = max(1, math.ceil(p / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples: list[Sample], window_s: float) -> list[dict]:
+    rows: list[dict] = []
+    groups: dict[str, list[Sample]] = {"all": samples}
+    for s in samples:
+        groups.setdefault(s.op, []).append(s)
+    for name in ("all", *OPS):
+        group = groups.get(name)
+        if not group:
+            continue
+        ok = [s for s in group if s.ok]
+        lat = sorted(s.latency_s for s in ok)
+        statuses: dict[str, int] = {}
+        for s in group:
+            if not s.ok:
+                statuses[s.status] = statuses.get(s.status, 0) + 1
+        rows.append(
+            {
+                "op": name,
+                "requests": len(group),
+                "ok": len(ok),
+                "errors": len(group) - len(ok),
+                "error_rate": (len(group) - len(ok)) / len(group),
+                "throughput_rps": len(ok) / window_s if window_s > 0 else 0.0,
+                "mean_ms": 1000 * sum(lat) / len(lat) if lat else float("nan"),
+                "p50_ms": 1000 * percentile(lat, 50),
+                "p95_ms": 1000 * percentile(lat, 95),
+                "p99_ms": 1000 * percentile(lat, 99),
+                "p999_ms": 1000 * percentile(lat, 99.9),
+                "max_ms": 1000 * lat[-1] if lat else float("nan"),
+                "mean_payload_kb": sum(s.payload_bytes for s in group) / len(group) / 1024,
+                "error_statuses": json.dumps(statuses, sort_keys=True),
+            }
+        )
+    return rows
+
+
+class LoadGenerator:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        hospital_token: str,
+        doctor_token: str,
+        *,
+        mix: dict[str, float],
+        payloads: PayloadSizes,
+        seed: int,
+        hot_fraction: float,
+        hot_share: float,
+        patient_prefix: str,
+    ):
+        self.client = client
+        self.hospital = {"Authorization": f"Bearer {hospital_token}"}
+        self.doctor = {"Authorization": f"Bearer {doctor_token}"}
+        self.ops = list(mix)
+        self.weights = [mix[o] for o in self.ops]
+        self.payloads = payloads
+        self.rng = random.Random(seed)
+        self.hot_fraction = hot_fraction
+        self.hot_share = hot_share
+        self.patient_prefix = patient_prefix
+        self.patients: list[str] = []
+        self._next_patient = 0
+
+    def _new_patient(self) -> str:
+        self._next_patient += 1
+        return f"{self.patient_prefix}{self._next_patient:07d}"
+
+    def _existing_patient(self) -> str | None:
+        if not self.patients:
+            return None
+        hot = max(1, int(len(self.patients) * self.hot_fraction))
+        if self.rng.random() < self.hot_share:
+            return self.patients[self.rng.randrange(hot)]
+        return self.patients[self.rng.randrange(len(self.patients))]
+
+    def _plan(self, op: str) -> tuple[str, str | None, bytes | None]:
+        # Chosen on the scheduler side so the random stream is independent of completion order.
+        if op != "upload":
+            pid = self._existing_patient()
+            if pid is not None:
+                payload = make_payload(self.rng, self.payloads.sample(self.rng)) if op == "update" else None
+                return op, pid, payload
+            op = "upload"
+        return op, self._new_patient(), make_payload(self.rng, self.payloads.sample(self.rng))
+
+    def next_request(self) -> tuple[str, str | None, bytes | None]:
+        return self._plan(self.rng.choices(self.ops, weights=self.weights)[0])
+
+    async def execute(self, op: str, patient_id: str, payload: bytes | None) -> str:
+        if op == "upload":
+            r = await self.client.post(
+                "/records/upload",
+                params={"patient_id": patient_id},
+                files={"file": ("report.txt", payload)},
+                headers=self.hospital,
+            )
+            if r.status_code == 200:
+                self.patients.append(patient_id)
+        elif op == "update":
+            r = await self.client.post(
+                f"/records/{patient_id}/update", files={"file": ("report.txt", payload)}, headers=self.doctor
+            )
+        elif op == "view":
+            r = await self.client.get(f"/records/{patient_id}", headers=self.doctor)
+        else:
+            r = await self.client.get(f"/records/{patient_id}/history", headers=self.doctor)
+        await r.aread()
+        return str(r.status_code)
+
+    async def timed(self, op: str, patient_id: str, payload: bytes | None, scheduled: float, samples: list[Sample]) -> None:
+        # Latency counts from the scheduled arrival, so queueing in the generator is not hidden.
+        try:
+            status = await self.execute(op, patient_id, payload)
+        except httpx.HTTPError as e:
+            status = f"exc:{type(e).__name__}"
+        end = time.perf_counter()
+        samples.append(
+            Sample(
+                op=op,
+                scheduled_s=scheduled,
+                latency_s=end - scheduled,
+                status=status,
+                ok=status == "200",
+                payload_bytes=len(payload) if payload else 0,
+            )
+        )
+
+    async def preload(self, n: int, concurrency: int) -> None:
+        sem = asyncio.Semaphore(concurrency)
+
+        async def _one() -> None:
+            async with sem:
+                pid = self._new_patient()
+                await self.execute("upload", pid, make_payload(self.rng, self.payloads.sample(self.rng)))
+
+        await asyncio.gather(*(_one() for _ in range(n)))
+
+    async def run_closed(self, concurrency: int, duration_s: float, warmup_s: float) -> tuple[list[Sample], float]:
+        samples: list[Sample] = []
+        t0 = time.perf_counter()
+        measure_from = t0 + warmup_s
+        deadline = measure_from + duration_s
+
+        async def _worker() -> None:
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    return
+                op, pid, payload = self.next_request()
+                sink = samples if now >= measure_from else []
+                await self.timed(op, pid, payload, now, sink)
+
+        await asyncio.gather(*(_worker() for _ in range(concurrency)))
+        return samples, max(time.perf_counter() - measure_from, 1e-9)
+
+    async def run_open(self, rate: float, max_inflight: int, duration_s: float, warmup_s: float) -> tuple[list[Sample], float]:
+        # Poisson arrivals at `rate` req/s; at most max_inflight requests are sent concurrently.
+        samples: list[Sample] = []
+        sem = asyncio.Semaphore(max_inflight)
+        tasks: list[asyncio.Task] = []
+        t0 = time.perf_counter()
+        measure_from = t0 + warmup_s
+        deadline = measure_from + duration_s
+        next_at = t0
+
+        async def _one(op: str, pid: str, payload: bytes | None, scheduled: float, sink: list[Sample]) -> None:
+            async with sem:
+                await self.timed(op, pid, payload, scheduled, sink)
+
+        while next_at < deadline:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            op, pid, payload = self.next_request()
+            sink = samples if next_at >= measure_from else []
+            tasks.append(asyncio.create_task(_one(op, pid, payload, next_at, sink)))
+            next_at += self.rng.expovariate(rate)
+        await asyncio.gather(*tasks)
+        return samples, max(time.perf_counter() - measure_from, 1e-9)
+
+
+async def _tokens(client: httpx.AsyncClient, in_process: bool, args: argparse.Namespace) -> tuple[str, str]:
+    if in_process:
+        from trusted_authority_service.auth import User, mint_token
+
+        return mint_token(User("hospital1", "HOSPITAL")), mint_token(User("doctor1", "DOCTOR"))
+    out = []
+    for user, password in ((args.hospital_user, args.hospital_password), (args.doctor_user, args.doctor_password)):
+        r = await client.post("/auth/login", json={"username": user, "password": password})
+        r.raise_for_status()
+        out.append(r.json()["access_token"])
+    return out[0], out[1]
+
+
+async def run(args: argparse.Namespace) -> dict:
+    base = Path(__file__).resolve().parents[1]
+    in_process = not args.url
+    if in_process:
+        runtime_dir = base / "runtime_experiments" / f"load_{int(time.time())}"
+        runtime_dir.mkdir(parents=True, exist_ok=True)
+        os.environ.setdefault("TA_RUNTIME_DIR", str(runtime_dir))
+        os.environ.setdefault("JWT_SECRET", os.urandom(16).hex())
+        os.environ.setdefault("LLM_MODE", "stub")
+        from trusted_authority_service.app import app
+
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://ta.local"
+    else:
+        transport = None
+        base_url = args.url.rstrip("/")
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout_s, limits=limits) as client:
+        hospital_token, doctor_token = await _tokens(client, in_process, args)
+        gen = LoadGenerator(
+            client,
+            hospital_token,
+            doctor_token,
+            mix=_parse_mix(args.mix),
+            payloads=PayloadSizes(args.payload, args.payload_max_kb),
+            seed=args.seed,
+            hot_fraction=args.hot_fraction,
+            hot_share=args.hot_share,
+            patient_prefix=args.patient_prefix or f"LT{int(time.time()) % 100000}_",
+        )
+        if args.preload:
+            print(f"[load] preloading {args.preload} patients")
+            await gen.preload(args.preload, args.concurrency)
+
+        mode = "open" if args.rate else "closed"
+        print(
+            f"[load] target={'in-process' if in_process else base_url} mode={mode} concurrency={args.concurrency} "
+            f"rate={args.rate or '-'} duration={args.duration_s}s warmup={args.warmup_s}s mix={args.mix} payload={args.payload}"
+        )
+        if args.rate:
+            samples, window = await gen.run_open(args.rate, args.concurrency, args.duration_s, args.warmup_s)
+        else:
+            samples, window = await gen.run_closed(args.concurrency, args.duration_s, args.warmup_s)
+
+        server_metrics = None
+        try:
+            r = await client.get("/metrics", params={"format": "json"})
+            if r.status_code == 200:
+                server_metrics = r.json()
+        except httpx.HTTPError:
+            pass
+
+    rows = summarize(samples, window)
+    config = {
+        k: v for k, v in vars(args).items() if k not in {"hospital_password", "doctor_password", "out_dir", "raw"}
+    }
+    config.update({"mode": mode, "target": "in-process" if in_process else base_url, "measured_window_s": window})
+    return {"label": args.label, "config": config, "results": rows, "samples": samples, "server_metrics": server_metrics}
+
+
+def write_outputs(report: dict, out_dir: Path, raw: bool) -> None:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stem = f"load_{report['label']}" if report["label"] else f"load_{int(time.time())}"
+    rows = report["results"]
+
+    with (out_dir / f"{stem}.csv").open("w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=["label", *rows[0].keys()])
+        w.writeheader()
+        for row in rows:
+            w.writerow({"label": report["label"], **row})
+
+    with (out_dir / f"{stem}.json").open("w", encoding="utf-8") as f:
+        json.dump(
+            {k: v for k, v in report.items() if k != "samples"},
+            f,
+            indent=2,
+        )
+
+    if raw:
+        with (out_dir / f"{stem}_samples.csv").open("w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["op", "scheduled_s", "latency_s", "status", "ok", "payload_bytes"])
+            for s in report["samples"]:
+                w.writerow([s.op, f"{s.scheduled_s:.6f}", f"{s.latency_s:.6f}", s.status, int(s.ok), s.payload_bytes])
+
+    print(f"Wrote: {out_dir / stem}.csv, {stem}.json")
+
+
+def _print_table(rows: list[dict]) -> None:
+    print(f"{'op':<8} {'reqs':>7} {'err%':>6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'p99.9':>8}  (ms)")
+    for r in rows:
+        print(
+            f"{r['op']:<8} {r['requests']:>7} {100 * r['error_rate']:>6.2f} {r['throughput_rps']:>8.1f} "
+            f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['p999_ms']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent end-to-end load test of the TA API.")
+    parser.add_argument("--url", default=None, help="Base URL of a running TA (default: drive the app in-process)")
+    parser.add_argument("--mix", default="upload=0.15,view=0.6,update=0.1,history=0.15", help="Operation weights")
+    parser.add_argument("--concurrency", type=int, default=32, help="Workers (closed loop) or max in-flight (open loop)")
+    parser.add_argument("--rate", type=float, default=None, help="Open-loop Poisson arrival rate in req/s")
+    parser.add_argument("--duration-s", type=float, default=30.0)
+    parser.add_argument("--warmup-s", type=float, default=5.0)
+    parser.add_argument("--preload", type=int, default=200, help="Patients uploaded before measuring")
+    parser.add_argument(
+        "--payload",
+        default="lognormal:16,1.2",
+        help="Payload KB distribution: fixed:KB | uniform:LO,HI | lognormal:MEDIAN,SIGMA | choice:KB,KB,...",
+    )
+    parser.add_argument("--payload-max-kb", type=float, default=10240)
+    parser.add_argument("--hot-fraction", type=float, default=0.05, help="Fraction of patients that are hot")
+    parser.add_argument("--hot-share", type=float, default=0.5, help="Share of reads/updates that hit hot patients")
+    parser.add_argument("--patient-prefix", default=None)
+    parser.add_argument("--timeout-s", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--label", default="", help="Name for this configuration/release in the outputs")
+    parser.add_argument("--hospital-user", default="hospital1")
+    parser.add_argument("--hospital-password", default="hospital1")
+    parser.add_argument("--doctor-user", default="doctor1")
+    parser.add_argument("--doctor-password", default="doctor1")
+    parser.add_argument("--raw", action="store_true", help="Also write every request sample")
+    parser.add_argument("--out-dir", default=None)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    _print_table(report["results"])
+    out_dir = Path(args.out_dir) if args.out_dir else Path(__file__).resolve().parents[1] / "runtime_experiments"
+    write_outputs(report, out_dir, args.raw)
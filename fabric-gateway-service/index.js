@@ -89,6 +89,13 @@ function safeJsonFromBuffer(buf) {
   }
 }
 
+function sharesDigest(shares) {
+  // Same value as fabric_adapter.models.shares_digest (sorted keys, compact JSON, SHA-256).
+  const sorted = {};
+  for (const k of Object.keys(shares || {}).sort()) sorted[k] = shares[k];
+  return crypto.createHash('sha256').update(JSON.stringify(sorted), 'utf8').digest('hex');
+}
+
 function truncate(s, maxLen) {
   if (!s) return '';
   if (s.length <= maxLen) return s;
@@ -115,7 +122,8 @@ async function main() {
       res.json({ ok: true });
     } catch (e) {
       console.error(e);
-      jsonError(res, 400, describeError(e));
+      const msg = describeError(e);
+      jsonError(res, msg.includes('already exists') || msg.includes('MVCC_READ_CONFLICT') ? 409 : 400, msg);
     } finally {
       if (gw) {
         gw.gateway.close();
@@ -130,11 +138,26 @@ async function main() {
       gw = newGateway();
       const network = gw.gateway.getNetwork(channelName);
       const contract = network.getContract(chaincodeName);
+      if (req.query.expected_version !== undefined) {
+        // Fast-fail precheck only: this read and the submit below are separate transactions, so
+        // another writer can commit in between. Correctness relies on the chaincode's updateRecord
+        // reading the patient's latest-version key (putting it in the read set) and rejecting a
+        // record that does not follow it; Fabric's MVCC validation then fails the later of two
+        // racing commits with MVCC_READ_CONFLICT, mapped to 409 below.
+        const expected = Number(req.query.expected_version);
+        const current = safeJsonFromBuffer(await contract.evaluateTransaction('getLatestRecord', req.params.patientId));
+        const currentVersion = current.ok ? Number(current.json.version) : NaN;
+        if (currentVersion !== expected) {
+          jsonError(res, 409, `version conflict: expected ${expected}, current ${currentVersion}`);
+          return;
+        }
+      }
       await contract.submitTransaction('updateRecord', JSON.stringify(req.body));
       res.json({ ok: true });
     } catch (e) {
       console.error(e);
-      jsonError(res, 400, describeError(e));
+      const msg = describeError(e);
+      jsonError(res, msg.includes('MVCC_READ_CONFLICT') ? 409 : 400, msg);
     } finally {
       if (gw) {
         gw.gateway.close();
@@ -170,6 +193,34 @@ async function main() {
     }
   });
 
+  app.get('/records/:patientId/version', async (req, res) => {
+    // Version-only probe used by TA-side caches to revalidate without shipping the full record.
+    let gw;
+    try {
+      gw = newGateway();
+      const network = gw.gateway.getNetwork(channelName);
+      const contract = network.getContract(chaincodeName);
+      const parsed = safeJsonFromBuffer(await contract.evaluateTransaction('getLatestRecord', req.params.patientId));
+      if (!parsed.ok) {
+        jsonError(res, 500, `chaincode returned non-JSON output: ${parsed.parse_error}`);
+        return;
+      }
+      res.json({
+        patient_id: req.params.patientId,
+        version: Number(parsed.json.version),
+        shares_digest: sharesDigest(parsed.json.shares_wrapped),
+      });
+    } catch (e) {
+      console.error(e);
+      jsonError(res, 400, describeError(e));
+    } finally {
+      if (gw) {
+        gw.gateway.close();
+        gw.client.close();
+      }
+    }
+  });
+
   app.get('/records/:patientId/history', async (req, res) => {
     let gw;
     try {
@@ -197,6 +248,40 @@ async function main() {
     }
   });
 
+  app.post('/shares/rewrap', async (req, res) => {
+    // NMK rotation (rotate_nmk.py): swap one peer's wrapped share in each patient's latest record.
+    // The compare (version + old share) and the swap run inside the chaincode's rewrapShare
+    // transaction, so audit entries appended concurrently are kept; a mismatch is reported as
+    // skipped and retried by the caller.
+    let gw;
+    try {
+      gw = newGateway();
+      const network = gw.gateway.getNetwork(channelName);
+      const contract = network.getContract(chaincodeName);
+      const skipped = [];
+      for (const u of req.body.updates || []) {
+        try {
+          await contract.submitTransaction(
+            'rewrapShare', u.patient_id, String(u.version), req.body.peer_id, u.old, u.new
+          );
+        } catch (e) {
+          const msg = describeError(e);
+          if (!msg.includes('MVCC_READ_CONFLICT') && !msg.includes('version conflict')) throw e;
+          skipped.push(u.patient_id);
+        }
+      }
+      res.json({ skipped });
+    } catch (e) {
+      console.error(e);
+      jsonError(res, 400, describeError(e));
+    } finally {
+      if (gw) {
+        gw.gateway.close();
+        gw.client.close();
+      }
+    }
+  });
+
   app.post('/records/:patientId/audit', async (req, res) => {
     let gw;
     try {
@@ -0,0 +1,45 @@
+import asyncio
+from concurrent.futures import Executor
+from functools import partial
+from typing import Any
+
+from fabric_adapter.models import FabricRecord
+
+
+class AsyncFabricAdapter:
+    # Async facade over a blocking ledger adapter; every call runs on the given bounded executor.
+    def __init__(self, inner: Any, executor: Executor):
+        self.inner = inner
+        self.executor = executor
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+    async def createRecord(self, record: FabricRecord) -> None:
+        await self._run(self.inner.createRecord, record)
+
+    async def updateRecord(self, record: FabricRecord, expected_version: int | None = None) -> None:
+        await self._run(self.inner.updateRecord, record, expected_version=expected_version)
+
+    async def getLatestRecord(self, patient_id: str) -> FabricRecord:
+        return await self._run(self.inner.getLatestRecord, patient_id)
+
+    async def getLatestRecords(self, patient_ids: list[str]) -> dict[str, FabricRecord]:
+        if hasattr(self.inner, "getLatestRecords"):
+            return await self._run(self.inner.getLatestRecords, patient_ids)
+        results = await asyncio.gather(*(self.getLatestRecord(pid) for pid in patient_ids), return_exceptions=True)
+        return {pid: r for pid, r in zip(patient_ids, results) if isinstance(r, FabricRecord)}
+
+    async def getHistory(self, patient_id: str) -> list[FabricRecord]:
+        return await self._run(self.inner.getHistory, patient_id)
+
+    async def appendAuditLog(self, patient_id: str, audit_entry: dict[str, Any]) -> None:
+        await self._run(self.inner.appendAuditLog, patient_id, audit_entry)
+
+    async def appendAuditLogs(self, entries: list[tuple[str, dict[str, Any]]]) -> None:
+        if hasattr(self.inner, "appendAuditLogs"):
+            await self._run(self.inner.appendAuditLogs, entries)
+            return
+        for patient_id, entry in entries:
+            await self.appendAuditLog(patient_id, entry)
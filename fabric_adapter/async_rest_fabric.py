@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any
+
+import httpx
+
+from fabric_adapter.models import FabricRecord, VersionConflictError
+from fabric_adapter.rest_fabric import _from_dict, decode_response, record_accept, record_body, rest_encoding
+from observability.metrics import REGISTRY
+from resilience.breaker import CircuitBreaker, CircuitOpenError
+from resilience.retry import RetryPolicy
+
+_REQUEST_SECONDS = REGISTRY.histogram(
+    "ta_fabric_request_seconds",
+    "Fabric gateway request latency by operation and outcome",
+    ("op", "outcome"),
+)
+_RETRIES = REGISTRY.counter("ta_fabric_retries_total", "Fabric gateway read retries", ("op",))
+_INFLIGHT = REGISTRY.gauge("ta_fabric_inflight_requests", "Fabric gateway requests currently using the connection pool")
+_POOL_LIMIT = REGISTRY.gauge("ta_fabric_pool_max_connections", "Fabric gateway connection pool limit")
+_BREAKER = REGISTRY.gauge("ta_fabric_breaker_state", "Fabric gateway circuit breaker state (0=closed, 1=half_open, 2=open)")
+
+_RETRYABLE_STATUS = {502, 503, 504}
+
+_READ_OPS = {"getLatestRecord", "getLatestVersion", "getHistory"}
+
+
+def _env_float(name: str, default: float) -> float:
+    v = os.getenv(name)
+    return float(v) if v else default
+
+
+def _env_int(name: str, default: int) -> int:
+    v = os.getenv(name)
+    return int(v) if v else default
+
+
+class AsyncFabricRestAdapter:
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry_s: float = 30.0,
+        read_timeout_s: float = 5.0,
+        write_timeout_s: float = 30.0,
+        read_retry: RetryPolicy | None = None,
+        breaker: CircuitBreaker | None = None,
+        verify: bool | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        encoding: str | None = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.encoding = rest_encoding(encoding)
+        if verify is None:
+            ssl_verify = (os.getenv("FABRIC_SSL_VERIFY") or "true").strip().lower()
+            verify = ssl_verify not in {"0", "false", "no", "off"}
+        self.timeouts = {
+            "createRecord": write_timeout_s,
+            "updateRecord": write_timeout_s,
+            "appendAuditLog": write_timeout_s,
+            "getLatestRecord": read_timeout_s,
+            "getLatestVersion": read_timeout_s,
+            "getHistory": read_timeout_s,
+        }
+        self.read_retry = read_retry or RetryPolicy(max_attempts=3, base_delay_s=0.05, max_delay_s=1.0)
+        self.breaker = breaker or CircuitBreaker("fabric_gateway", failure_threshold=10, reset_timeout_s=10.0)
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            verify=verify,
+            transport=transport,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry_s,
+            ),
+        )
+        _POOL_LIMIT.set(max_connections)
+        _BREAKER.set_function(self.breaker.state_code)
+
+    @classmethod
+    def from_env(cls, base_url: str) -> "AsyncFabricRestAdapter":
+        return cls(
+            base_url,
+            max_connections=_env_int("FABRIC_MAX_CONNECTIONS", 100),
+            max_keepalive_connections=_env_int("FABRIC_MAX_KEEPALIVE", 20),
+            keepalive_expiry_s=_env_float("FABRIC_KEEPALIVE_EXPIRY_S", 30.0),
+            read_timeout_s=_env_float("FABRIC_READ_TIMEOUT_S", 5.0),
+            write_timeout_s=_env_float("FABRIC_WRITE_TIMEOUT_S", 30.0),
+            read_retry=RetryPolicy(
+                max_attempts=_env_int("FABRIC_READ_RETRIES", 2) + 1,
+                base_delay_s=_env_float("FABRIC_RETRY_BASE_S", 0.05),
+                max_delay_s=_env_float("FABRIC_RETRY_MAX_S", 1.0),
+            ),
+        )
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def _request(self, op: str, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        # Only idempotent reads are retried; writes go out once so a timed-out submit is never duplicated.
+        attempts = self.read_retry.max_attempts if op in _READ_OPS else 1
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                _REQUEST_SECONDS.observe(0.0, op=op, outcome="circuit_open")
+                raise CircuitOpenError("fabric gateway circuit is open")
+            start = time.perf_counter()
+            _INFLIGHT.inc()
+            try:
+                r = await self.client.request(method, path, timeout=self.timeouts[op], **kwargs)
+            except httpx.TransportError as e:
+                outcome, err, r = "transport_error", e, None
+            else:
+                outcome, err = ("server_error", None) if r.status_code in _RETRYABLE_STATUS else ("ok", None)
+            finally:
+                _INFLIGHT.dec()
+            _REQUEST_SECONDS.observe(time.perf_counter() - start, op=op, outcome=outcome)
+
+            if outcome == "ok":
+                # 4xx are business errors (unknown patient, version conflict), not gateway failures.
+                self.breaker.record_success()
+                return r
+            self.breaker.record_failure()
+            attempt += 1
+            if attempt >= attempts:
+                if err is not None:
+                    raise ValueError(f"fabric gateway unreachable: {err}") from err
+                return r
+            _RETRIES.inc(op=op)
+            await asyncio.sleep(self.read_retry.backoff_s(attempt))
+
+    async def createRecord(self, record: FabricRecord) -> None:
+        r = await self._request("createRecord", "POST", "/records", **record_body(record, self.encoding, raw="content"))
+        _raise_for_status(r)
+
+    async def updateRecord(self, record: FabricRecord, expected_version: int | None = None) -> None:
+        r = await self._request(
+            "updateRecord",
+            "PUT",
+            f"/records/{record.patient_id}",
+            **record_body(record, self.encoding, raw="content"),
+            params={"expected_version": expected_version} if expected_version is not None else None,
+        )
+        _raise_for_status(r)
+
+    async def getLatestRecord(self, patient_id: str) -> FabricRecord:
+        r = await self._request("getLatestRecord", "GET", f"/records/{patient_id}/latest", headers=record_accept(self.encoding))
+        _raise_for_status(r)
+        return decode_response(r.headers.get("content-type"), r.content)
+
+    async def getLatestVersion(self, patient_id: str) -> int:
+        return (await self.getLatestStamp(patient_id))[0]
+
+    async def getLatestStamp(self, patient_id: str) -> tuple[int, str | None]:
+        r = await self._request("getLatestVersion", "GET", f"/records/{patient_id}/version")
+        _raise_for_status(r)
+        d = r.json()
+        return int(d["version"]), d.get("shares_digest")
+
+    async def getLatestRecords(self, patient_ids: list[str]) -> dict[str, FabricRecord]:
+        results = await asyncio.gather(*(self.getLatestRecord(pid) for pid in patient_ids), return_exceptions=True)
+        return {pid: r for pid, r in zip(patient_ids, results) if isinstance(r, FabricRecord)}
+
+    async def getHistory(self, patient_id: str) -> list[FabricRecord]:
+        r = await self._request("getHistory", "GET", f"/records/{patient_id}/history")
+        _raise_for_status(r)
+        return [_from_dict(x) for x in r.json().get("history", [])]
+
+    async def appendAuditLog(self, patient_id: str, audit_entry: dict) -> None:
+        r = await self._request("appendAuditLog", "POST", f"/records/{patient_id}/audit", json=audit_entry)
+        _raise_for_status(r)
+
+    async def appendAuditLogs(self, entries: list[tuple[str, dict]]) -> None:
+        # Concurrent across patients, in order within a patient.
+        by_patient: dict[str, list[dict]] = {}
+        for patient_id, entry in entries:
+            by_patient.setdefault(patient_id, []).append(entry)
+
+        async def _one(patient_id: str, patient_entries: list[dict]) -> None:
+            for entry in patient_entries:
+                await self.appendAuditLog(patient_id, entry)
+
+        await asyncio.gather(*(_one(pid, es) for pid, es in by_patient.items()))
+
+
+def _raise_for_status(r: httpx.Response) -> None:
+    if r.status_code == 409:
+        raise VersionConflictError(r.text)
+    if r.status_code >= 400:
+        raise ValueError(r.text)
@@ -0,0 +1,327 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from fabric_adapter.models import FabricRecord, shares_digest
+from observability.metrics import REGISTRY
+
+_REQUESTS = REGISTRY.counter(
+    "ta_ledger_cache_requests_total",
+    "Latest-record cache lookups (hit, miss, revalidated, refreshed)",
+    ("result",),
+)
+_EVICTIONS = REGISTRY.counter("ta_ledger_cache_evictions_total", "Latest-record cache LRU evictions")
+_ENTRIES = REGISTRY.gauge("ta_ledger_cache_entries", "Latest-record cache size")
+
+
+def _copy(rec: FabricRecord) -> FabricRecord:
+    return FabricRecord(
+        patient_id=rec.patient_id,
+        priority=rec.priority,
+        threshold=rec.threshold,
+        version=rec.version,
+        encrypted_file_path=rec.encrypted_file_path,
+        encrypted_file_hash=rec.encrypted_file_hash,
+        shares_wrapped=dict(rec.shares_wrapped),
+        timestamp=rec.timestamp,
+        audit_logs=[dict(e) for e in rec.audit_logs],
+        blob_version=rec.blob_version,
+    )
+
+
+def _unchanged(rec: FabricRecord, version: int, digest: str | None) -> bool:
+    return version == rec.version and (digest is None or digest == shares_digest(rec.shares_wrapped))
+
+
+class _LatestCache:
+    # Bounded LRU of latest records keyed by patient_id.
+    # - Local writes go through the cache and replace the entry, so a caller never reads a
+    #   version older than its own last write.
+    # - A fetch that was in flight while a local write happened is discarded, not stored.
+    # - Entries older than ttl_s are revalidated (cheap version check if available) to pick up
+    #   writes made by other processes; with getLatestStamp the check also covers shares
+    #   swapped in place by an NMK rotation, so old-key shares stop being served within ttl_s.
+    def __init__(self, max_entries: int = 10000, ttl_s: float = 2.0):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_s = float(ttl_s)
+        self._entries: OrderedDict[str, tuple[FabricRecord, float]] = OrderedDict()
+        self._inflight: dict[str, int] = {}
+        self._dirty: set[str] = set()
+        self._lock = threading.Lock()
+        _ENTRIES.set_function(lambda: len(self._entries))
+
+    def lookup(self, patient_id: str) -> tuple[FabricRecord | None, bool]:
+        # Returns (copy of cached record or None, fresh?)
+        with self._lock:
+            e = self._entries.get(patient_id)
+            if e is None:
+                return None, False
+            self._entries.move_to_end(patient_id)
+            rec, validated_at = e
+            return _copy(rec), (time.monotonic() - validated_at) < self.ttl_s
+
+    def mark_validated(self, patient_id: str, version: int) -> bool:
+        with self._lock:
+            e = self._entries.get(patient_id)
+            if e is None or e[0].version != version:
+                return False
+            self._entries[patient_id] = (e[0], time.monotonic())
+            return True
+
+    def begin_fetch(self, patient_id: str) -> None:
+        with self._lock:
+            self._inflight[patient_id] = self._inflight.get(patient_id, 0) + 1
+
+    def end_fetch(self, patient_id: str, rec: FabricRecord | None) -> None:
+        with self._lock:
+            n = self._inflight.get(patient_id, 1) - 1
+            dirty = patient_id in self._dirty
+            if n <= 0:
+                self._inflight.pop(patient_id, None)
+                self._dirty.discard(patient_id)
+            else:
+                self._inflight[patient_id] = n
+            if rec is not None and not dirty:
+                self._store(rec)
+
+    def on_write(self, rec: FabricRecord) -> None:
+        with self._lock:
+            if rec.patient_id in self._inflight:
+                self._dirty.add(rec.patient_id)
+            self._store(_copy(rec))
+
+    def on_audit(self, patient_id: str, audit_entry: dict[str, Any]) -> None:
+        with self._lock:
+            if patient_id in self._inflight:
+                self._dirty.add(patient_id)
+            e = self._entries.get(patient_id)
+            if e is not None:
+                e[0].audit_logs.append(dict(audit_entry))
+
+    def invalidate(self, patient_id: str) -> None:
+        with self._lock:
+            if patient_id in self._inflight:
+                self._dirty.add(patient_id)
+            self._entries.pop(patient_id, None)
+
+    def _store(self, rec: FabricRecord) -> None:
+        self._entries[rec.patient_id] = (rec, time.monotonic())
+        self._entries.move_to_end(rec.patient_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            _EVICTIONS.inc()
+
+
+class CachedFabricAdapter:
+    # Read-through latest-record cache in front of any blocking ledger adapter.
+    def __init__(self, inner: Any, max_entries: int = 10000, ttl_s: float = 2.0, cache: _LatestCache | None = None):
+        self.inner = inner
+        self.cache = cache or _LatestCache(max_entries=max_entries, ttl_s=ttl_s)
+        # Callers probe optional capabilities with hasattr, so group commit is only exposed
+        # when the inner adapter has it.
+        if hasattr(inner, "commitRecords"):
+            self.commitRecords = self._commit_records
+        if hasattr(inner, "rewrapShares"):
+            self.rewrapShares = self._rewrap_shares
+
+    @classmethod
+    def from_env(cls, inner: Any) -> "CachedFabricAdapter":
+        return cls(
+            inner,
+            max_entries=int(os.getenv("TA_LEDGER_CACHE_SIZE") or "10000"),
+            ttl_s=float(os.getenv("TA_LEDGER_CACHE_TTL_S") or "2.0"),
+        )
+
+    def peek(self, patient_id: str) -> FabricRecord | None:
+        rec, _ = self.cache.lookup(patient_id)
+        return rec
+
+    def getLatestRecord(self, patient_id: str) -> FabricRecord:
+        rec, fresh = self.cache.lookup(patient_id)
+        if rec is not None and fresh:
+            _REQUESTS.inc(result="hit")
+            return rec
+        if rec is not None and (hasattr(self.inner, "getLatestStamp") or hasattr(self.inner, "getLatestVersion")):
+            try:
+                if hasattr(self.inner, "getLatestStamp"):
+                    current = _unchanged(rec, *self.inner.getLatestStamp(patient_id))
+                else:
+                    current = self.inner.getLatestVersion(patient_id) == rec.version
+                if current and self.cache.mark_validated(patient_id, rec.version):
+                    _REQUESTS.inc(result="revalidated")
+                    return rec
+            except Exception:
+                pass
+        _REQUESTS.inc(result="refreshed" if rec is not None else "miss")
+        self.cache.begin_fetch(patient_id)
+        fetched = None
+        try:
+            fetched = self.inner.getLatestRecord(patient_id)
+            return _copy(fetched)
+        finally:
+            self.cache.end_fetch(patient_id, fetched)
+
+    def getLatestRecords(self, patient_ids: list[str]) -> dict[str, FabricRecord]:
+        out: dict[str, FabricRecord] = {}
+        missing: list[str] = []
+        for pid in patient_ids:
+            rec, fresh = self.cache.lookup(pid)
+            if rec is not None and fresh:
+                _REQUESTS.inc(result="hit")
+                out[pid] = rec
+            else:
+                _REQUESTS.inc(result="refreshed" if rec is not None else "miss")
+                missing.append(pid)
+        if not missing:
+            return out
+
+        for pid in missing:
+            self.cache.begin_fetch(pid)
+        fetched: dict[str, FabricRecord] = {}
+        try:
+            if hasattr(self.inner, "getLatestRecords"):
+                fetched = self.inner.getLatestRecords(missing)
+            else:
+                for pid in missing:
+                    try:
+                        fetched[pid] = self.inner.getLatestRecord(pid)
+                    except Exception:
+                        continue
+        finally:
+            for pid in missing:
+                self.cache.end_fetch(pid, fetched.get(pid))
+        out.update({pid: _copy(r) for pid, r in fetched.items()})
+        return out
+
+    def getHistory(self, patient_id: str) -> list[FabricRecord]:
+        return self.inner.getHistory(patient_id)
+
+    def createRecord(self, record: FabricRecord) -> None:
+        try:
+            self.inner.createRecord(record)
+        except Exception:
+            self.cache.invalidate(record.patient_id)
+            raise
+        self.cache.on_write(record)
+
+    def updateRecord(self, record: FabricRecord, expected_version: int | None = None) -> None:
+        try:
+            self.inner.updateRecord(record, expected_version=expected_version)
+        except Exception:
+            self.cache.invalidate(record.patient_id)
+            raise
+        self.cache.on_write(record)
+
+    def _commit_records(self, records: list[FabricRecord]) -> None:
+        try:
+            self.inner.commitRecords(records)
+        except Exception:
+            for r in records:
+                self.cache.invalidate(r.patient_id)
+            raise
+        for r in records:
+            self.cache.on_write(r)
+
+    def _rewrap_shares(self, peer_id: str, updates: list[tuple[str, int, str, str]]) -> list[str]:
+        try:
+            return self.inner.rewrapShares(peer_id, updates)
+        finally:
+            for patient_id, *_ in updates:
+                self.cache.invalidate(patient_id)
+
+    def appendAuditLog(self, patient_id: str, audit_entry: dict[str, Any]) -> None:
+        try:
+            self.inner.appendAuditLog(patient_id, audit_entry)
+        except Exception:
+            self.cache.invalidate(patient_id)
+            raise
+        self.cache.on_audit(patient_id, audit_entry)
+
+    def appendAuditLogs(self, entries: list[tuple[str, dict[str, Any]]]) -> None:
+        try:
+            if hasattr(self.inner, "appendAuditLogs"):
+                self.inner.appendAuditLogs(entries)
+            else:
+                for patient_id, entry in entries:
+                    self.inner.appendAuditLog(patient_id, entry)
+        except Exception:
+            for patient_id, _ in entries:
+                self.cache.invalidate(patient_id)
+            raise
+        for patient_id, entry in entries:
+            self.cache.on_audit(patient_id, entry)
+
+
+class AsyncCachedFabricAdapter:
+    # Same cache semantics for an async ledger adapter; pass the sync adapter's cache to share it.
+    def __init__(self, inner: Any, cache: _LatestCache):
+        self.inner = inner
+        self.cache = cache
+
+    async def getLatestRecord(self, patient_id: str) -> FabricRecord:
+        rec, fresh = self.cache.lookup(patient_id)
+        if rec is not None and fresh:
+            _REQUESTS.inc(result="hit")
+            return rec
+        if rec is not None and (hasattr(self.inner, "getLatestStamp") or hasattr(self.inner, "getLatestVersion")):
+            try:
+                if hasattr(self.inner, "getLatestStamp"):
+                    current = _unchanged(rec, *(await self.inner.getLatestStamp(patient_id)))
+                else:
+                    current = await self.inner.getLatestVersion(patient_id) == rec.version
+                if current and self.cache.mark_validated(patient_id, rec.version):
+                    _REQUESTS.inc(result="revalidated")
+                    return rec
+            except Exception:
+                pass
+        _REQUESTS.inc(result="refreshed" if rec is not None else "miss")
+        self.cache.begin_fetch(patient_id)
+        fetched = None
+        try:
+            fetched = await self.inner.getLatestRecord(patient_id)
+            return _copy(fetched)
+        finally:
+            self.cache.end_fetch(patient_id, fetched)
+
+    async def getLatestRecords(self, patient_ids: list[str]) -> dict[str, FabricRecord]:
+        out: dict[str, FabricRecord] = {}
+        for pid in patient_ids:
+            try:
+                out[pid] = await self.getLatestRecord(pid)
+            except Exception:
+                continue
+        return out
+
+    async def getHistory(self, patient_id: str) -> list[FabricRecord]:
+        return await self.inner.getHistory(patient_id)
+
+    async def createRecord(self, record: FabricRecord) -> None:
+        try:
+            await self.inner.createRecord(record)
+        except Exception:
+            self.cache.invalidate(record.patient_id)
+            raise
+        self.cache.on_write(record)
+
+    async def updateRecord(self, record: FabricRecord, expected_version: int | None = None) -> None:
+        try:
+            await self.inner.updateRecord(record, expected_version=expected_version)
+        except Exception:
+            self.cache.invalidate(record.patient_id)
+            raise
+        self.cache.on_write(record)
+
+    async def appendAuditLog(self, patient_id: str, audit_entry: dict[str, Any]) -> None:
+        await self.appendAuditLogs([(patient_id, audit_entry)])
+
+    async def appendAuditLogs(self, entries: list[tuple[str, dict[str, Any]]]) -> None:
+        try:
+            await self.inner.appendAuditLogs(entries)
+        except Exception:
+            for patient_id, _ in entries:
+                self.cache.invalidate(patient_id)
+            raise
+        for patient_id, entry in entries:
+            self.cache.on_audit(patient_id, entry)
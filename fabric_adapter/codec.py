@@ -0,0 +1,252 @@
+import binascii
+import json
+import re
+import struct
+from typing import Any
+
+# Compact binary form of ledger records (the dict shape the adapters exchange) and of the
+# mock ledger file. Both start with a magic + format version, so readers can tell them from
+# JSON and old JSON ledgers/records stay readable.
+RECORD_MAGIC = b"TAR\x01"
+LEDGER_MAGIC = b"TAL\x01"
+CONTENT_TYPE = "application/vnd.ta.record"
+
+_HEAD = struct.Struct("<BBIId")  # flags, threshold, version, blob_version, timestamp
+_U8 = struct.Struct("<B")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_SHARE = struct.Struct("<HH")  # key version (0 = stored as text), payload length
+
+_HASH_RAW = 0x01
+_HAS_BLOB_VERSION = 0x02
+_HAS_EXTRA = 0x04
+
+_FIELDS = {
+    "patient_id",
+    "priority",
+    "threshold",
+    "version",
+    "blob_version",
+    "encrypted_file_path",
+    "encrypted_file_hash",
+    "shares_wrapped",
+    "timestamp",
+    "audit_logs",
+}
+_HEX64 = re.compile(r"[0-9a-f]{64}")
+_KEY_PREFIX = re.compile(r"k([0-9]+):")
+
+
+def is_binary_record(buf: bytes) -> bool:
+    return bytes(buf[:4]) == RECORD_MAGIC
+
+
+def _str(out: list[bytes], s: str) -> None:
+    b = s.encode("utf-8")
+    out.append(_U16.pack(len(b)))
+    out.append(b)
+
+
+def _share(wrapped: str) -> tuple[int, bytes]:
+    # Wrapped shares are base64 (optionally "k<N>:"-prefixed, see peer_nmk); anything that
+    # would not round-trip byte for byte is kept as text.
+    version, body = 1, wrapped
+    if wrapped.startswith("k"):
+        m = _KEY_PREFIX.match(wrapped)
+        if m is not None:
+            version, body = int(m.group(1)), wrapped[m.end() :]
+    try:
+        raw = binascii.a2b_base64(body, strict_mode=True)
+    except (binascii.Error, ValueError):
+        return 0, wrapped.encode("utf-8")
+    if not 0 < version < 0xFFFF or binascii.b2a_base64(raw, newline=False) != body.encode("ascii"):
+        return 0, wrapped.encode("utf-8")
+    return version, raw
+
+
+def encode_record(d: dict[str, Any]) -> bytes:
+    h = d["encrypted_file_hash"]
+    flags = 0
+    if _HEX64.fullmatch(h):
+        flags |= _HASH_RAW
+    blob_version = d.get("blob_version")
+    if blob_version is not None:
+        flags |= _HAS_BLOB_VERSION
+    extra = {k: v for k, v in d.items() if k not in _FIELDS}
+    if extra:
+        flags |= _HAS_EXTRA
+    shares = d["shares_wrapped"]
+    out = [
+        RECORD_MAGIC,
+        _HEAD.pack(flags, int(d["threshold"]), int(d["version"]), int(blob_version or 0), float(d["timestamp"])),
+    ]
+    _str(out, d["patient_id"])
+    _str(out, d["priority"])
+    _str(out, d["encrypted_file_path"])
+    if flags & _HASH_RAW:
+        out.append(bytes.fromhex(h))
+    else:
+        _str(out, h)
+    out.append(_U16.pack(len(shares)))
+    for peer_id, wrapped in shares.items():
+        p = peer_id.encode("utf-8")
+        version, payload = _share(wrapped)
+        out.append(_U8.pack(len(p)))
+        out.append(p)
+        out.append(_SHARE.pack(version, len(payload)))
+        out.append(payload)
+    audit = json.dumps(d.get("audit_logs", []), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    out.append(_U32.pack(len(audit)))
+    out.append(audit)
+    if extra:
+        e = json.dumps(extra, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        out.append(_U32.pack(len(e)))
+        out.append(e)
+    return b"".join(out)
+
+
+def decode_record(buf: bytes | memoryview) -> dict[str, Any]:
+    mv = bytes(buf)  # one copy; bytes slicing + decode beats memoryview slices per field
+    if mv[:4] != RECORD_MAGIC:
+        raise ValueError("not a binary ledger record (bad magic or format version)")
+    flags, threshold, version, blob_version, timestamp = _HEAD.unpack_from(mv, 4)
+    pos = 4 + _HEAD.size
+
+    def _s() -> str:
+        nonlocal pos
+        (n,) = _U16.unpack_from(mv, pos)
+        pos += 2 + n
+        return mv[pos - n : pos].decode("utf-8")
+
+    patient_id = _s()
+    priority = _s()
+    path = _s()
+    if flags & _HASH_RAW:
+        h = mv[pos : pos + 32].hex()
+        pos += 32
+    else:
+        h = _s()
+    (n_shares,) = _U16.unpack_from(mv, pos)
+    pos += 2
+    shares: dict[str, str] = {}
+    b64 = binascii.b2a_base64
+    for _ in range(n_shares):
+        n = mv[pos]
+        peer_id = mv[pos + 1 : pos + 1 + n].decode("utf-8")
+        pos += 1 + n
+        key_version, size = _SHARE.unpack_from(mv, pos)
+        pos += 4
+        payload = mv[pos : pos + size]
+        pos += size
+        if key_version == 0:
+            shares[peer_id] = payload.decode("utf-8")
+        elif key_version == 1:
+            shares[peer_id] = b64(payload, newline=False).decode("ascii")
+        else:
+            shares[peer_id] = f"k{key_version}:{b64(payload, newline=False).decode('ascii')}"
+    (n,) = _U32.unpack_from(mv, pos)
+    pos += 4
+    audit_logs = json.loads(mv[pos : pos + n])
+    pos += n
+    d: dict[str, Any] = {
+        "patient_id": patient_id,
+        "priority": priority,
+        "threshold": threshold,
+        "version": version,
+        "encrypted_file_path": path,
+        "encrypted_file_hash": h,
+        "shares_wrapped": shares,
+        "timestamp": timestamp,
+        "audit_logs": audit_logs,
+    }
+    if flags & _HAS_BLOB_VERSION:
+        d["blob_version"] = blob_version
+    if flags & _HAS_EXTRA:
+        (n,) = _U32.unpack_from(mv, pos)
+        d.update(json.loads(mv[pos + 4 : pos + 4 + n]))
+    return d
+
+
+def _encode_history(history: list[dict[str, Any]]) -> bytes:
+    out = [_U32.pack(len(history))]
+    for rec in history:
+        b = encode_record(rec)
+        out.append(_U32.pack(len(b)))
+        out.append(b)
+    return b"".join(out)
+
+
+def _decode_history(buf: memoryview) -> list[dict[str, Any]]:
+    (count,) = _U32.unpack_from(buf, 0)
+    pos = 4
+    history: list[dict[str, Any]] = []
+    for _ in range(count):
+        (n,) = _U32.unpack_from(buf, pos)
+        history.append(decode_record(buf[pos + 4 : pos + 4 + n]))
+        pos += 4 + n
+    return history
+
+
+class LazyPatients(dict):
+    # patient_id -> history, decoded on first access. Untouched histories are written back
+    # as the bytes they were read from, so a load/modify/save costs O(patients touched)
+    # record decodes instead of a full parse.
+    def _decoded(self, patient_id: str) -> Any:
+        v = dict.__getitem__(self, patient_id)
+        if isinstance(v, memoryview):
+            v = _decode_history(v)
+            dict.__setitem__(self, patient_id, v)
+        return v
+
+    def __getitem__(self, patient_id: str) -> Any:
+        return self._decoded(patient_id)
+
+    def get(self, patient_id: str, default: Any = None) -> Any:
+        return self._decoded(patient_id) if dict.__contains__(self, patient_id) else default
+
+    def setdefault(self, patient_id: str, default: Any = None) -> Any:
+        if not dict.__contains__(self, patient_id):
+            dict.__setitem__(self, patient_id, default)
+        return self._decoded(patient_id)
+
+    def items(self):
+        return [(pid, self._decoded(pid)) for pid in self]
+
+    def values(self):
+        return [self._decoded(pid) for pid in self]
+
+    def materialize(self) -> dict[str, list[dict[str, Any]]]:
+        return {pid: self._decoded(pid) for pid in self}
+
+
+def is_binary_ledger(buf: bytes) -> bool:
+    return bytes(buf[:4]) == LEDGER_MAGIC
+
+
+def load_ledger(buf: bytes) -> LazyPatients:
+    mv = memoryview(buf)
+    if bytes(mv[:4]) != LEDGER_MAGIC:
+        raise ValueError("not a binary ledger (bad magic or format version)")
+    (count,) = _U32.unpack_from(mv, 4)
+    pos = 8
+    patients = LazyPatients()
+    for _ in range(count):
+        (n,) = _U16.unpack_from(mv, pos)
+        patient_id = str(mv[pos + 2 : pos + 2 + n], "utf-8")
+        pos += 2 + n
+        (size,) = _U32.unpack_from(mv, pos)
+        dict.__setitem__(patients, patient_id, mv[pos + 4 : pos + 4 + size])
+        pos += 4 + size
+    return patients
+
+
+def dump_ledger(patients: dict[str, Any]) -> list[bytes | memoryview]:
+    # Chunks for writelines(); raw (never decoded) histories are passed through as-is.
+    out: list[bytes | memoryview] = [LEDGER_MAGIC, _U32.pack(len(patients))]
+    for patient_id in patients:
+        v = dict.__getitem__(patients, patient_id)
+        seg = v if isinstance(v, memoryview) else _encode_history(v)
+        p = patient_id.encode("utf-8")
+        out.append(_U16.pack(len(p)) + p + _U32.pack(len(seg)))
+        out.append(seg)
+    return out
@@ -1,46 +1,116 @@
 import json
 import os
+import threading
 import time
-from typing import Any
+from contextlib import contextmanager
+from typing import Any, Iterator
 
-from fabric_adapter.models import FabricRecord
+from fabric_adapter import codec
+from fabric_adapter.models import FabricRecord, VersionConflictError
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 
 class MockFabricAdapter:
-    def __init__(self, ledger_path: str):
+    def __init__(self, ledger_path: str, encoding: str | None = None):
         self.ledger_path = ledger_path
+        # json (pretty-printed, the original format) or binary (fabric_adapter/codec.py). Only
+        # affects saves: either format is read, so switching converts on the next write.
+        self.encoding = (encoding or os.getenv("TA_LEDGER_ENCODING") or "json").strip().lower()
+        if self.encoding not in ("json", "binary"):
+            raise ValueError(f"invalid ledger encoding: {self.encoding!r} (expected json | binary)")
+        self._lock_path = ledger_path + ".lock"
+        self._thread_lock = threading.Lock()
         os.makedirs(os.path.dirname(ledger_path), exist_ok=True)
-        if not os.path.exists(ledger_path):
-            with open(ledger_path, "w", encoding="utf-8") as f:
-                json.dump({"patients": {}}, f)
+        with self._locked():
+            if not os.path.exists(ledger_path):
+                with open(ledger_path, "w", encoding="utf-8") as f:
+                    json.dump({"patients": {}}, f)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        # Every load-modify-save runs under an in-process lock plus an exclusive lock file so
+        # writers in other threads and processes cannot lose each other's updates. Plain reads
+        # need no lock because _save replaces the ledger atomically.
+        with self._thread_lock:
+            with open(self._lock_path, "a+b") as f:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                    else:
+                        f.seek(0)
+                        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
 
     def _load(self) -> dict[str, Any]:
-        with open(self.ledger_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(self.ledger_path, "rb") as f:
+            buf = f.read()
+        if codec.is_binary_ledger(buf):
+            return {"patients": codec.load_ledger(buf)}
+        return json.loads(buf)
 
     def _save(self, data: dict[str, Any]) -> None:
         tmp = self.ledger_path + ".tmp"
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        patients = data.get("patients", {})
+        if self.encoding == "binary":
+            with open(tmp, "wb") as f:
+                f.writelines(codec.dump_ledger(patients))
+        else:
+            if isinstance(patients, codec.LazyPatients):
+                data = {**data, "patients": patients.materialize()}
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
         os.replace(tmp, self.ledger_path)
 
     def createRecord(self, record: FabricRecord) -> None:
-        data = self._load()
-        patients = data.setdefault("patients", {})
-        if record.patient_id in patients and len(patients[record.patient_id]) > 0:
-            raise ValueError("patient already exists")
-        patients[record.patient_id] = [self._to_dict(record)]
-        self._save(data)
+        with self._locked():
+            data = self._load()
+            patients = data.setdefault("patients", {})
+            if record.patient_id in patients and len(patients[record.patient_id]) > 0:
+                raise VersionConflictError("patient already exists")
+            patients[record.patient_id] = [self._to_dict(record)]
+            self._save(data)
 
-    def updateRecord(self, record: FabricRecord) -> None:
-        data = self._load()
-        patients = data.setdefault("patients", {})
-        history = patients.setdefault(record.patient_id, [])
-        if history and int(history[-1].get("version", -1)) == int(record.version):
-            history[-1] = self._to_dict(record)
-        else:
-            history.append(self._to_dict(record))
-        self._save(data)
+    def updateRecord(self, record: FabricRecord, expected_version: int | None = None) -> None:
+        # expected_version makes this a compare-and-set on the patient's latest version.
+        with self._locked():
+            data = self._load()
+            patients = data.setdefault("patients", {})
+            history = patients.setdefault(record.patient_id, [])
+            current = int(history[-1].get("version", 0)) if history else 0
+            if expected_version is not None and current != int(expected_version):
+                raise VersionConflictError(
+                    f"version conflict for {record.patient_id}: expected {expected_version}, current {current}"
+                )
+            if history and current == int(record.version):
+                history[-1] = self._to_dict(record)
+            else:
+                history.append(self._to_dict(record))
+            self._save(data)
+
+    def commitRecords(self, records: list[FabricRecord]) -> None:
+        # Group commit: one load/save for many writes. Each record must extend its patient's
+        # history by exactly one version; the whole group is rejected otherwise.
+        with self._locked():
+            data = self._load()
+            patients = data.setdefault("patients", {})
+            for record in records:
+                history = patients.setdefault(record.patient_id, [])
+                last = int(history[-1].get("version", 0)) if history else 0
+                if int(record.version) != last + 1:
+                    raise VersionConflictError(f"version conflict for {record.patient_id}: have {last}, got {record.version}")
+                history.append(self._to_dict(record))
+            self._save(data)
 
     def getLatestRecord(self, patient_id: str) -> FabricRecord:
         data = self._load()
@@ -49,18 +119,58 @@ class MockFabricAdapter:
             raise ValueError("patient not found")
         return self._from_dict(history[-1])
 
+    def getLatestRecords(self, patient_ids: list[str]) -> dict[str, FabricRecord]:
+        data = self._load()
+        patients = data.get("patients", {})
+        out: dict[str, FabricRecord] = {}
+        for pid in patient_ids:
+            history = patients.get(pid)
+            if history:
+                out[pid] = self._from_dict(history[-1])
+        return out
+
+    def listPatientIds(self) -> list[str]:
+        return list(self._load().get("patients", {}))
+
+    def rewrapShares(self, peer_id: str, updates: list[tuple[str, int, str, str]]) -> list[str]:
+        # (patient_id, version, old_wrapped, new_wrapped): swaps one peer's wrapped share in the
+        # latest record in place, keeping audit logs appended meanwhile. Returns the patients
+        # skipped because their latest version or share changed since it was read.
+        skipped: list[str] = []
+        with self._locked():
+            data = self._load()
+            patients = data.get("patients", {})
+            for patient_id, version, old_wrapped, new_wrapped in updates:
+                history = patients.get(patient_id)
+                latest = history[-1] if history else None
+                if latest is None or int(latest.get("version", 0)) != int(version) or latest["shares_wrapped"].get(peer_id) != old_wrapped:
+                    skipped.append(patient_id)
+                    continue
+                latest["shares_wrapped"][peer_id] = new_wrapped
+            self._save(data)
+        return skipped
+
     def getHistory(self, patient_id: str) -> list[FabricRecord]:
         data = self._load()
         history = data.get("patients", {}).get(patient_id, [])
         return [self._from_dict(r) for r in history]
 
     def appendAuditLog(self, patient_id: str, audit_entry: dict[str, Any]) -> None:
-        rec = self.getLatestRecord(patient_id)
-        rec.audit_logs.append(audit_entry)
-        self.updateRecord(rec)
+        self.appendAuditLogs([(patient_id, audit_entry)])
+
+    def appendAuditLogs(self, entries: list[tuple[str, dict[str, Any]]]) -> None:
+        with self._locked():
+            data = self._load()
+            patients = data.get("patients", {})
+            for patient_id, _ in entries:
+                if not patients.get(patient_id):
+                    raise ValueError("patient not found")
+            for patient_id, audit_entry in entries:
+                patients[patient_id][-1].setdefault("audit_logs", []).append(audit_entry)
+            self._save(data)
 
     def _to_dict(self, record: FabricRecord) -> dict[str, Any]:
-        return {
+        d = {
             "patient_id": record.patient_id,
             "priority": record.priority,
             "threshold": record.threshold,
@@ -71,6 +181,9 @@ class MockFabricAdapter:
             "timestamp": record.timestamp,
             "audit_logs": record.audit_logs,
         }
+        if record.blob_version is not None:
+            d["blob_version"] = record.blob_version
+        return d
 
     def _from_dict(self, d: dict[str, Any]) -> FabricRecord:
         return FabricRecord(
@@ -83,6 +196,7 @@ class MockFabricAdapter:
             shares_wrapped=dict(d["shares_wrapped"]),
             timestamp=float(d["timestamp"]),
             audit_logs=list(d.get("audit_logs", [])),
+            blob_version=int(d["blob_version"]) if d.get("blob_version") is not None else None,
         )
 
 
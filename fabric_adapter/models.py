@@ -1,3 +1,5 @@
+import hashlib
+import json
 from dataclasses import dataclass
 from typing import Any
 
@@ -13,3 +15,21 @@ class FabricRecord:
     shares_wrapped: dict[str, str]
     timestamp: float
     audit_logs: list[dict[str, Any]]
+    # Version whose AAD the blob was encrypted under, when it differs from `version` (a
+    # re-threshold writes a new version that points at the previous ciphertext).
+    blob_version: int | None = None
+
+    @property
+    def blob_aad_version(self) -> int:
+        return self.blob_version if self.blob_version is not None else self.version
+
+
+class VersionConflictError(ValueError):
+    pass
+
+
+def shares_digest(shares_wrapped: dict[str, str]) -> str:
+    # NMK rotation swaps a share in place without a new version, so caches revalidate on
+    # version + this digest. fabric-gateway-service computes the same value (sharesDigest).
+    body = json.dumps(shares_wrapped, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
@@ -1,35 +1,68 @@
 from __future__ import annotations
 
+import json
 import os
+from typing import Any
+
 import requests
 
-from fabric_adapter.models import FabricRecord
+from fabric_adapter import codec
+from fabric_adapter.models import FabricRecord, VersionConflictError
 
 
 class FabricRestAdapter:
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, encoding: str | None = None):
         self.base_url = base_url.rstrip("/")
         self.session = requests.Session()
         ssl_verify = (os.getenv("FABRIC_SSL_VERIFY") or "true").strip().lower()
         self.verify = ssl_verify not in {"0", "false", "no", "off"}
+        self.encoding = rest_encoding(encoding)
 
     def createRecord(self, record: FabricRecord) -> None:
-        r = self.session.post(f"{self.base_url}/records", json=_to_dict(record), timeout=30, verify=self.verify)
+        r = self.session.post(f"{self.base_url}/records", **record_body(record, self.encoding), timeout=30, verify=self.verify)
         _raise_for_status(r)
 
-    def updateRecord(self, record: FabricRecord) -> None:
+    def updateRecord(self, record: FabricRecord, expected_version: int | None = None) -> None:
         r = self.session.put(
             f"{self.base_url}/records/{record.patient_id}",
-            json=_to_dict(record),
+            **record_body(record, self.encoding),
+            params={"expected_version": expected_version} if expected_version is not None else None,
             timeout=30,
             verify=self.verify,
         )
         _raise_for_status(r)
 
     def getLatestRecord(self, patient_id: str) -> FabricRecord:
-        r = self.session.get(f"{self.base_url}/records/{patient_id}/latest", timeout=30, verify=self.verify)
+        r = self.session.get(
+            f"{self.base_url}/records/{patient_id}/latest",
+            headers=record_accept(self.encoding),
+            timeout=30,
+            verify=self.verify,
+        )
+        _raise_for_status(r)
+        return decode_response(r.headers.get("content-type"), r.content)
+
+    def getLatestVersion(self, patient_id: str) -> int:
+        return self.getLatestStamp(patient_id)[0]
+
+    def getLatestStamp(self, patient_id: str) -> tuple[int, str | None]:
+        # (version, shares digest); the digest is None from gateways that do not report it.
+        r = self.session.get(f"{self.base_url}/records/{patient_id}/version", timeout=30, verify=self.verify)
+        _raise_for_status(r)
+        d = r.json()
+        return int(d["version"]), d.get("shares_digest")
+
+    def rewrapShares(self, peer_id: str, updates: list[tuple[str, int, str, str]]) -> list[str]:
+        # Same contract as MockFabricAdapter.rewrapShares: the gateway swaps the share in the
+        # latest record and leaves everything else (audit logs included) alone.
+        r = self.session.post(
+            f"{self.base_url}/shares/rewrap",
+            json={"peer_id": peer_id, "updates": [{"patient_id": p, "version": v, "old": o, "new": n} for p, v, o, n in updates]},
+            timeout=120,
+            verify=self.verify,
+        )
         _raise_for_status(r)
-        return _from_dict(r.json())
+        return list(r.json().get("skipped", []))
 
     def getHistory(self, patient_id: str) -> list[FabricRecord]:
         r = self.session.get(f"{self.base_url}/records/{patient_id}/history", timeout=30, verify=self.verify)
@@ -48,14 +81,42 @@ class FabricRestAdapter:
 
 
 def _raise_for_status(r: requests.Response) -> None:
+    if r.status_code == 409:
+        raise VersionConflictError(r.text)
     try:
         r.raise_for_status()
     except requests.HTTPError as e:
         raise ValueError(r.text) from e
 
 
+def rest_encoding(encoding: str | None) -> str:
+    # binary needs a gateway that speaks codec.CONTENT_TYPE (fabric_adapter/stub_gateway.py does);
+    # reads still accept JSON, so only writes depend on it.
+    enc = (encoding or os.getenv("FABRIC_REST_ENCODING") or "json").strip().lower()
+    if enc not in ("json", "binary"):
+        raise ValueError(f"invalid FABRIC_REST_ENCODING: {enc!r} (expected json | binary)")
+    return enc
+
+
+def record_body(record: FabricRecord, encoding: str, raw: str = "data") -> dict[str, Any]:
+    # raw is the client's bytes-body keyword: "data" for requests, "content" for httpx.
+    if encoding == "binary":
+        return {raw: codec.encode_record(_to_dict(record)), "headers": {"Content-Type": codec.CONTENT_TYPE}}
+    return {"json": _to_dict(record)}
+
+
+def record_accept(encoding: str) -> dict[str, str] | None:
+    return {"Accept": f"{codec.CONTENT_TYPE}, application/json"} if encoding == "binary" else None
+
+
+def decode_response(content_type: str | None, content: bytes) -> FabricRecord:
+    if (content_type or "").startswith(codec.CONTENT_TYPE):
+        return _from_dict(codec.decode_record(content))
+    return _from_dict(json.loads(content))
+
+
 def _to_dict(record: FabricRecord) -> dict:
-    return {
+    d = {
         "patient_id": record.patient_id,
         "priority": record.priority,
         "threshold": record.threshold,
@@ -66,6 +127,9 @@ def _to_dict(record: FabricRecord) -> dict:
         "timestamp": record.timestamp,
         "audit_logs": record.audit_logs,
     }
+    if record.blob_version is not None:
+        d["blob_version"] = record.blob_version
+    return d
 
 
 def _from_dict(d: dict) -> FabricRecord:
@@ -79,4 +143,5 @@ def _from_dict(d: dict) -> FabricRecord:
         shares_wrapped=dict(d["shares_wrapped"]),
         timestamp=float(d["timestamp"]),
         audit_logs=list(d.get("audit_logs", [])),
+        blob_version=int(d["blob_version"]) if d.get("blob_version") is not None else None,
     )
@@ -0,0 +1,228 @@
+import argparse
+import json
+import random
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from fabric_adapter import codec
+from fabric_adapter.models import shares_digest
+
+
+class StubLedger:
+    # In-memory stand-in for the chaincode: patient_id -> list of record dicts (oldest first),
+    # with the same create/update/audit rules as MockFabricAdapter.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.patients: dict[str, list[dict[str, Any]]] = {}
+
+    def preload(self, records: list[dict[str, Any]]) -> None:
+        with self._lock:
+            for r in records:
+                self.patients.setdefault(r["patient_id"], []).append(r)
+
+    def create(self, record: dict[str, Any]) -> bool:
+        # False when the patient already exists (HTTP 409).
+        with self._lock:
+            if self.patients.get(record["patient_id"]):
+                return False
+            self.patients[record["patient_id"]] = [record]
+            return True
+
+    def update(self, patient_id: str, record: dict[str, Any], expected_version: int | None) -> bool:
+        # False on a compare-and-set mismatch (HTTP 409).
+        with self._lock:
+            history = self.patients.setdefault(patient_id, [])
+            current = int(history[-1].get("version", 0)) if history else 0
+            if expected_version is not None and current != expected_version:
+                return False
+            if history and current == int(record["version"]):
+                history[-1] = record
+            else:
+                history.append(record)
+            return True
+
+    def rewrap(self, peer_id: str, updates: list[dict[str, Any]]) -> list[str]:
+        skipped: list[str] = []
+        with self._lock:
+            for u in updates:
+                history = self.patients.get(u["patient_id"])
+                latest = history[-1] if history else None
+                if latest is None or int(latest["version"]) != int(u["version"]) or latest["shares_wrapped"].get(peer_id) != u["old"]:
+                    skipped.append(u["patient_id"])
+                    continue
+                latest["shares_wrapped"] = {**latest["shares_wrapped"], peer_id: u["new"]}
+        return skipped
+
+    def latest(self, patient_id: str) -> dict[str, Any]:
+        history = self.patients.get(patient_id)
+        if not history:
+            raise ValueError("patient not found")
+        return history[-1]
+
+    def history(self, patient_id: str) -> list[dict[str, Any]]:
+        return list(self.patients.get(patient_id, []))
+
+    def append_audit(self, patient_id: str, entry: dict[str, Any]) -> None:
+        with self._lock:
+            history = self.patients.get(patient_id)
+            if not history:
+                raise ValueError("patient not found")
+            history[-1].setdefault("audit_logs", []).append(entry)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "StubGateway"
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send(self, code: int, body: Any) -> None:
+        self._write(code, json.dumps(body).encode("utf-8"), "application/json")
+
+    def _send_record(self, record: dict[str, Any]) -> None:
+        # Binary only for clients that ask for it; everyone else keeps getting JSON.
+        if codec.CONTENT_TYPE in (self.headers.get("Accept") or ""):
+            self._write(200, codec.encode_record(record), codec.CONTENT_TYPE)
+        else:
+            self._send(200, record)
+
+    def _write(self, code: int, data: bytes, content_type: str) -> None:
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self) -> Any:
+        length = int(self.headers.get("Content-Length") or 0)
+        data = self.rfile.read(length)
+        if (self.headers.get("Content-Type") or "").startswith(codec.CONTENT_TYPE):
+            return codec.decode_record(data)
+        return json.loads(data or b"null")
+
+    def _route(self, method: str) -> None:
+        url = urlsplit(self.path)
+        parts = [unquote(p) for p in url.path.strip("/").split("/")]
+        query = parse_qs(url.query)
+        body = self._body() if method in ("POST", "PUT") else None
+        self.server.delay(write=method != "GET")
+        ledger = self.server.ledger
+        try:
+            if method == "GET" and parts == ["health"]:
+                self._send(200, {"ok": True})
+            elif method == "POST" and parts == ["records"]:
+                if not ledger.create(body):
+                    self._send(409, {"error": f"patient already exists: {body['patient_id']}"})
+                    return
+                self._send(200, {"ok": True})
+            elif method == "PUT" and len(parts) == 2 and parts[0] == "records":
+                expected = query.get("expected_version")
+                if not ledger.update(parts[1], body, int(expected[0]) if expected else None):
+                    self._send(409, {"error": f"version conflict: expected {expected[0]}"})
+                    return
+                self._send(200, {"ok": True})
+            elif method == "GET" and len(parts) == 3 and parts[0] == "records" and parts[2] == "latest":
+                self._send_record(ledger.latest(parts[1]))
+            elif method == "GET" and len(parts) == 3 and parts[0] == "records" and parts[2] == "version":
+                latest = ledger.latest(parts[1])
+                self._send(
+                    200,
+                    {"patient_id": parts[1], "version": int(latest["version"]), "shares_digest": shares_digest(latest["shares_wrapped"])},
+                )
+            elif method == "GET" and len(parts) == 3 and parts[0] == "records" and parts[2] == "history":
+                self._send(200, {"patient_id": parts[1], "history": ledger.history(parts[1])})
+            elif method == "POST" and parts == ["shares", "rewrap"]:
+                self._send(200, {"skipped": ledger.rewrap(body["peer_id"], body["updates"])})
+            elif method == "POST" and len(parts) == 3 and parts[0] == "records" and parts[2] == "audit":
+                ledger.append_audit(parts[1], body)
+                self._send(200, {"ok": True})
+            else:
+                self._send(404, {"error": f"no route for {method} {url.path}"})
+        except (ValueError, KeyError, TypeError, struct.error) as e:
+            self._send(400, {"error": str(e)})
+
+    def do_GET(self) -> None:
+        self._route("GET")
+
+    def do_POST(self) -> None:
+        self._route("POST")
+
+    def do_PUT(self) -> None:
+        self._route("PUT")
+
+
+class StubGateway(ThreadingHTTPServer):
+    # Local stand-in for fabric-gateway-service (same routes and status codes) so the REST
+    # adapters can be exercised offline. read/write latency model evaluate vs submit cost.
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        read_latency_ms: float = 0.0,
+        write_latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        ledger: StubLedger | None = None,
+    ):
+        super().__init__((host, port), _Handler)
+        self.ledger = ledger or StubLedger()
+        self.read_latency_s = read_latency_ms / 1000
+        self.write_latency_s = write_latency_ms / 1000
+        self.jitter_s = jitter_ms / 1000
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def delay(self, *, write: bool) -> None:
+        base = self.write_latency_s if write else self.read_latency_s
+        if self.jitter_s > 0:
+            base += random.uniform(0, self.jitter_s)
+        if base > 0:
+            time.sleep(base)
+
+    def start(self) -> "StubGateway":
+        self._thread = threading.Thread(target=self.serve_forever, name="stub_gateway", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="In-memory stand-in for fabric-gateway-service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--read-latency-ms", type=float, default=0.0, help="Added to every GET")
+    parser.add_argument("--write-latency-ms", type=float, default=0.0, help="Added to every POST/PUT")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform extra delay in [0, jitter]")
+    args = parser.parse_args()
+
+    server = StubGateway(
+        args.host,
+        args.port,
+        read_latency_ms=args.read_latency_ms,
+        write_latency_ms=args.write_latency_ms,
+        jitter_ms=args.jitter_ms,
+    )
+    print(f"stub gateway listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,156 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from patient_data import PayloadSizes, iter_patient_documents, iter_patient_records
+
+
+@dataclass(frozen=True)
+class ShardSpec:
+    index: int
+    path: str
+    seed: int
+    start_patient_number: int
+    patients: int
+
+
+def shard_seed(seed: int, index: int) -> int:
+    # Stable across runs, platforms and worker counts (unlike hash()).
+    return int.from_bytes(hashlib.sha256(f"{seed}:{index}".encode("utf-8")).digest()[:8], "big")
+
+
+def plan_shards(
+    n_patients: int, *, shard_size: int, seed: int, start_patient_number: int, out_dir: Path, gzip_output: bool
+) -> list[ShardSpec]:
+    suffix = ".jsonl.gz" if gzip_output else ".jsonl"
+    shards: list[ShardSpec] = []
+    for index, first in enumerate(range(0, n_patients, shard_size)):
+        shards.append(
+            ShardSpec(
+                index=index,
+                path=str(out_dir / f"shard-{index:05d}{suffix}"),
+                seed=shard_seed(seed, index),
+                start_patient_number=start_patient_number + first,
+                patients=min(shard_size, n_patients - first),
+            )
+        )
+    return shards
+
+
+def write_shard(shard: ShardSpec, kind: str, options: dict) -> dict:
+    if kind == "documents":
+        items = iter_patient_documents(shard.patients, seed=shard.seed, start_patient_number=shard.start_patient_number)
+    else:
+        items = iter_patient_records(
+            shard.patients,
+            seed=shard.seed,
+            start_patient_number=shard.start_patient_number,
+            max_conditions=options["max_conditions"],
+            mean_updates=options["mean_updates"],
+            max_updates=options["max_updates"],
+            body_sizes=PayloadSizes(options["body_size"], options["body_max_kb"]),
+        )
+    tmp = shard.path + ".tmp"
+    opener = gzip.open if shard.path.endswith(".gz") else open
+    records = 0
+    with opener(tmp, "wt", encoding="utf-8") as f:
+        for item in items:
+            f.write(json.dumps(asdict(item), ensure_ascii=False))
+            f.write("\n")
+            records += 1
+    os.replace(tmp, shard.path)
+    return {**asdict(shard), "path": Path(shard.path).name, "records": records, "bytes": os.path.getsize(shard.path)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic patient dataset as sharded JSONL.")
+    parser.add_argument("--patients", type=int, required=True, help="Number of patients")
+    parser.add_argument("--out-dir", default="runtime/datasets/patients", help="Output directory (shards + manifest.json)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--start-patient-number", type=int, default=100)
+    parser.add_argument("--shard-size", type=int, default=100_000, help="Patients per shard (fixes the output; workers do not)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--kind",
+        default="records",
+        choices=["records", "documents"],
+        help="records: conditions with version histories and note bodies; documents: one PatientDocument per patient",
+    )
+    parser.add_argument("--max-conditions", type=int, default=3, help="Conditions per patient (uniform 1..N, distinct)")
+    parser.add_argument("--mean-updates", type=float, default=1.0, help="Mean UPDATE versions per condition")
+    parser.add_argument("--max-updates", type=int, default=10)
+    parser.add_argument(
+        "--body-size",
+        default="lognormal:2,0.6",
+        help="Note size distribution in KB: fixed:KB, uniform:LO,HI, lognormal:MEDIAN,SIGMA, choice:KB,KB,...",
+    )
+    parser.add_argument("--body-max-kb", type=float, default=256)
+    parser.add_argument("--gzip", action="store_true", help="Write .jsonl.gz shards")
+    args = parser.parse_args()
+
+    if args.patients <= 0 or args.shard_size <= 0:
+        raise ValueError("--patients and --shard-size must be positive")
+    PayloadSizes(args.body_size, args.body_max_kb)  # validate before starting workers
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    shards = plan_shards(
+        args.patients,
+        shard_size=args.shard_size,
+        seed=args.seed,
+        start_patient_number=args.start_patient_number,
+        out_dir=out_dir,
+        gzip_output=args.gzip,
+    )
+    options = {
+        "max_conditions": args.max_conditions,
+        "mean_updates": args.mean_updates,
+        "max_updates": args.max_updates,
+        "body_size": args.body_size,
+        "body_max_kb": args.body_max_kb,
+    }
+
+    t0 = time.perf_counter()
+    results: list[dict] = []
+    workers = max(1, min(args.workers, len(shards)))
+    if workers == 1:
+        for shard in shards:
+            results.append(write_shard(shard, args.kind, options))
+            print(f"[shard] {results[-1]['path']} records={results[-1]['records']}")
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(write_shard, shard, args.kind, options) for shard in shards]
+            for fut in as_completed(futures):
+                results.append(fut.result())
+                print(f"[shard] {results[-1]['path']} records={results[-1]['records']} ({len(results)}/{len(shards)})")
+    results.sort(key=lambda r: r["index"])
+    elapsed = time.perf_counter() - t0
+
+    manifest = {
+        "kind": args.kind,
+        "patients": args.patients,
+        "seed": args.seed,
+        "start_patient_number": args.start_patient_number,
+        "shard_size": args.shard_size,
+        "options": options if args.kind == "records" else {},
+        "records": sum(r["records"] for r in results),
+        "bytes": sum(r["bytes"] for r in results),
+        "shards": results,
+    }
+    with (out_dir / "manifest.json").open("w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    print(
+        f"Wrote {manifest['records']} {args.kind} for {args.patients} patients in {len(shards)} shards "
+        f"({manifest['bytes'] / 1e6:.1f} MB) to {out_dir} in {elapsed:.1f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
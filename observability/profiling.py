@@ -0,0 +1,235 @@
+import contextvars
+import cProfile
+import functools
+import hmac
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from observability import spans
+
+_REPO_ROOT = Path(__file__).resolve().parents[1]
+_prune_lock = threading.Lock()
+
+_active: contextvars.ContextVar[bool] = contextvars.ContextVar("ta_profile_active", default=False)
+
+
+def _truthy(v: str | None) -> bool:
+    return (v or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+@dataclass(frozen=True)
+class ProfilingConfig:
+    always: bool = False
+    sample_rate: float = 0.0
+    allow_header: bool = True
+    token: str | None = None  # X-TA-Profile must carry this value; without it the header is ignored
+    mode: str = "cprofile"  # cprofile | sample
+    sample_interval_s: float = 0.005
+    top_n: int = 30
+    max_profiles: int = 200  # oldest profiles are deleted beyond this many
+    out_dir: str = str(_REPO_ROOT / "runtime" / "profiles")
+
+    @classmethod
+    def from_env(cls) -> "ProfilingConfig":
+        return cls(
+            always=_truthy(os.getenv("TA_PROFILE")),
+            sample_rate=float(os.getenv("TA_PROFILE_SAMPLE_RATE") or cls.sample_rate),
+            allow_header=(os.getenv("TA_PROFILE_HEADER") or "true").strip().lower() not in {"0", "false", "no", "off"},
+            token=os.getenv("TA_PROFILE_TOKEN") or None,
+            mode=(os.getenv("TA_PROFILE_MODE") or cls.mode).strip().lower(),
+            sample_interval_s=float(os.getenv("TA_PROFILE_SAMPLE_INTERVAL_MS") or cls.sample_interval_s * 1000) / 1000,
+            top_n=int(os.getenv("TA_PROFILE_TOP_N") or cls.top_n),
+            max_profiles=int(os.getenv("TA_PROFILE_MAX_FILES") or cls.max_profiles),
+            out_dir=os.getenv("TA_PROFILE_DIR") or cls.out_dir,
+        )
+
+
+class _StackSampler(threading.Thread):
+    # Samples one thread's Python stack at a fixed interval; written as collapsed stacks
+    # ("outer;inner count" per line), which flamegraph tools read directly.
+    def __init__(self, thread_id: int, interval_s: float):
+        super().__init__(name="ta_profile_sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval_s = max(0.0005, interval_s)
+        self.counts: Counter[str] = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            stack: list[str] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class Profiler:
+    def __init__(self, config: ProfilingConfig | None = None):
+        self.config = config or ProfilingConfig.from_env()
+
+    @classmethod
+    def from_env_if_enabled(cls) -> "Profiler | None":
+        # None when neither TA_PROFILE nor a sample rate is set, so callers can skip all checks.
+        config = ProfilingConfig.from_env()
+        if not config.always and config.sample_rate <= 0:
+            return None
+        return cls(config)
+
+    def sampled(self) -> bool:
+        return self.config.always or (self.config.sample_rate > 0 and random.random() < self.config.sample_rate)
+
+    def requested(self, header_value: str | None) -> bool:
+        # A profiled request is slower and writes files, so clients can only ask for one
+        # with the operator's token.
+        token = self.config.token
+        if header_value and self.config.allow_header and token is not None and hmac.compare_digest(header_value, token):
+            return True
+        return self.sampled()
+
+    @staticmethod
+    def new_request_id() -> str:
+        # Always server-generated: it names the files under out_dir.
+        return uuid.uuid4().hex
+
+    @contextmanager
+    def capture(self, request_id: str, op: str, meta: dict[str, Any] | None = None) -> Iterator[None]:
+        # Profiles the current thread only; run the whole operation on one thread to see it all.
+        token = _active.set(True)
+        started_at = time.time()
+        t0 = time.perf_counter()
+        prof = sampler = None
+        if self.config.mode == "sample":
+            sampler = _StackSampler(threading.get_ident(), self.config.sample_interval_s)
+            sampler.start()
+        else:
+            prof = cProfile.Profile()
+        error: str | None = None
+        try:
+            with spans.collect() as ops:
+                if prof is not None:
+                    prof.enable()
+                try:
+                    yield
+                finally:
+                    if prof is not None:
+                        prof.disable()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            total_s = time.perf_counter() - t0
+            if sampler is not None:
+                sampler.stop()
+            _active.reset(token)
+            self._write(request_id, op, meta or {}, started_at, total_s, ops, prof, sampler, error)
+
+    def call(self, request_id: str, op: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self.capture(request_id, op):
+            return fn(*args, **kwargs)
+
+    def _write(
+        self,
+        request_id: str,
+        op: str,
+        meta: dict[str, Any],
+        started_at: float,
+        total_s: float,
+        ops: list[spans.OpTimings],
+        prof: cProfile.Profile | None,
+        sampler: _StackSampler | None,
+        error: str | None,
+    ) -> None:
+        out_dir = Path(self.config.out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        summary: dict[str, Any] = {
+            "request_id": request_id,
+            "op": op,
+            "meta": meta,
+            "started_at": started_at,
+            "total_s": total_s,
+            "error": error,
+            "profiler": "cprofile" if prof is not None else "sample",
+            "operations": [asdict(o) for o in ops],
+        }
+        if prof is not None:
+            prof_path = out_dir / f"{request_id}.prof"
+            prof.dump_stats(str(prof_path))
+            summary["profile_file"] = prof_path.name
+            summary["top_functions"] = _top_functions(prof, self.config.top_n)
+        if sampler is not None:
+            folded_path = out_dir / f"{request_id}.folded"
+            with folded_path.open("w", encoding="utf-8") as f:
+                for stack, n in sampler.counts.most_common():
+                    f.write(f"{stack} {n}\n")
+            summary["profile_file"] = folded_path.name
+            summary["samples"] = sum(sampler.counts.values())
+            summary["sample_interval_s"] = sampler.interval_s
+        with (out_dir / f"{request_id}.json").open("w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        self._prune(out_dir)
+
+    def _prune(self, out_dir: Path) -> None:
+        # One <id>.json per profile, next to its .prof or .folded file.
+        with _prune_lock:
+            summaries = []
+            for p in out_dir.glob("*.json"):
+                try:
+                    summaries.append((p.stat().st_mtime, p))
+                except FileNotFoundError:
+                    continue
+            summaries.sort()
+            for _, p in summaries[: max(0, len(summaries) - max(1, self.config.max_profiles))]:
+                for ext in (".prof", ".folded", ".json"):
+                    p.with_suffix(ext).unlink(missing_ok=True)
+
+
+def _top_functions(prof: cProfile.Profile, n: int) -> list[dict[str, Any]]:
+    stats = pstats.Stats(prof)
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _callers) in stats.stats.items():
+        rows.append(
+            {
+                "function": f"{os.path.basename(filename)}:{line}({func})",
+                "calls": nc,
+                "tottime_s": tt,
+                "cumtime_s": ct,
+            }
+        )
+    rows.sort(key=lambda r: r["tottime_s"], reverse=True)
+    return rows[:n]
+
+
+def profiled(op: str):
+    # Core method decorator: profiles sampled calls when the instance has a profiler. With
+    # profiler=None (the default unless TA_PROFILE / TA_PROFILE_SAMPLE_RATE is set) it costs
+    # one attribute check.
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            p = self.profiler
+            if p is None or _active.get() or not p.sampled():
+                return fn(self, *args, **kwargs)
+            with p.capture(Profiler.new_request_id(), op):
+                return fn(self, *args, **kwargs)
+
+        return wrapper
+
+    return deco
@@ -0,0 +1,181 @@
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
+
+from observability.metrics import REGISTRY
+
+_STAGE_SECONDS = REGISTRY.histogram(
+    "ta_stage_seconds",
+    "Time spent in one stage of a TA operation",
+    ("op", "stage", "priority"),
+)
+_OP_SECONDS = REGISTRY.histogram(
+    "ta_op_seconds",
+    "End-to-end TA operation latency",
+    ("op", "priority", "outcome"),
+)
+
+_enabled = (os.getenv("TA_SPANS") or "true").strip().lower() not in {"0", "false", "no", "off"}
+_current: contextvars.ContextVar["_Op | None"] = contextvars.ContextVar("ta_span_op", default=None)
+_collector: contextvars.ContextVar["list[OpTimings] | None"] = contextvars.ContextVar("ta_span_collector", default=None)
+
+_tracer: Any = None
+if (os.getenv("TA_OTEL") or "").strip().lower() in {"1", "true", "yes", "on"}:
+    try:
+        from opentelemetry import trace as _otel_trace
+
+        _tracer = _otel_trace.get_tracer("trusted_authority")
+    except ImportError:
+        _tracer = None
+
+
+@dataclass
+class OpTimings:
+    op: str
+    priority: str
+    outcome: str
+    total_s: float
+    # Summed seconds per stage; a stage entered several times (e.g. retries, batch items) adds up.
+    stages: dict[str, float] = field(default_factory=dict)
+
+
+class _Op:
+    __slots__ = ("name", "priority", "stages", "otel")
+
+    def __init__(self, name: str, priority: str | None):
+        self.name = name
+        self.priority = priority or ""
+        self.stages: list[tuple[str, float]] = []
+        self.otel: Any = None
+
+
+class _Noop:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _Noop()
+
+
+class _Span:
+    __slots__ = ("op", "stage", "start", "otel")
+
+    def __init__(self, op: _Op, stage: str):
+        self.op = op
+        self.stage = stage
+
+    def __enter__(self):
+        self.otel = None
+        if self.op.otel is not None:
+            self.otel = _tracer.start_span(self.stage, context=_otel_trace.set_span_in_context(self.op.otel))
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.op.stages.append((self.stage, time.perf_counter() - self.start))
+        if self.otel is not None:
+            self.otel.end()
+        return False
+
+
+class _Operation:
+    __slots__ = ("name", "priority", "op", "token", "start")
+
+    def __init__(self, name: str, priority: str | None):
+        self.name = name
+        self.priority = priority
+
+    def __enter__(self):
+        self.op = _Op(self.name, self.priority)
+        if _tracer is not None:
+            self.op.otel = _tracer.start_span(self.name)
+        self.token = _current.set(self.op)
+        self.start = time.perf_counter()
+        return self.op
+
+    def __exit__(self, exc_type, exc, tb):
+        total = time.perf_counter() - self.start
+        _current.reset(self.token)
+        op = self.op
+        outcome = "ok" if exc_type is None else "error"
+        priority = op.priority
+        stages: dict[str, float] = {}
+        for stage, dt in op.stages:
+            _STAGE_SECONDS.observe(dt, op=op.name, stage=stage, priority=priority)
+            stages[stage] = stages.get(stage, 0.0) + dt
+        _OP_SECONDS.observe(total, op=op.name, priority=priority, outcome=outcome)
+        if op.otel is not None:
+            op.otel.set_attribute("ta.priority", priority)
+            op.otel.set_attribute("ta.outcome", outcome)
+            op.otel.end()
+        sink = _collector.get()
+        if sink is not None:
+            sink.append(OpTimings(op=op.name, priority=priority, outcome=outcome, total_s=total, stages=stages))
+        return False
+
+
+def operation(name: str, priority: str | None = None):
+    # Top-level TA operation. Nested operations (e.g. update_record -> reconstruct paths) fold
+    # into the outer one so each request is observed exactly once.
+    if _current.get() is not None or (not _enabled and _collector.get() is None):
+        return _NOOP
+    return _Operation(name, priority)
+
+
+def span(stage: str):
+    op = _current.get()
+    if op is None:
+        return _NOOP
+    return _Span(op, stage)
+
+
+def set_priority(priority: str | None) -> None:
+    op = _current.get()
+    if op is not None and priority:
+        op.priority = priority
+
+
+def observe(op: str, stage: str, seconds: float, priority: str = "") -> None:
+    # For timings taken outside an operation context (e.g. across generator yields).
+    if _enabled:
+        _STAGE_SECONDS.observe(seconds, op=op, stage=stage, priority=priority)
+
+
+def bind(fn: Callable[..., Any]) -> Callable[..., Any]:
+    # Carry the current operation into a worker thread (executors do not copy contextvars).
+    op = _current.get()
+    if op is None:
+        return fn
+
+    def _run(*args, **kwargs):
+        token = _current.set(op)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+
+    return _run
+
+
+@contextmanager
+def collect() -> Iterator[list[OpTimings]]:
+    # Records every operation finished in this context, even when TA_SPANS is off.
+    sink: list[OpTimings] = []
+    token = _collector.set(sink)
+    try:
+        yield sink
+    finally:
+        _collector.reset(token)
+
+
+def set_enabled(enabled: bool) -> None:
+    global _enabled
+    _enabled = bool(enabled)
@@ -1,7 +1,10 @@
 import json
+import math
 import random
 from dataclasses import asdict, dataclass
+from datetime import date, timedelta
 from pathlib import Path
+from typing import Iterable, Iterator
 
 
 @dataclass(frozen=True)
@@ -88,33 +91,194 @@ def generate_patient_name(rng: random.Random) -> str:
     return f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}"
 
 
-def generate_patient_documents(
+def iter_patient_documents(
     n: int,
     *,
     seed: int = 7,
     start_patient_number: int = 100,
     diseases_by_priority: dict[str, list[str]] | None = None,
-) -> list[PatientDocument]:
+) -> Iterator[PatientDocument]:
     rng = random.Random(seed)
     ds = diseases_by_priority or get_default_disease_dataset()
 
     priorities = ["LOW", "MEDIUM", "HIGH"]
-    out: list[PatientDocument] = []
     for i in range(int(n)):
         prio = rng.choice(priorities)
         disease = rng.choice(ds[prio])
-        out.append(
-            PatientDocument(
-                patient_number=start_patient_number + i,
-                patient_name=generate_patient_name(rng),
-                disease=disease,
-                priority=prio,
-            )
+        yield PatientDocument(
+            patient_number=start_patient_number + i,
+            patient_name=generate_patient_name(rng),
+            disease=disease,
+            priority=prio,
+        )
+
+
+def generate_patient_documents(
+    n: int,
+    *,
+    seed: int = 7,
+    start_patient_number: int = 100,
+    diseases_by_priority: dict[str, list[str]] | None = None,
+) -> list[PatientDocument]:
+    return list(
+        iter_patient_documents(
+            n, seed=seed, start_patient_number=start_patient_number, diseases_by_priority=diseases_by_priority
         )
-    return out
+    )
 
 
 def save_patient_dataset_json(docs: list[PatientDocument], path: str | Path) -> None:
     p = Path(path)
     p.parent.mkdir(parents=True, exist_ok=True)
     p.write_text(json.dumps([asdict(d) for d in docs], indent=2), encoding="utf-8")
+
+
+class PayloadSizes:
+    # "fixed:KB", "uniform:LO_KB,HI_KB", "lognormal:MEDIAN_KB,SIGMA" or "choice:KB,KB,..."
+    def __init__(self, spec: str, max_kb: float):
+        kind, _, args = spec.partition(":")
+        self.kind = kind.strip().lower()
+        self.args = [float(x) for x in args.split(",") if x.strip()]
+        self.max_bytes = int(max_kb * 1024)
+        if self.kind not in {"fixed", "uniform", "lognormal", "choice"}:
+            raise ValueError(f"invalid payload distribution: {spec}")
+
+    def sample(self, rng: random.Random) -> int:
+        if self.kind == "fixed":
+            kb = self.args[0]
+        elif self.kind == "uniform":
+            kb = rng.uniform(self.args[0], self.args[1])
+        elif self.kind == "lognormal":
+            kb = rng.lognormvariate(math.log(self.args[0]), self.args[1])
+        else:
+            kb = rng.choice(self.args)
+        return max(64, min(self.max_bytes, int(kb * 1024)))
+
+
+@dataclass(frozen=True)
+class PatientRecord:
+    # One ledger version of one condition; bulk_ingest.py reads these fields from JSONL.
+    patient_number: int
+    patient_name: str
+    disease: str
+    priority: str
+    version: int
+    event: str
+    visit_date: str
+    body: str
+
+
+_COMPLAINTS = {
+    "LOW": ["runny nose", "itching", "headache", "mild fever", "stomach discomfort", "sneezing"],
+    "MEDIUM": ["shortness of breath", "persistent cough", "fatigue", "flank pain", "high fever", "dizziness"],
+    "HIGH": ["chest pain", "loss of consciousness", "slurred speech", "severe bleeding", "confusion", "respiratory distress"],
+}
+_FINDINGS = [
+    "Lungs clear to auscultation bilaterally.",
+    "Mild tenderness on palpation.",
+    "No focal neurological deficit.",
+    "Heart sounds regular, no murmurs.",
+    "Mucous membranes dry.",
+    "Peripheral pulses palpable.",
+    "Abdomen soft, non-distended.",
+    "Capillary refill under two seconds.",
+]
+_PLANS = [
+    "Continue current medication and review in two weeks.",
+    "Order complete blood count and metabolic panel.",
+    "Start oral fluids and antipyretics.",
+    "Refer to specialist for further evaluation.",
+    "Admit for observation and serial monitoring.",
+    "Repeat imaging in 48 hours.",
+    "Patient counselled on warning signs.",
+]
+_MEDICATIONS = [
+    "paracetamol 500 mg", "cetirizine 10 mg", "metformin 500 mg", "salbutamol inhaler",
+    "amoxicillin 500 mg", "amlodipine 5 mg", "aspirin 75 mg", "ondansetron 4 mg",
+]
+
+
+def make_clinical_note(rng: random.Random, doc: PatientDocument, *, version: int, visit_date: str, size: int) -> str:
+    # Structured note whose header keeps PatientDocument.to_text() lines (the triage step and
+    # the stub LLM read Priority from it), padded with progress notes up to `size` bytes.
+    lines = [
+        doc.to_text().rstrip("\n"),
+        f"Visit: {version} ({visit_date})",
+        f"Chief complaint: {rng.choice(_COMPLAINTS[doc.priority])}",
+        f"Vitals: BP {rng.randint(90, 180)}/{rng.randint(50, 110)} HR {rng.randint(45, 150)} "
+        f"SpO2 {rng.randint(85, 100)}% Temp {rng.uniform(36.0, 40.0):.1f}C",
+        f"Examination: {' '.join(rng.sample(_FINDINGS, 2))}",
+        f"Medications: {', '.join(rng.sample(_MEDICATIONS, rng.randint(1, 3)))}",
+        f"Plan: {rng.choice(_PLANS)}",
+    ]
+    parts = ["\n".join(lines) + "\n"]
+    total = len(parts[0].encode("utf-8"))
+    note = 1
+    while total < size:
+        line = f"Progress note {note}: {rng.choice(_FINDINGS)} {rng.choice(_PLANS)}\n"
+        parts.append(line)
+        total += len(line)
+        note += 1
+    return "".join(parts).encode("utf-8")[:size].decode("utf-8", errors="ignore")
+
+
+def iter_patient_records(
+    n_patients: int,
+    *,
+    seed: int = 7,
+    start_patient_number: int = 100,
+    max_conditions: int = 3,
+    mean_updates: float = 1.0,
+    max_updates: int = 10,
+    body_sizes: PayloadSizes | None = None,
+    diseases_by_priority: dict[str, list[str]] | None = None,
+) -> Iterator[PatientRecord]:
+    # Patients with 1..max_conditions distinct conditions, each with a CREATE and a geometric
+    # number of UPDATE versions (mean `mean_updates`); ordered by patient, then condition, then
+    # version, so every patient's history is contiguous and in version order.
+    rng = random.Random(seed)
+    ds = diseases_by_priority or get_default_disease_dataset()
+    sizes = body_sizes or PayloadSizes("lognormal:2,0.6", 256)
+    priorities = ["LOW", "MEDIUM", "HIGH"]
+    p_more = mean_updates / (1.0 + mean_updates) if mean_updates > 0 else 0.0
+
+    for i in range(int(n_patients)):
+        name = generate_patient_name(rng)
+        seen: set[str] = set()
+        for _ in range(rng.randint(1, max(1, max_conditions))):
+            prio = rng.choice(priorities)
+            disease = rng.choice(ds[prio])
+            if disease in seen:
+                continue
+            seen.add(disease)
+            doc = PatientDocument(patient_number=start_patient_number + i, patient_name=name, disease=disease, priority=prio)
+            updates = 0
+            while updates < max_updates and rng.random() < p_more:
+                updates += 1
+            day = date(2024, 1, 1) + timedelta(days=rng.randrange(365))
+            for version in range(1, updates + 2):
+                visit_date = day.isoformat()
+                yield PatientRecord(
+                    patient_number=doc.patient_number,
+                    patient_name=name,
+                    disease=disease,
+                    priority=prio,
+                    version=version,
+                    event="CREATE" if version == 1 else "UPDATE",
+                    visit_date=visit_date,
+                    body=make_clinical_note(rng, doc, version=version, visit_date=visit_date, size=sizes.sample(rng)),
+                )
+                day += timedelta(days=rng.randint(1, 60))
+
+
+def save_patient_dataset_jsonl(docs: Iterable[PatientDocument | PatientRecord], path: str | Path) -> int:
+    # One JSON object per line, written as the iterable yields; returns the line count.
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    n = 0
+    with p.open("w", encoding="utf-8") as f:
+        for d in docs:
+            f.write(json.dumps(asdict(d), ensure_ascii=False))
+            f.write("\n")
+            n += 1
+    return n
@@ -0,0 +1,21 @@
+import asyncio
+from concurrent.futures import Executor
+from functools import partial
+from typing import Any
+
+
+class AsyncPeerStore:
+    # Async facade over PeerNMKStore (or any store with wrap_share/unwrap_share).
+    def __init__(self, inner: Any, executor: Executor):
+        self.inner = inner
+        self.executor = executor
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+    async def wrap_share(self, peer_id: str, share: bytes, aad: bytes) -> str:
+        return await self._run(self.inner.wrap_share, peer_id, share, aad=aad)
+
+    async def unwrap_share(self, peer_id: str, wrapped_b64: str, aad: bytes) -> bytes:
+        return await self._run(self.inner.unwrap_share, peer_id, wrapped_b64, aad=aad)
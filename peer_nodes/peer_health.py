@@ -0,0 +1,342 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from observability.metrics import REGISTRY
+
+_LATENCY_EWMA = REGISTRY.gauge("ta_peer_latency_ewma_seconds", "EWMA of successful unwrap latency per peer", ("peer",))
+_ERROR_RATE = REGISTRY.gauge("ta_peer_error_rate", "EWMA of the unwrap failure rate per peer", ("peer",))
+_HEALTHY = REGISTRY.gauge("ta_peer_healthy", "1 unless the peer is cooling down after consecutive failures", ("peer",))
+_SCORE = REGISTRY.gauge("ta_peer_score", "Peer selection score (expected unwrap seconds; lower is tried first)", ("peer",))
+_ERRORS = REGISTRY.counter("ta_peer_unwrap_errors_total", "Failed unwraps per peer", ("peer",))
+_EXTRA = REGISTRY.counter(
+    "ta_peer_extra_requests_total",
+    "Unwraps sent beyond the first k: hedge = a response was slower than the hedge delay, failover = a peer failed",
+    ("reason",),
+)
+_ABANDONED = REGISTRY.counter(
+    "ta_peer_unwraps_abandoned_total",
+    "Unwrap requests still in flight when k shares had already arrived",
+)
+
+
+@dataclass(frozen=True)
+class PeerHealthConfig:
+    alpha: float = 0.2
+    error_penalty: float = 4.0
+    failure_threshold: int = 3
+    cooldown_s: float = 10.0
+    probe_after_s: float = 30.0
+    hedge: bool = True
+    hedge_percentile: float = 0.95
+    hedge_min_s: float = 0.002
+    hedge_default_s: float = 0.05
+    window: int = 512
+    min_samples: int = 20
+
+    @classmethod
+    def from_env(cls) -> "PeerHealthConfig":
+        return cls(
+            alpha=float(os.getenv("TA_PEER_EWMA_ALPHA") or cls.alpha),
+            error_penalty=float(os.getenv("TA_PEER_ERROR_PENALTY") or cls.error_penalty),
+            failure_threshold=int(os.getenv("TA_PEER_FAILURE_THRESHOLD") or cls.failure_threshold),
+            cooldown_s=float(os.getenv("TA_PEER_COOLDOWN_S") or cls.cooldown_s),
+            probe_after_s=float(os.getenv("TA_PEER_PROBE_AFTER_S") or cls.probe_after_s),
+            hedge=(os.getenv("TA_PEER_HEDGE") or "1").lower() not in ("0", "false", "no"),
+            hedge_percentile=float(os.getenv("TA_PEER_HEDGE_PERCENTILE") or cls.hedge_percentile),
+            hedge_min_s=float(os.getenv("TA_PEER_HEDGE_MIN_MS") or cls.hedge_min_s * 1000) / 1000,
+            hedge_default_s=float(os.getenv("TA_PEER_HEDGE_DEFAULT_MS") or cls.hedge_default_s * 1000) / 1000,
+        )
+
+
+@dataclass
+class _PeerStats:
+    latency_ewma_s: float | None = None
+    error_rate: float = 0.0
+    successes: int = 0
+    errors: int = 0
+    consecutive_failures: int = 0
+    down_until: float = 0.0
+    last_seen: float = 0.0
+
+
+class PeerHealth:
+    # Per-peer EWMA of unwrap latency and failure rate. rank() orders candidates by expected
+    # latency (inflated by the error rate), with peers cooling down after consecutive failures
+    # last; a peer that has not answered for probe_after_s ranks as unknown again so a
+    # recovered peer gets re-measured. hedge_delay_s() is a percentile of recent latencies
+    # across all peers: a response slower than that triggers a request to the next peer.
+    def __init__(self, peer_ids: list[str], config: PeerHealthConfig | None = None):
+        self.config = config or PeerHealthConfig.from_env()
+        self._lock = threading.Lock()
+        self._stats: dict[str, _PeerStats] = {}
+        self._recent: deque[float] = deque(maxlen=max(1, self.config.window))
+        for peer_id in peer_ids:
+            self._ensure(peer_id)
+
+    def _ensure(self, peer_id: str) -> _PeerStats:
+        s = self._stats.get(peer_id)
+        if s is None:
+            s = _PeerStats()
+            self._stats[peer_id] = s
+            _LATENCY_EWMA.set_function(lambda p=peer_id: self._stats[p].latency_ewma_s or 0.0, peer=peer_id)
+            _ERROR_RATE.set_function(lambda p=peer_id: self._stats[p].error_rate, peer=peer_id)
+            _HEALTHY.set_function(lambda p=peer_id: 1.0 if self.healthy(p) else 0.0, peer=peer_id)
+            _SCORE.set_function(lambda p=peer_id: self.score(p), peer=peer_id)
+        return s
+
+    def record(self, peer_id: str, seconds: float, ok: bool) -> None:
+        a = self.config.alpha
+        now = time.monotonic()
+        with self._lock:
+            s = self._ensure(peer_id)
+            s.last_seen = now
+            s.error_rate += a * ((0.0 if ok else 1.0) - s.error_rate)
+            if ok:
+                s.successes += 1
+                s.consecutive_failures = 0
+                s.latency_ewma_s = seconds if s.latency_ewma_s is None else s.latency_ewma_s + a * (seconds - s.latency_ewma_s)
+                self._recent.append(seconds)
+            else:
+                s.errors += 1
+                s.consecutive_failures += 1
+                if s.consecutive_failures >= self.config.failure_threshold:
+                    s.down_until = now + self.config.cooldown_s
+        if not ok:
+            _ERRORS.inc(peer=peer_id)
+
+    def record_unfinished(self, peer_id: str, seconds: float) -> None:
+        # A request cancelled after `seconds` without an answer: a lower bound on its latency.
+        # Only the latency EWMA moves (never down); it is neither a success nor a failure, and
+        # stays out of the hedge percentile, which would otherwise creep up with every hedge.
+        a = self.config.alpha
+        with self._lock:
+            s = self._ensure(peer_id)
+            s.last_seen = time.monotonic()
+            if s.latency_ewma_s is None:
+                s.latency_ewma_s = seconds
+            elif seconds > s.latency_ewma_s:
+                s.latency_ewma_s += a * (seconds - s.latency_ewma_s)
+
+    def healthy(self, peer_id: str) -> bool:
+        s = self._stats.get(peer_id)
+        return s is None or s.down_until <= time.monotonic()
+
+    def score(self, peer_id: str) -> float:
+        # Expected seconds for one useful answer; 0 for peers without a recent measurement.
+        s = self._stats.get(peer_id)
+        if s is None or time.monotonic() - s.last_seen > self.config.probe_after_s:
+            return 0.0
+        if s.latency_ewma_s is None:
+            if not s.errors:
+                return 0.0
+            latency = self.config.hedge_default_s
+        else:
+            latency = s.latency_ewma_s
+        return latency * (1.0 + self.config.error_penalty * s.error_rate)
+
+    def rank(self, peer_ids: list[str]) -> list[str]:
+        # Stable: ties (e.g. a cold start) keep the configured peer order.
+        with self._lock:
+            keyed = [(not self.healthy(p), self.score(p), i, p) for i, p in enumerate(peer_ids)]
+        return [p for *_, p in sorted(keyed)]
+
+    def hedge_delay_s(self) -> float:
+        with self._lock:
+            samples = sorted(self._recent)
+        if len(samples) < self.config.min_samples:
+            return self.config.hedge_default_s
+        idx = min(len(samples) - 1, max(0, math.ceil(self.config.hedge_percentile * len(samples)) - 1))
+        return max(self.config.hedge_min_s, samples[idx])
+
+    def snapshot(self, peer_ids: list[str] | None = None) -> dict[str, dict[str, float | int | bool | None]]:
+        with self._lock:
+            ids = list(self._stats) if peer_ids is None else [p for p in peer_ids if p in self._stats]
+            return {
+                p: {
+                    "latency_ewma_ms": round(s.latency_ewma_s * 1000, 3) if s.latency_ewma_s is not None else None,
+                    "error_rate": round(s.error_rate, 4),
+                    "errors": s.errors,
+                    "healthy": self.healthy(p),
+                    "score": round(self.score(p), 6),
+                }
+                for p in ids
+                for s in (self._stats[p],)
+            }
+
+
+def _timed(health: PeerHealth | None, unwrap: Callable[[str, str, bytes], bytes], peer_id: str, wrapped: str, aad: bytes) -> bytes:
+    start = time.perf_counter()
+    try:
+        share = unwrap(peer_id, wrapped, aad)
+    except Exception:
+        if health is not None:
+            health.record(peer_id, time.perf_counter() - start, ok=False)
+        raise
+    if health is not None:
+        health.record(peer_id, time.perf_counter() - start, ok=True)
+    return share
+
+
+def unwrap_first_k(
+    pool: Executor,
+    unwrap: Callable[[str, str, bytes], bytes],
+    wrapped: list[tuple[str, str]],
+    aad: bytes,
+    k: int,
+    health: PeerHealth | None = None,
+) -> list[tuple[str, bytes]]:
+    # Without health: ask every candidate at once. With health: ask the k best-ranked peers,
+    # send one more request whenever a peer fails or an answer is slower than the hedge delay,
+    # and return the first k shares to arrive (arrival order).
+    if health is None or not health.config.hedge:
+        order = list(wrapped) if health is None else _ranked(health, wrapped)
+        initial = len(order) if health is None else k
+        delay = None
+    else:
+        order = _ranked(health, wrapped)
+        initial = k
+        delay = health.hedge_delay_s()
+    queue = list(order)
+    started: dict[Future, tuple[str, float]] = {}
+    unhedged: set[Future] = set()
+
+    pending: set[Future] = set()
+
+    def launch(reason: str | None) -> None:
+        peer_id, w = queue.pop(0)
+        fut = pool.submit(_timed, health, unwrap, peer_id, w, aad)
+        started[fut] = (peer_id, time.perf_counter())
+        unhedged.add(fut)
+        pending.add(fut)
+        if reason is not None:
+            _EXTRA.inc(reason=reason)
+
+    for _ in range(min(initial, len(queue))):
+        launch(None)
+    got: list[tuple[str, bytes]] = []
+    errors: list[str] = []
+    while pending and len(got) < k:
+        timeout = None
+        if delay is not None and queue and unhedged:
+            timeout = max(0.0, min(started[f][1] for f in unhedged) + delay - time.perf_counter())
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for fut in done:
+            pending.discard(fut)
+            unhedged.discard(fut)
+            try:
+                got.append((started[fut][0], fut.result()))
+            except Exception as e:
+                errors.append(str(e))
+        if not done:
+            now = time.perf_counter()
+            for fut in [f for f in unhedged if now - started[f][1] >= delay]:
+                unhedged.discard(fut)
+                if queue:
+                    launch("hedge")
+        while queue and len(got) + len(pending) < k:
+            launch("failover")
+    leftover = [f for f in started if not f.done()]
+    for f in leftover:
+        f.cancel()
+    if leftover:
+        _ABANDONED.inc(len(leftover))
+    if len(got) < k:
+        raise ValueError(f"insufficient shares: need {k}, got {len(got)} ({'; '.join(errors)})")
+    return got[:k]
+
+
+async def unwrap_first_k_async(
+    unwrap: Callable[[str, str, bytes], Awaitable[bytes]],
+    wrapped: list[tuple[str, str]],
+    aad: bytes,
+    k: int,
+    health: PeerHealth | None = None,
+) -> list[tuple[str, bytes]]:
+    # Event-loop twin of unwrap_first_k. Requests still running once k shares arrived are
+    # cancelled; their elapsed time is recorded as a lower-bound latency so a slow peer
+    # still drops in the ranking.
+    if health is None or not health.config.hedge:
+        order = list(wrapped) if health is None else _ranked(health, wrapped)
+        initial = len(order) if health is None else k
+        delay = None
+    else:
+        order = _ranked(health, wrapped)
+        initial = k
+        delay = health.hedge_delay_s()
+    queue = list(order)
+    started: dict[asyncio.Task, tuple[str, float]] = {}
+    unhedged: set[asyncio.Task] = set()
+
+    async def _one(peer_id: str, w: str) -> bytes:
+        start = time.perf_counter()
+        try:
+            share = await unwrap(peer_id, w, aad)
+        except asyncio.CancelledError:
+            if health is not None:
+                health.record_unfinished(peer_id, time.perf_counter() - start)
+            raise
+        except Exception:
+            if health is not None:
+                health.record(peer_id, time.perf_counter() - start, ok=False)
+            raise
+        if health is not None:
+            health.record(peer_id, time.perf_counter() - start, ok=True)
+        return share
+
+    pending: set[asyncio.Task] = set()
+
+    def launch(reason: str | None) -> None:
+        peer_id, w = queue.pop(0)
+        task = asyncio.ensure_future(_one(peer_id, w))
+        started[task] = (peer_id, time.perf_counter())
+        unhedged.add(task)
+        pending.add(task)
+        if reason is not None:
+            _EXTRA.inc(reason=reason)
+
+    for _ in range(min(initial, len(queue))):
+        launch(None)
+    got: list[tuple[str, bytes]] = []
+    errors: list[str] = []
+    try:
+        while pending and len(got) < k:
+            timeout = None
+            if delay is not None and queue and unhedged:
+                timeout = max(0.0, min(started[t][1] for t in unhedged) + delay - time.perf_counter())
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                pending.discard(t)
+                unhedged.discard(t)
+                if t.exception() is not None:
+                    errors.append(str(t.exception()))
+                else:
+                    got.append((started[t][0], t.result()))
+            if not done:
+                now = time.perf_counter()
+                for t in [t for t in unhedged if now - started[t][1] >= delay]:
+                    unhedged.discard(t)
+                    if queue:
+                        launch("hedge")
+            while queue and len(got) + len(pending) < k:
+                launch("failover")
+    finally:
+        leftover = [t for t in started if not t.done()]
+        for t in leftover:
+            t.cancel()
+        if leftover:
+            _ABANDONED.inc(len(leftover))
+    if len(got) < k:
+        raise ValueError(f"insufficient shares: need {k}, got {len(got)} ({'; '.join(errors)})")
+    return got[:k]
+
+
+def _ranked(health: PeerHealth, wrapped: list[tuple[str, str]]) -> list[tuple[str, str]]:
+    by_peer = dict(wrapped)
+    return [(p, by_peer[p]) for p in health.rank(list(by_peer))]
@@ -1,40 +1,119 @@
 import base64
 import os
+import threading
+import time
 
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
 
+def wrapped_key_version(wrapped_b64: str) -> int:
+    # "k<N>:<base64>" from key version 2 on; unprefixed shares are version 1 (base64 has no ':').
+    if wrapped_b64.startswith("k"):
+        head, sep, _ = wrapped_b64.partition(":")
+        if sep and head[1:].isdigit():
+            return int(head[1:])
+    return 1
+
+
 class PeerNMKStore:
-    def __init__(self, base_dir: str, peer_ids: list[str]):
+    # <peer>.key is key version 1. rotate() adds <peer>.v<N>.key and records N in
+    # <peer>.active; new wraps use the active version while every key file still present
+    # can unwrap, so records stay readable until the old version is retired.
+    # The active version is cached per peer and re-read at most every active_recheck_s, so a
+    # rotation by another process (rotate_nmk.py on the same directory) is picked up within
+    # that window; rotate() in this process updates the cache at once.
+    def __init__(self, base_dir: str, peer_ids: list[str], active_recheck_s: float = 1.0):
         self.base_dir = base_dir
         os.makedirs(base_dir, exist_ok=True)
         self.peer_ids = peer_ids
+        self.active_recheck_s = active_recheck_s
+        self._active: dict[str, tuple[int, float]] = {}  # peer -> (version, next check)
+        self._rotate_lock = threading.Lock()
         for pid in peer_ids:
             self._ensure(pid)
 
+    def _key_path(self, peer_id: str, version: int) -> str:
+        name = f"{peer_id}.key" if version == 1 else f"{peer_id}.v{version}.key"
+        return os.path.join(self.base_dir, name)
+
+    def _active_path(self, peer_id: str) -> str:
+        return os.path.join(self.base_dir, f"{peer_id}.active")
+
     def _ensure(self, peer_id: str) -> None:
-        path = os.path.join(self.base_dir, f"{peer_id}.key")
+        if os.path.exists(self._active_path(peer_id)):
+            return  # rotated: version 1 may have been retired on purpose
+        path = self._key_path(peer_id, 1)
         if not os.path.exists(path):
             with open(path, "wb") as f:
                 f.write(os.urandom(32))
 
-    def _load(self, peer_id: str) -> bytes:
-        path = os.path.join(self.base_dir, f"{peer_id}.key")
-        with open(path, "rb") as f:
-            key = f.read()
+    def active_version(self, peer_id: str) -> int:
+        cached = self._active.get(peer_id)
+        now = time.monotonic()
+        if cached is not None and now < cached[1]:
+            return cached[0]
+        version = self._read_active(peer_id)
+        self._active[peer_id] = (version, now + self.active_recheck_s)
+        return version
+
+    def _read_active(self, peer_id: str) -> int:
+        try:
+            with open(self._active_path(peer_id), "r", encoding="utf-8") as f:
+                return int(f.read().strip() or "1")
+        except FileNotFoundError:
+            return 1
+
+    def _load(self, peer_id: str, version: int = 1) -> bytes:
+        path = self._key_path(peer_id, version)
+        try:
+            with open(path, "rb") as f:
+                key = f.read()
+        except FileNotFoundError:
+            raise ValueError(f"NMK version {version} of {peer_id} is not available") from None
         if len(key) != 32:
             raise ValueError("invalid NMK")
         return key
 
     def wrap_share(self, peer_id: str, share: bytes, aad: bytes) -> str:
-        key = self._load(peer_id)
+        version = self.active_version(peer_id)
+        key = self._load(peer_id, version)
         nonce = os.urandom(12)
         ct = AESGCM(key).encrypt(nonce, share, aad)
-        return base64.b64encode(nonce + ct).decode("utf-8")
+        wrapped = base64.b64encode(nonce + ct).decode("utf-8")
+        return wrapped if version == 1 else f"k{version}:{wrapped}"
 
     def unwrap_share(self, peer_id: str, wrapped_b64: str, aad: bytes) -> bytes:
-        key = self._load(peer_id)
-        blob = base64.b64decode(wrapped_b64)
+        version = wrapped_key_version(wrapped_b64)
+        key = self._load(peer_id, version)
+        blob = base64.b64decode(wrapped_b64.partition(":")[2] if version != 1 else wrapped_b64)
         nonce = blob[:12]
         ct = blob[12:]
         return AESGCM(key).decrypt(nonce, ct, aad)
+
+    def rewrap_share(self, peer_id: str, wrapped_b64: str, aad: bytes) -> str:
+        # Re-encrypts one share under the active key; the share never leaves this store.
+        return self.wrap_share(peer_id, self.unwrap_share(peer_id, wrapped_b64, aad), aad)
+
+    def rotate(self, peer_id: str) -> int:
+        # New key first, then the switch, so a concurrent wrap never sees a missing key.
+        with self._rotate_lock:
+            version = self._read_active(peer_id) + 1
+            while os.path.exists(self._key_path(peer_id, version)) or os.path.exists(self._key_path(peer_id, version) + ".retired"):
+                version += 1
+            with open(self._key_path(peer_id, version), "xb") as f:
+                f.write(os.urandom(32))
+            tmp = self._active_path(peer_id) + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(str(version))
+            os.replace(tmp, self._active_path(peer_id))
+            self._active[peer_id] = (version, time.monotonic() + self.active_recheck_s)
+            return version
+
+    def retire(self, peer_id: str, version: int) -> None:
+        # Renamed, not deleted, so a mistaken retire can be undone by renaming it back.
+        if version == self._read_active(peer_id):
+            raise ValueError(f"cannot retire the active NMK version of {peer_id}")
+        path = self._key_path(peer_id, version)
+        if not os.path.exists(path):
+            raise ValueError(f"NMK version {version} of {peer_id} is not available")
+        os.replace(path, path + ".retired")
@@ -0,0 +1,155 @@
+import argparse
+import base64
+import hmac
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from fastapi import FastAPI, Header, HTTPException
+from pydantic import BaseModel
+
+from peer_nodes.peer_nmk import PeerNMKStore
+
+
+class WrapRequest(BaseModel):
+    share_b64: str
+    aad_b64: str
+
+
+class UnwrapRequest(BaseModel):
+    wrapped: str
+    aad_b64: str
+
+
+class RetireRequest(BaseModel):
+    key_version: int
+
+
+def create_app(peer_id: str, nmk_dir: str, token: str | None = None) -> FastAPI:
+    # One peer per process: only this peer's NMK is loaded, and it never leaves the process.
+    # The wrapped format matches PeerNMKStore, so records sealed with a local NMK directory
+    # stay readable when the same key file is served here.
+    store = PeerNMKStore(nmk_dir, peer_ids=[peer_id])
+    app = FastAPI(title=f"Peer {peer_id}")
+
+    def _check(x_peer_token: str | None) -> None:
+        if token is not None and not hmac.compare_digest(x_peer_token or "", token):
+            raise HTTPException(status_code=401, detail="invalid peer token")
+
+    def _b64(value: str) -> bytes:
+        try:
+            return base64.b64decode(value, validate=True)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail="invalid base64") from e
+
+    @app.get("/health")
+    def health() -> dict:
+        return {"ok": True, "peer_id": peer_id}
+
+    @app.post("/v1/wrap")
+    def wrap(req: WrapRequest, x_peer_token: str | None = Header(default=None)) -> dict:
+        _check(x_peer_token)
+        return {"peer_id": peer_id, "wrapped": store.wrap_share(peer_id, _b64(req.share_b64), aad=_b64(req.aad_b64))}
+
+    @app.post("/v1/unwrap")
+    def unwrap(req: UnwrapRequest, x_peer_token: str | None = Header(default=None)) -> dict:
+        _check(x_peer_token)
+        try:
+            share = store.unwrap_share(peer_id, req.wrapped, aad=_b64(req.aad_b64))
+        except Exception as e:
+            # Wrong key, tampered share or mismatched AAD all surface as InvalidTag.
+            raise HTTPException(status_code=400, detail=f"unwrap failed: {type(e).__name__}") from e
+        return {"peer_id": peer_id, "share_b64": base64.b64encode(share).decode("utf-8")}
+
+    # NMK rotation (rotate_nmk.py): rewrap re-encrypts a share under the active key without
+    # returning it, so the TA never sees plaintext shares while rotating.
+    @app.post("/v1/rewrap")
+    def rewrap(req: UnwrapRequest, x_peer_token: str | None = Header(default=None)) -> dict:
+        _check(x_peer_token)
+        try:
+            wrapped = store.rewrap_share(peer_id, req.wrapped, aad=_b64(req.aad_b64))
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"rewrap failed: {type(e).__name__}") from e
+        return {"peer_id": peer_id, "wrapped": wrapped}
+
+    @app.get("/v1/key")
+    def key(x_peer_token: str | None = Header(default=None)) -> dict:
+        _check(x_peer_token)
+        return {"peer_id": peer_id, "key_version": store.active_version(peer_id)}
+
+    @app.post("/v1/rotate")
+    def rotate(x_peer_token: str | None = Header(default=None)) -> dict:
+        _check(x_peer_token)
+        return {"peer_id": peer_id, "key_version": store.rotate(peer_id)}
+
+    @app.post("/v1/retire")
+    def retire(req: RetireRequest, x_peer_token: str | None = Header(default=None)) -> dict:
+        _check(x_peer_token)
+        try:
+            store.retire(peer_id, req.key_version)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        return {"peer_id": peer_id, "retired": req.key_version}
+
+    return app
+
+
+def _spawn(n: int, host: str, base_port: int, nmk_dir: str) -> int:
+    # Local cluster: one child process per peer; prints the TA_PEER_URLS value for the TA.
+    procs: list[subprocess.Popen] = []
+    urls: list[str] = []
+    for i in range(1, n + 1):
+        peer_id = f"peer{i}"
+        port = base_port + i - 1
+        procs.append(
+            subprocess.Popen(
+                [sys.executable, "-m", "peer_nodes.peer_service", "--peer-id", peer_id, "--host", host, "--port", str(port), "--nmk-dir", nmk_dir]
+            )
+        )
+        urls.append(f"{peer_id}=http://{host}:{port}")
+    print(f"TA_PEER_URLS={','.join(urls)}", flush=True)
+
+    def _stop(*_args) -> None:
+        for p in procs:
+            p.terminate()
+
+    signal.signal(signal.SIGTERM, _stop)
+    try:
+        # A dead peer is a failure for the TA to tolerate, not a reason to stop the others.
+        while any(p.poll() is None for p in procs):
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _stop()
+        for p in procs:
+            p.wait()
+    return 0
+
+
+def main() -> int:
+    base = os.path.dirname(os.path.dirname(__file__))
+    parser = argparse.ArgumentParser(description="Peer share service (holds one peer's NMK).")
+    parser.add_argument("--peer-id", default=None, help="Peer to serve (e.g. peer1)")
+    parser.add_argument("--spawn", type=int, default=0, metavar="N", help="Start peer1..peerN as separate processes")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9101, help="Port (with --spawn: port of peer1, then +1 per peer)")
+    parser.add_argument("--nmk-dir", default=os.path.join(os.getenv("TA_RUNTIME_DIR") or os.path.join(base, "runtime"), "nmks"))
+    args = parser.parse_args()
+
+    if args.spawn:
+        return _spawn(args.spawn, args.host, args.port, args.nmk_dir)
+    if not args.peer_id:
+        parser.error("--peer-id or --spawn is required")
+
+    import uvicorn
+
+    app = create_app(args.peer_id, args.nmk_dir, token=os.getenv("TA_PEER_TOKEN") or None)
+    uvicorn.run(app, host=args.host, port=args.port, log_level=os.getenv("TA_PEER_LOG_LEVEL") or "warning")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,194 @@
+import base64
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import httpx
+
+from observability.metrics import REGISTRY
+from peer_nodes.peer_health import PeerHealth, unwrap_first_k, unwrap_first_k_async
+
+_REQUEST_SECONDS = REGISTRY.histogram(
+    "ta_peer_request_seconds",
+    "Peer service request latency by peer, operation and outcome",
+    ("peer", "op", "outcome"),
+)
+
+
+class PeerUnavailableError(ValueError):
+    pass
+
+
+def parse_peer_urls(spec: str) -> dict[str, str]:
+    # "peer1=http://127.0.0.1:9101,peer2=http://127.0.0.1:9102"; order defines peer order.
+    urls: dict[str, str] = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        peer_id, sep, url = part.partition("=")
+        if not sep or not peer_id.strip() or not url.strip():
+            raise ValueError(f"invalid peer url entry: {part!r} (expected peer_id=url)")
+        urls[peer_id.strip()] = url.strip().rstrip("/")
+    if len(urls) < 2:
+        raise ValueError("at least two peers are required")
+    return urls
+
+
+class RemotePeerStore:
+    # PeerNMKStore interface over per-peer services (peer_nodes/peer_service.py), plus
+    # wrap_many / unwrap_first_k that fan out to peers in parallel.
+    def __init__(
+        self,
+        peer_urls: dict[str, str],
+        *,
+        timeout_s: float = 2.0,
+        token: str | None = None,
+        max_workers: int = 64,
+        transport: httpx.BaseTransport | None = None,
+    ):
+        self.peer_urls = dict(peer_urls)
+        self.peer_ids = list(self.peer_urls)
+        self.timeout_s = timeout_s
+        self.token = token
+        self.client = httpx.Client(
+            timeout=timeout_s,
+            headers={"X-Peer-Token": token} if token else None,
+            limits=httpx.Limits(max_connections=max_workers, max_keepalive_connections=max_workers),
+            transport=transport,
+        )
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="ta_peer")
+
+    @classmethod
+    def from_env(cls) -> "RemotePeerStore | None":
+        # None unless TA_PEER_URLS is set, in which case it also defines the peer ids.
+        spec = os.getenv("TA_PEER_URLS")
+        if not spec:
+            return None
+        return cls(
+            parse_peer_urls(spec),
+            timeout_s=float(os.getenv("TA_PEER_TIMEOUT_S") or "2.0"),
+            token=os.getenv("TA_PEER_TOKEN") or None,
+            max_workers=int(os.getenv("TA_PEER_WORKERS") or "64"),
+        )
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False)
+        self.client.close()
+
+    def _post(self, peer_id: str, op: str, body: dict[str, Any]) -> dict:
+        url = self.peer_urls.get(peer_id)
+        if url is None:
+            raise ValueError(f"unknown peer: {peer_id}")
+        start = time.perf_counter()
+        try:
+            r = self.client.post(f"{url}/v1/{op}", json=body)
+        except httpx.TransportError as e:
+            _REQUEST_SECONDS.observe(time.perf_counter() - start, peer=peer_id, op=op, outcome="transport_error")
+            raise PeerUnavailableError(f"{peer_id} unreachable: {e}") from e
+        outcome = "ok" if r.status_code < 400 else ("server_error" if r.status_code >= 500 else "rejected")
+        _REQUEST_SECONDS.observe(time.perf_counter() - start, peer=peer_id, op=op, outcome=outcome)
+        if r.status_code >= 500:
+            raise PeerUnavailableError(f"{peer_id} failed: {r.status_code} {r.text}")
+        if r.status_code >= 400:
+            raise ValueError(f"{peer_id} rejected {op}: {r.text}")
+        return r.json()
+
+    def wrap_share(self, peer_id: str, share: bytes, aad: bytes) -> str:
+        body = {"share_b64": base64.b64encode(share).decode("utf-8"), "aad_b64": base64.b64encode(aad).decode("utf-8")}
+        return self._post(peer_id, "wrap", body)["wrapped"]
+
+    def unwrap_share(self, peer_id: str, wrapped_b64: str, aad: bytes) -> bytes:
+        body = {"wrapped": wrapped_b64, "aad_b64": base64.b64encode(aad).decode("utf-8")}
+        return base64.b64decode(self._post(peer_id, "unwrap", body)["share_b64"])
+
+    def rewrap_share(self, peer_id: str, wrapped_b64: str, aad: bytes) -> str:
+        body = {"wrapped": wrapped_b64, "aad_b64": base64.b64encode(aad).decode("utf-8")}
+        return self._post(peer_id, "rewrap", body)["wrapped"]
+
+    def active_version(self, peer_id: str) -> int:
+        url = self.peer_urls.get(peer_id)
+        if url is None:
+            raise ValueError(f"unknown peer: {peer_id}")
+        try:
+            r = self.client.get(f"{url}/v1/key")
+        except httpx.TransportError as e:
+            raise PeerUnavailableError(f"{peer_id} unreachable: {e}") from e
+        if r.status_code >= 400:
+            raise ValueError(f"{peer_id} rejected key: {r.text}")
+        return int(r.json()["key_version"])
+
+    def rotate(self, peer_id: str) -> int:
+        return int(self._post(peer_id, "rotate", {})["key_version"])
+
+    def retire(self, peer_id: str, version: int) -> None:
+        self._post(peer_id, "retire", {"key_version": version})
+
+    def wrap_many(self, shares: list[tuple[str, bytes]], aad: bytes) -> dict[str, str]:
+        # Every peer must hold its share, so any failure fails the seal.
+        futures = {peer_id: self._pool.submit(self.wrap_share, peer_id, share, aad) for peer_id, share in shares}
+        return {peer_id: fut.result() for peer_id, fut in futures.items()}
+
+    def unwrap_first_k(
+        self, wrapped: list[tuple[str, str]], aad: bytes, k: int, health: PeerHealth | None = None
+    ) -> list[tuple[str, bytes]]:
+        return unwrap_first_k(self._pool, self.unwrap_share, wrapped, aad, k, health)
+
+
+class AsyncRemotePeerStore:
+    # Async twin of RemotePeerStore for AsyncTrustedAuthorityCore.
+    def __init__(
+        self,
+        peer_urls: dict[str, str],
+        *,
+        timeout_s: float = 2.0,
+        token: str | None = None,
+        max_connections: int = 100,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.peer_urls = dict(peer_urls)
+        self.peer_ids = list(self.peer_urls)
+        self.client = httpx.AsyncClient(
+            timeout=timeout_s,
+            headers={"X-Peer-Token": token} if token else None,
+            limits=httpx.Limits(max_connections=max_connections),
+            transport=transport,
+        )
+
+    @classmethod
+    def from_store(cls, store: RemotePeerStore) -> "AsyncRemotePeerStore":
+        return cls(store.peer_urls, timeout_s=store.timeout_s, token=store.token)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def _post(self, peer_id: str, op: str, body: dict[str, str]) -> dict:
+        url = self.peer_urls.get(peer_id)
+        if url is None:
+            raise ValueError(f"unknown peer: {peer_id}")
+        start = time.perf_counter()
+        try:
+            r = await self.client.post(f"{url}/v1/{op}", json=body)
+        except httpx.TransportError as e:
+            _REQUEST_SECONDS.observe(time.perf_counter() - start, peer=peer_id, op=op, outcome="transport_error")
+            raise PeerUnavailableError(f"{peer_id} unreachable: {e}") from e
+        outcome = "ok" if r.status_code < 400 else ("server_error" if r.status_code >= 500 else "rejected")
+        _REQUEST_SECONDS.observe(time.perf_counter() - start, peer=peer_id, op=op, outcome=outcome)
+        if r.status_code >= 500:
+            raise PeerUnavailableError(f"{peer_id} failed: {r.status_code} {r.text}")
+        if r.status_code >= 400:
+            raise ValueError(f"{peer_id} rejected {op}: {r.text}")
+        return r.json()
+
+    async def wrap_share(self, peer_id: str, share: bytes, aad: bytes) -> str:
+        body = {"share_b64": base64.b64encode(share).decode("utf-8"), "aad_b64": base64.b64encode(aad).decode("utf-8")}
+        return (await self._post(peer_id, "wrap", body))["wrapped"]
+
+    async def unwrap_share(self, peer_id: str, wrapped_b64: str, aad: bytes) -> bytes:
+        body = {"wrapped": wrapped_b64, "aad_b64": base64.b64encode(aad).decode("utf-8")}
+        return base64.b64decode((await self._post(peer_id, "unwrap", body))["share_b64"])
+
+    async def unwrap_first_k(
+        self, wrapped: list[tuple[str, str]], aad: bytes, k: int, health: PeerHealth | None = None
+    ) -> list[tuple[str, bytes]]:
+        return await unwrap_first_k_async(self.unwrap_share, wrapped, aad, k, health)
@@ -0,0 +1,39 @@
+import random
+import threading
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int = 5
+    base_delay_s: float = 0.01
+    max_delay_s: float = 0.5
+
+    def backoff_s(self, attempt: int) -> float:
+        # Exponential backoff with full jitter.
+        return random.uniform(0.0, min(self.max_delay_s, self.base_delay_s * (2 ** attempt)))
+
+
+class RetryBudget:
+    # Token bucket: every request deposits `ratio` tokens, every retry spends one.
+    # Caps retries to roughly `ratio` of traffic so retries cannot amplify an outage.
+    def __init__(self, ratio: float = 0.2, min_tokens: float = 3.0, max_tokens: float = 100.0):
+        self.ratio = float(ratio)
+        self.max_tokens = float(max_tokens)
+        self._tokens = float(min_tokens)
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+    @property
+    def tokens(self) -> float:
+        return self._tokens
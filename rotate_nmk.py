@@ -0,0 +1,258 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from fabric_adapter.mock_fabric import MockFabricAdapter
+from fabric_adapter.models import FabricRecord
+from fabric_adapter.rest_fabric import FabricRestAdapter
+from peer_nodes.peer_nmk import PeerNMKStore, wrapped_key_version
+from peer_nodes.remote_peer import RemotePeerStore
+
+
+class RotationCheckpoint:
+    # Patients whose latest record already holds a share under key_version. Only valid for
+    # the same peer and target version; a new rotation starts from scratch.
+    def __init__(self, path: Path):
+        self.path = path
+        self.peer_id: str | None = None
+        self.key_version: int | None = None
+        self.complete = False
+        self.done: set[str] = set()
+        if path.exists():
+            data = json.loads(path.read_text(encoding="utf-8") or "{}")
+            self.peer_id = data.get("peer_id")
+            self.key_version = data.get("key_version")
+            self.complete = bool(data.get("complete"))
+            self.done = set(data.get("done", []))
+
+    def resumable(self, peer_id: str) -> bool:
+        return self.peer_id == peer_id and self.key_version is not None and not self.complete
+
+    def start(self, peer_id: str, key_version: int) -> None:
+        self.peer_id = peer_id
+        self.key_version = key_version
+        self.complete = False
+        self.done = set()
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        body = {
+            "peer_id": self.peer_id,
+            "key_version": self.key_version,
+            "complete": self.complete,
+            "done": sorted(self.done),
+            "updated_at": time.time(),
+        }
+        tmp.write_text(json.dumps(body), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def _latest_many(fabric: Any, patient_ids: list[str]) -> dict[str, FabricRecord]:
+    if hasattr(fabric, "getLatestRecords"):
+        return fabric.getLatestRecords(patient_ids)
+    out: dict[str, FabricRecord] = {}
+    for pid in patient_ids:
+        try:
+            out[pid] = fabric.getLatestRecord(pid)
+        except Exception:
+            continue
+    return out
+
+
+def _commit(fabric: Any, peer_id: str, updates: list[tuple[str, int, str, str]]) -> list[str]:
+    # Returns the patients not updated because their latest record changed meanwhile. The swap
+    # must be done by the ledger: writing back a record read here would drop audit entries
+    # appended in between, which a same-version check cannot see.
+    if not hasattr(fabric, "rewrapShares"):
+        raise ValueError("this ledger adapter cannot swap shares in place (no rewrapShares)")
+    return fabric.rewrapShares(peer_id, updates)
+
+
+def rewrap_batch(
+    fabric: Any, nmk: Any, pool: ThreadPoolExecutor, peer_id: str, key_version: int, patient_ids: list[str]
+) -> dict[str, Any]:
+    records = _latest_many(fabric, patient_ids)
+    done = [pid for pid in patient_ids if pid not in records]  # deleted or never existed: nothing to rotate
+    stale: list[FabricRecord] = []
+    for pid, rec in records.items():
+        wrapped = rec.shares_wrapped.get(peer_id)
+        if wrapped is None or wrapped_key_version(wrapped) == key_version:
+            done.append(pid)
+        else:
+            stale.append(rec)
+
+    def _one(rec: FabricRecord) -> tuple[FabricRecord, str | None, str | None]:
+        aad = f"{rec.patient_id}:{rec.version}".encode("utf-8")
+        try:
+            return rec, nmk.rewrap_share(peer_id, rec.shares_wrapped[peer_id], aad=aad), None
+        except Exception as e:
+            return rec, None, f"{type(e).__name__}: {e}"
+
+    updates: list[tuple[str, int, str, str]] = []
+    failed: dict[str, str] = {}
+    for rec, new_wrapped, err in pool.map(_one, stale):
+        if err is not None:
+            failed[rec.patient_id] = err
+        else:
+            updates.append((rec.patient_id, rec.version, rec.shares_wrapped[peer_id], new_wrapped))
+    skipped = set(_commit(fabric, peer_id, updates)) if updates else set()
+    done.extend(pid for pid, *_ in updates if pid not in skipped)
+    return {"done": done, "rewrapped": len(updates) - len(skipped), "skipped": sorted(skipped), "failed": failed}
+
+
+def run(
+    fabric: Any,
+    nmk: Any,
+    peer_id: str,
+    patient_ids: list[str],
+    *,
+    checkpoint: RotationCheckpoint,
+    rotate: bool = True,
+    workers: int = 8,
+    batch_size: int = 500,
+    retire: bool = False,
+    retire_grace_s: float = 0.0,
+) -> dict[str, Any]:
+    if checkpoint.resumable(peer_id):
+        key_version = int(checkpoint.key_version)
+        active = nmk.active_version(peer_id)
+        if active != key_version:
+            raise ValueError(f"checkpoint targets key version {key_version} but {peer_id} is on {active}")
+        print(f"[rotate] resuming {peer_id} -> key v{key_version} ({len(checkpoint.done)} patients already done)")
+    else:
+        previous = nmk.active_version(peer_id)
+        key_version = nmk.rotate(peer_id) if rotate else previous
+        checkpoint.start(peer_id, key_version)
+        checkpoint.save()
+        print(f"[rotate] {peer_id}: key v{previous} -> v{key_version}; new wraps use v{key_version}, v{previous} still unwraps")
+
+    todo = [pid for pid in patient_ids if pid not in checkpoint.done]
+    t0 = time.perf_counter()
+    rewrapped = 0
+    retry: list[str] = []
+    failed: dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="rotate") as pool:
+        for i in range(0, len(todo), batch_size):
+            res = rewrap_batch(fabric, nmk, pool, peer_id, key_version, todo[i : i + batch_size])
+            checkpoint.done.update(res["done"])
+            checkpoint.save()
+            rewrapped += res["rewrapped"]
+            retry.extend(res["skipped"])
+            failed.update(res["failed"])
+            n = min(i + batch_size, len(todo))
+            rate = n / max(time.perf_counter() - t0, 1e-9)
+            print(f"[rotate] {n}/{len(todo)} patients rewrapped={rewrapped} skipped={len(retry)} failed={len(failed)} {rate:.0f} patients/s")
+        # Records rewritten concurrently (usually a new version, already under the new key)
+        # get one more look before the job reports what is left.
+        if retry:
+            res = rewrap_batch(fabric, nmk, pool, peer_id, key_version, retry)
+            checkpoint.done.update(res["done"])
+            rewrapped += res["rewrapped"]
+            failed.update(res["failed"])
+    remaining = [pid for pid in patient_ids if pid not in checkpoint.done]
+    checkpoint.complete = not remaining
+    checkpoint.save()
+
+    retired: list[int] = []
+    if retire:
+        if remaining:
+            print(f"[rotate] not retiring: {len(remaining)} patients still hold an old-key share")
+        else:
+            # A running TA may still hold a cached record with an old-key share until it
+            # revalidates (TA_LEDGER_CACHE_TTL_S); retiring before then would fail its reads.
+            if retire_grace_s > 0:
+                print(f"[rotate] waiting {retire_grace_s:.1f}s for TA ledger caches to revalidate before retiring")
+                time.sleep(retire_grace_s)
+            for v in range(1, key_version):
+                try:
+                    nmk.retire(peer_id, v)
+                    retired.append(v)
+                except ValueError:
+                    continue  # never existed or already retired
+    elapsed = time.perf_counter() - t0
+    summary = {
+        "peer_id": peer_id,
+        "key_version": key_version,
+        "patients": len(patient_ids),
+        "rewrapped": rewrapped,
+        "remaining": len(remaining),
+        "failed": dict(list(failed.items())[:50]),
+        "retired_versions": retired,
+        "elapsed_s": elapsed,
+    }
+    print(
+        f"[rotate] done {peer_id} v{key_version}: rewrapped={rewrapped} remaining={len(remaining)} "
+        f"failed={len(failed)} retired={retired or '-'} in {elapsed:.1f}s"
+    )
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Rotate one peer's NMK: create a new key version and re-wrap that peer's share in every patient's "
+            "latest record. Blobs are not touched. Older versions in the ledger history keep their old-key shares."
+        )
+    )
+    parser.add_argument("--peer", required=True, help="Peer whose NMK is rotated (e.g. peer3)")
+    parser.add_argument("--runtime-dir", type=Path, default=Path(__file__).resolve().parent / "runtime")
+    parser.add_argument("--checkpoint", type=Path, default=None, help="Default: <runtime-dir>/nmk_rotation_<peer>.json")
+    parser.add_argument("--patient-ids", type=Path, default=None, help="File with one patient id per line (required for --live)")
+    parser.add_argument("--workers", type=int, default=8, help="Parallel unwrap/re-wrap calls")
+    parser.add_argument("--batch-size", type=int, default=500, help="Patients per ledger read and commit")
+    parser.add_argument("--no-rotate", action="store_true", help="Only re-wrap stragglers to the current key version")
+    parser.add_argument("--retire", action="store_true", help="Retire older key versions once no latest record needs them")
+    parser.add_argument(
+        "--retire-grace-s",
+        type=float,
+        default=2 * float(os.getenv("TA_LEDGER_CACHE_TTL_S") or "2.0"),
+        help="Wait before retiring so TA ledger caches drop old-key shares (default: 2 x TA_LEDGER_CACHE_TTL_S)",
+    )
+    parser.add_argument("--live", action="store_true", help="Use real Fabric via FabricRestAdapter (requires running gateway).")
+    parser.add_argument("--fabric-rest-url", default=None)
+    args = parser.parse_args()
+
+    runtime_dir = args.runtime_dir.resolve()
+    if args.live:
+        fabric: Any = FabricRestAdapter((args.fabric_rest_url or os.getenv("FABRIC_REST_URL") or "http://127.0.0.1:8800").strip())
+    else:
+        fabric = MockFabricAdapter(str(runtime_dir / "ledger" / "ledger.json"))
+
+    nmk: Any = RemotePeerStore.from_env()
+    if nmk is None:
+        nmk_dir = runtime_dir / "nmks"
+        if not (nmk_dir / f"{args.peer}.key").exists() and not (nmk_dir / f"{args.peer}.active").exists():
+            raise ValueError(f"no NMK for {args.peer} in {nmk_dir}")
+        nmk = PeerNMKStore(str(nmk_dir), peer_ids=[args.peer])
+    elif args.peer not in nmk.peer_ids:
+        raise ValueError(f"{args.peer} is not in TA_PEER_URLS")
+
+    if args.patient_ids is not None:
+        patient_ids = [line.strip() for line in args.patient_ids.read_text(encoding="utf-8").splitlines() if line.strip()]
+    elif hasattr(fabric, "listPatientIds"):
+        patient_ids = fabric.listPatientIds()
+    else:
+        raise ValueError("this ledger cannot list patients; pass --patient-ids")
+
+    checkpoint = RotationCheckpoint(args.checkpoint or (runtime_dir / f"nmk_rotation_{args.peer}.json"))
+    run(
+        fabric,
+        nmk,
+        args.peer,
+        patient_ids,
+        checkpoint=checkpoint,
+        rotate=not args.no_rotate,
+        workers=args.workers,
+        batch_size=max(1, args.batch_size),
+        retire=args.retire,
+        retire_grace_s=max(0.0, args.retire_grace_s),
+    )
+
+
+if __name__ == "__main__":
+    main()
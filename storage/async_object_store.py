@@ -0,0 +1,27 @@
+import asyncio
+from concurrent.futures import Executor
+from functools import partial
+
+from storage.object_store import LocalObjectStore
+
+
+class AsyncObjectStore:
+    def __init__(self, inner: LocalObjectStore, executor: Executor):
+        self.inner = inner
+        self.executor = executor
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+    async def put(self, patient_id: str, version: int, blob: bytes, condition: str | None = None) -> tuple[str, str]:
+        return await self._run(self.inner.put, patient_id, version, blob, condition=condition)
+
+    async def get(self, path: str) -> bytes:
+        return await self._run(self.inner.get, path)
+
+    async def hash(self, blob: bytes) -> str:
+        return await self._run(self.inner.hash, blob)
+
+    async def delete(self, path: str) -> None:
+        await self._run(self.inner.delete, path)
@@ -1,5 +1,6 @@
 import hashlib
 import os
+import secrets
 
 
 class LocalObjectStore:
@@ -11,8 +12,14 @@ class LocalObjectStore:
         condition_norm = (condition or "general").strip() or "general"
         d = os.path.join(self.base_dir, condition_norm, patient_id)
         os.makedirs(d, exist_ok=True)
+        # Never overwrite: a writer that loses a version race must not clobber the winner's blob.
         path = os.path.join(d, f"v{version}.bin")
-        with open(path, "wb") as f:
+        try:
+            f = open(path, "xb")
+        except FileExistsError:
+            path = os.path.join(d, f"v{version}.{secrets.token_hex(4)}.bin")
+            f = open(path, "xb")
+        with f:
             f.write(blob)
         h = hashlib.sha256(blob).hexdigest()
         return path, h
@@ -23,3 +30,9 @@ class LocalObjectStore:
 
     def hash(self, blob: bytes) -> str:
         return hashlib.sha256(blob).hexdigest()
+
+    def delete(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,134 @@
+import asyncio
+import contextlib
+import math
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from observability.metrics import REGISTRY
+
+CLASSES = ("HIGH", "MEDIUM", "LOW")
+
+_QUEUE_DEPTH = REGISTRY.gauge("ta_admission_queue_depth", "Requests waiting for admission", ("priority",))
+_WAIT = REGISTRY.histogram("ta_admission_wait_seconds", "Time spent queued before admission", ("priority",))
+_ADMITTED = REGISTRY.counter("ta_admission_admitted_total", "Requests admitted", ("priority",))
+_SHED = REGISTRY.counter("ta_admission_shed_total", "Requests rejected with 503", ("priority", "reason"))
+_INFLIGHT = REGISTRY.gauge("ta_admission_inflight", "Requests currently admitted")
+
+
+class OverloadedError(RuntimeError):
+    def __init__(self, priority_class: str, reason: str, retry_after_s: int):
+        super().__init__(f"overloaded: {priority_class} {reason}")
+        self.priority_class = priority_class
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+
+@dataclass(frozen=True)
+class AdmissionConfig:
+    max_concurrency: int = 64
+    queue_high: int = 512
+    queue_medium: int = 256
+    queue_low: int = 64
+    weight_high: int = 8
+    weight_medium: int = 3
+    weight_low: int = 1
+    max_wait_s: float = 15.0
+
+    @classmethod
+    def from_env(cls) -> "AdmissionConfig":
+        return cls(
+            max_concurrency=int(os.getenv("TA_ADMISSION_CONCURRENCY") or cls.max_concurrency),
+            queue_high=int(os.getenv("TA_ADMISSION_QUEUE_HIGH") or cls.queue_high),
+            queue_medium=int(os.getenv("TA_ADMISSION_QUEUE_MEDIUM") or cls.queue_medium),
+            queue_low=int(os.getenv("TA_ADMISSION_QUEUE_LOW") or cls.queue_low),
+            weight_high=int(os.getenv("TA_ADMISSION_WEIGHT_HIGH") or cls.weight_high),
+            weight_medium=int(os.getenv("TA_ADMISSION_WEIGHT_MEDIUM") or cls.weight_medium),
+            weight_low=int(os.getenv("TA_ADMISSION_WEIGHT_LOW") or cls.weight_low),
+            max_wait_s=float(os.getenv("TA_ADMISSION_MAX_WAIT_S") or cls.max_wait_s),
+        )
+
+
+class AdmissionController:
+    # At most max_concurrency requests run at once. The rest wait in one bounded FIFO per
+    # priority class; a freed slot goes to the next class chosen by smooth weighted round-robin
+    # over the non-empty queues, so HIGH is served first but LOW cannot starve. A full queue
+    # or a wait longer than max_wait_s sheds the request with a Retry-After estimate.
+    # Runs on one event loop; no locking needed.
+    def __init__(self, config: AdmissionConfig | None = None):
+        self.config = config or AdmissionConfig.from_env()
+        self._limits = {"HIGH": self.config.queue_high, "MEDIUM": self.config.queue_medium, "LOW": self.config.queue_low}
+        self._weights = {"HIGH": self.config.weight_high, "MEDIUM": self.config.weight_medium, "LOW": self.config.weight_low}
+        self._current = {c: 0 for c in CLASSES}
+        self._queues: dict[str, deque[asyncio.Future]] = {c: deque() for c in CLASSES}
+        self._inflight = 0
+        self._service_ewma_s = 0.05
+        for c in CLASSES:
+            _QUEUE_DEPTH.set_function(lambda c=c: len(self._queues[c]), priority=c)
+        _INFLIGHT.set_function(lambda: self._inflight)
+
+    def _retry_after(self) -> int:
+        queued = sum(len(q) for q in self._queues.values())
+        return max(1, math.ceil((queued + 1) * self._service_ewma_s / max(1, self.config.max_concurrency)))
+
+    def _shed(self, priority_class: str, reason: str) -> OverloadedError:
+        _SHED.inc(priority=priority_class, reason=reason)
+        return OverloadedError(priority_class, reason, self._retry_after())
+
+    async def acquire(self, priority_class: str) -> float:
+        c = priority_class if priority_class in self._queues else "MEDIUM"
+        start = time.perf_counter()
+        if self._inflight < self.config.max_concurrency and not any(self._queues.values()):
+            self._inflight += 1
+        else:
+            q = self._queues[c]
+            if len(q) >= self._limits[c]:
+                raise self._shed(c, "queue_full")
+            fut = asyncio.get_running_loop().create_future()
+            q.append(fut)
+            try:
+                await asyncio.wait_for(asyncio.shield(fut), timeout=self.config.max_wait_s)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                if fut.done() and not fut.cancelled():
+                    self._release_slot()  # granted just as we gave up; hand it on
+                else:
+                    fut.cancel()
+                    with contextlib.suppress(ValueError):
+                        q.remove(fut)
+                if isinstance(e, asyncio.TimeoutError):
+                    raise self._shed(c, "wait_timeout") from None
+                raise
+        _WAIT.observe(time.perf_counter() - start, priority=c)
+        _ADMITTED.inc(priority=c)
+        return time.perf_counter()
+
+    def release(self, admitted_at: float) -> None:
+        elapsed = time.perf_counter() - admitted_at
+        self._service_ewma_s += 0.1 * (elapsed - self._service_ewma_s)
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        # Hand the slot directly to the next waiter (inflight stays the same) or free it.
+        while True:
+            c = self._next_class()
+            if c is None:
+                self._inflight -= 1
+                return
+            fut = self._queues[c].popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+
+    def _next_class(self) -> str | None:
+        # Smooth weighted round-robin (nginx-style) over classes with waiters.
+        ready = [c for c in CLASSES if self._queues[c]]
+        if not ready:
+            return None
+        total = 0
+        for c in ready:
+            self._current[c] += self._weights[c]
+            total += self._weights[c]
+        best = max(ready, key=lambda c: self._current[c])
+        self._current[best] -= total
+        return best
@@ -1,18 +1,28 @@
 import base64
+import json
 import os
 from typing import Annotated
 
-from fastapi import Depends, FastAPI, File, HTTPException, UploadFile
+from fastapi import Depends, FastAPI, File, Form, HTTPException, Request, Response, UploadFile
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from pydantic import BaseModel
 from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
 
+from fabric_adapter.async_rest_fabric import AsyncFabricRestAdapter
+from fabric_adapter.cached_fabric import AsyncCachedFabricAdapter, CachedFabricAdapter
 from fabric_adapter.mock_fabric import MockFabricAdapter
 from fabric_adapter.rest_fabric import FabricRestAdapter
+from observability.metrics import REGISTRY
+from observability.profiling import Profiler
 from peer_nodes.peer_nmk import PeerNMKStore
+from peer_nodes.remote_peer import AsyncRemotePeerStore, RemotePeerStore
 from storage.object_store import LocalObjectStore
+from trusted_authority_service.admission import AdmissionController, OverloadedError
+from trusted_authority_service.async_core import AsyncTrustedAuthorityCore
 from trusted_authority_service.auth import authenticate, mint_token, verify_token
-from trusted_authority_service.ta_core import TrustedAuthorityCore
+from trusted_authority_service.ta_core import BatchUploadItem, TrustedAuthorityCore
 
 
 load_dotenv()
@@ -38,6 +48,29 @@ class UpdateResponse(UploadResponse):
     pass
 
 
+class RethresholdRequest(BaseModel):
+    priority: str
+
+
+class BatchReadRequest(BaseModel):
+    patient_ids: list[str]
+
+
+class BatchItemResponse(BaseModel):
+    index: int
+    patient_id: str
+    ok: bool
+    priority: str | None = None
+    threshold: int | None = None
+    version: int | None = None
+    error: str | None = None
+
+
+class BatchUploadResponse(BaseModel):
+    items: list[BatchItemResponse]
+    stages: dict[str, dict[str, float]]
+
+
 security = HTTPBearer()
 
 
@@ -59,11 +92,14 @@ def require_role(role: str):
 
 def build_core() -> TrustedAuthorityCore:
     base = os.path.dirname(os.path.dirname(__file__))
-    data_dir = os.path.join(base, "runtime")
+    data_dir = os.getenv("TA_RUNTIME_DIR") or os.path.join(base, "runtime")
     os.makedirs(data_dir, exist_ok=True)
 
+    remote_peers = RemotePeerStore.from_env()
     peer_ids_env = os.getenv("TA_PEER_IDS")
-    if peer_ids_env:
+    if remote_peers is not None:
+        peer_ids = remote_peers.peer_ids
+    elif peer_ids_env:
         peer_ids = [p.strip() for p in peer_ids_env.split(",") if p.strip()]
     else:
         num_peers = int(os.getenv("TA_NUM_PEERS") or "5")
@@ -77,13 +113,92 @@ def build_core() -> TrustedAuthorityCore:
         fabric = FabricRestAdapter(fabric_rest_url)
     else:
         fabric = MockFabricAdapter(os.path.join(data_dir, "ledger", "ledger.json"))
+    if (os.getenv("TA_LEDGER_CACHE") or "true").strip().lower() not in {"0", "false", "no", "off"}:
+        fabric = CachedFabricAdapter.from_env(fabric)
     store = LocalObjectStore(os.path.join(data_dir, "object_store"))
-    nmk = PeerNMKStore(os.path.join(data_dir, "nmks"), peer_ids=peer_ids)
-
-    return TrustedAuthorityCore(fabric=fabric, store=store, nmk_store=nmk, peer_ids=peer_ids)
+    # With TA_PEER_URLS each peer's NMK lives in its own peer_service process.
+    nmk = remote_peers or PeerNMKStore(os.path.join(data_dir, "nmks"), peer_ids=peer_ids)
+
+    return TrustedAuthorityCore(
+        fabric=fabric,
+        store=store,
+        nmk_store=nmk,
+        peer_ids=peer_ids,
+        lock_stripes=int(os.getenv("TA_LOCK_STRIPES") or "64"),
+    )
+
+
+def build_async_core(core: TrustedAuthorityCore) -> AsyncTrustedAuthorityCore:
+    fabric = None
+    ledger = core.fabric.inner if isinstance(core.fabric, CachedFabricAdapter) else core.fabric
+    if isinstance(ledger, FabricRestAdapter):
+        fabric = AsyncFabricRestAdapter.from_env(ledger.base_url)
+        if ledger is not core.fabric:
+            # Share the cache so sync batch writes and async requests see each other's versions.
+            fabric = AsyncCachedFabricAdapter(fabric, core.fabric.cache)
+    nmk_store = AsyncRemotePeerStore.from_store(core.nmk_store) if isinstance(core.nmk_store, RemotePeerStore) else None
+    return AsyncTrustedAuthorityCore(
+        core,
+        fabric=fabric,
+        nmk_store=nmk_store,
+        io_workers=int(os.getenv("TA_IO_WORKERS") or "32"),
+        cpu_workers=int(os.getenv("TA_CPU_WORKERS") or "0") or None,
+    )
 
 
 core = build_core()
+acore = build_async_core(core)
+profiler = Profiler()
+admission = (
+    AdmissionController()
+    if (os.getenv("TA_ADMISSION") or "true").strip().lower() not in {"0", "false", "no", "off"}
+    else None
+)
+
+
+async def _acquire(priority_class: str) -> float | None:
+    if admission is None:
+        return None
+    try:
+        return await admission.acquire(priority_class)
+    except OverloadedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after_s)})
+
+
+def admit(priority_class: str):
+    async def _dep():
+        admitted_at = await _acquire(priority_class)
+        try:
+            yield
+        finally:
+            if admitted_at is not None:
+                admission.release(admitted_at)
+
+    return _dep
+
+
+def profile_request(request: Request, response: Response) -> str | None:
+    # Selected by X-TA-Profile carrying TA_PROFILE_TOKEN (ignored when unset), TA_PROFILE_SAMPLE_RATE or
+    # TA_PROFILE=1. A profiled request runs on the sync core in one worker thread so the profiler
+    # sees every stage; results go to runtime/profiles/<server-generated id>.{prof|folded,json}.
+    if not profiler.requested(request.headers.get("x-ta-profile")):
+        return None
+    request_id = Profiler.new_request_id()
+    response.headers["X-TA-Profile-Id"] = request_id
+    return request_id
+
+
+async def admit_record(patient_id: str):
+    # Requests on one record are scheduled by that record's priority when the ledger cache
+    # knows it; unknown records are treated as MEDIUM.
+    peek = getattr(core.fabric, "peek", None)
+    rec = peek(patient_id) if peek is not None else None
+    admitted_at = await _acquire(rec.priority if rec is not None else "MEDIUM")
+    try:
+        yield
+    finally:
+        if admitted_at is not None:
+            admission.release(admitted_at)
 
 app = FastAPI(title="Trusted Health Data Authority")
 
@@ -99,24 +214,78 @@ def login(req: LoginRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/metrics")
+def metrics(format: str = "prometheus"):
+    if format == "json":
+        return REGISTRY.snapshot()
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/records/upload", response_model=UploadResponse)
 async def upload_record(
     patient_id: str,
     file: UploadFile = File(...),
     user=Depends(require_role("HOSPITAL")),
+    _=Depends(admit("MEDIUM")),
+    profile_id=Depends(profile_request),
 ):
     try:
         b = await file.read()
-        res = core.upload_new_record(patient_id=patient_id, file_bytes=b, filename=file.filename, requester=user.username)
+        if profile_id is not None:
+            res = await run_in_threadpool(
+                profiler.call, profile_id, "upload", core.upload_new_record, patient_id, b, file.filename, user.username
+            )
+        else:
+            res = await acore.upload_new_record(patient_id=patient_id, file_bytes=b, filename=file.filename, requester=user.username)
         return UploadResponse(**res.__dict__)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.post("/records/upload_batch", response_model=BatchUploadResponse)
+async def upload_batch(
+    patient_ids: list[str] = Form(...),
+    files: list[UploadFile] = File(...),
+    user=Depends(require_role("HOSPITAL")),
+    _=Depends(admit("LOW")),
+):
+    if len(patient_ids) != len(files):
+        raise HTTPException(status_code=400, detail="patient_ids and files must have the same length")
+    try:
+        items = [BatchUploadItem(patient_id=pid, file_bytes=await f.read(), filename=f.filename) for pid, f in zip(patient_ids, files)]
+        max_workers = int(os.getenv("TA_BATCH_WORKERS") or "8")
+        res = await run_in_threadpool(core.upload_many, items, user.username, max_workers=max_workers)
+        return BatchUploadResponse(items=[BatchItemResponse(**r.__dict__) for r in res.items], stages=res.stages)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/records/batch_read")
+def batch_read(req: BatchReadRequest, user=Depends(require_role("DOCTOR")), _=Depends(admit("MEDIUM"))):
+    # NDJSON stream: one JSON object per record, in completion order.
+    max_batch = int(os.getenv("TA_BATCH_READ_MAX") or "200")
+    if len(req.patient_ids) > max_batch:
+        raise HTTPException(status_code=400, detail=f"at most {max_batch} records per batch")
+    max_workers = int(os.getenv("TA_BATCH_WORKERS") or "8")
+
+    def _lines():
+        for item in core.reconstruct_many(req.patient_ids, requester=user.username, max_workers=max_workers):
+            yield json.dumps(item) + "\n"
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
+
 @app.get("/records/{patient_id}")
-def view_record(patient_id: str, user=Depends(require_role("DOCTOR"))):
+async def view_record(
+    patient_id: str,
+    user=Depends(require_role("DOCTOR")),
+    _=Depends(admit_record),
+    profile_id=Depends(profile_request),
+):
     try:
-        return core.reconstruct_latest(patient_id=patient_id, requester=user.username)
+        if profile_id is not None:
+            return await run_in_threadpool(profiler.call, profile_id, "read", core.reconstruct_latest, patient_id, user.username)
+        return await acore.reconstruct_latest(patient_id=patient_id, requester=user.username)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -126,18 +295,55 @@ async def update_record(
     patient_id: str,
     file: UploadFile = File(...),
     user=Depends(require_role("DOCTOR")),
+    _=Depends(admit_record),
+    profile_id=Depends(profile_request),
 ):
     try:
         b = await file.read()
-        res = core.update_record(patient_id=patient_id, new_file_bytes=b, filename=file.filename, requester=user.username)
+        if profile_id is not None:
+            res = await run_in_threadpool(
+                profiler.call, profile_id, "update", core.update_record, patient_id, b, file.filename, user.username
+            )
+        else:
+            res = await acore.update_record(patient_id=patient_id, new_file_bytes=b, filename=file.filename, requester=user.username)
+        return UpdateResponse(**res.__dict__)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/records/{patient_id}/rethreshold", response_model=UpdateResponse)
+async def rethreshold_record(
+    patient_id: str,
+    req: RethresholdRequest,
+    user=Depends(require_role("DOCTOR")),
+    _=Depends(admit_record),
+    profile_id=Depends(profile_request),
+):
+    # Priority escalation without a new upload: same ciphertext, new shares for the new threshold.
+    try:
+        if profile_id is not None:
+            res = await run_in_threadpool(
+                profiler.call, profile_id, "rethreshold", core.rethreshold, patient_id, req.priority, user.username
+            )
+        else:
+            res = await acore.rethreshold(patient_id=patient_id, priority=req.priority, requester=user.username)
         return UpdateResponse(**res.__dict__)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.get("/records/{patient_id}/history")
-def history(patient_id: str, user=Depends(get_user)):
+async def history(
+    patient_id: str,
+    user=Depends(get_user),
+    _=Depends(admit("MEDIUM")),
+    profile_id=Depends(profile_request),
+):
     try:
-        return {"patient_id": patient_id, "history": core.get_history(patient_id)}
+        if profile_id is not None:
+            hist = await run_in_threadpool(profiler.call, profile_id, "history", core.get_history, patient_id)
+        else:
+            hist = await acore.get_history(patient_id)
+        return {"patient_id": patient_id, "history": hist}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,270 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from functools import partial
+from typing import Any
+
+from crypto.shamir import reconstruct_secret
+from fabric_adapter.async_adapter import AsyncFabricAdapter
+from fabric_adapter.models import FabricRecord, VersionConflictError
+from observability import spans
+from peer_nodes.async_peer import AsyncPeerStore
+from peer_nodes.peer_health import unwrap_first_k_async
+from storage.async_object_store import AsyncObjectStore
+from trusted_authority_service.patient_locks import AsyncPatientLocks
+from trusted_authority_service.policy import priority_to_threshold
+from trusted_authority_service.singleflight import AsyncSingleFlight
+from trusted_authority_service.ta_core import TrustedAuthorityCore, UploadResult
+
+
+class AsyncTrustedAuthorityCore:
+    # Async variant of TrustedAuthorityCore. Ledger, object store and peer calls go through
+    # async interfaces (blocking adapters are wrapped onto a bounded I/O pool) and CPU-heavy
+    # steps (AES, Shamir, triage) run on bounded executors, so the event loop never blocks.
+    # The pure build/seal/open steps, policy helpers, triage guard, write-retry settings and the
+    # per-patient write locks are shared with the wrapped core, so sync and async writes of one
+    # patient in this process are serialized against each other.
+    def __init__(
+        self,
+        core: TrustedAuthorityCore,
+        *,
+        fabric: Any | None = None,
+        nmk_store: Any | None = None,
+        io_workers: int = 32,
+        cpu_workers: int | None = None,
+    ):
+        self.core = core
+        self.peer_ids = core.peer_ids
+        self._io = ThreadPoolExecutor(max_workers=max(1, int(io_workers)), thread_name_prefix="ta_io")
+        self._cpu_pool = ThreadPoolExecutor(max_workers=max(1, int(cpu_workers or os.cpu_count() or 1)), thread_name_prefix="ta_cpu")
+        self.fabric = fabric if fabric is not None else AsyncFabricAdapter(core.fabric, self._io)
+        self.store = AsyncObjectStore(core.store, self._io)
+        self.nmk_store = nmk_store if nmk_store is not None else AsyncPeerStore(core.nmk_store, self._io)
+        self._patient_locks = AsyncPatientLocks(core._patient_locks)
+        self._latest_flight = AsyncSingleFlight("latest")
+        self._open_flight = AsyncSingleFlight("open")
+        core._latest_flights.append(self._latest_flight)
+
+    async def _cpu(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._cpu_pool, partial(fn, *args, **kwargs))
+
+    async def _blocking_io(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io, partial(fn, *args, **kwargs))
+
+    def close(self) -> None:
+        self._io.shutdown(wait=False)
+        self._cpu_pool.shutdown(wait=False)
+        self._patient_locks.close()
+
+    async def _build_record(
+        self,
+        patient_id: str,
+        file_bytes: bytes,
+        *,
+        version: int,
+        priority: str,
+        audit_logs: list[dict[str, Any]],
+        event: str,
+        requester: str | None,
+    ) -> FabricRecord:
+        threshold = priority_to_threshold(priority)
+
+        with spans.span("encrypt"):
+            pdk, blob = await self._cpu(self.core._seal_blob, patient_id, version, file_bytes)
+
+        base_patient_id, condition = self.core._parse_patient_and_condition(patient_id)
+        with spans.span("store_put"):
+            path, h = await self.store.put(base_patient_id, version, blob, condition=condition)
+
+        with spans.span("split"):
+            shares = await self._cpu(self.core._split_pdk, pdk, threshold)
+        with spans.span("wrap"):
+            shares_wrapped = await self._wrap_shares(shares, self.core._share_aad(patient_id, version))
+
+        return self.core._sealed_record(
+            patient_id,
+            version=version,
+            priority=priority,
+            threshold=threshold,
+            audit_logs=audit_logs,
+            event=event,
+            requester=requester,
+            path=path,
+            file_hash=h,
+            shares_wrapped=shares_wrapped,
+        )
+
+    async def _wrap_shares(self, shares: list[bytes], aad: bytes) -> dict[str, str]:
+        wrapped = await asyncio.gather(
+            *(self.nmk_store.wrap_share(peer_id, share, aad=aad) for peer_id, share in zip(self.peer_ids, shares, strict=True))
+        )
+        return dict(zip(self.peer_ids, wrapped))
+
+    async def _write_next_version(
+        self,
+        patient_id: str,
+        file_bytes: bytes,
+        llm_priority: str,
+        requester: str | None,
+        *,
+        must_exist: bool,
+    ) -> UploadResult:
+        retry = self.core.write_retry
+        attempt = 0
+        while True:
+            async with self._patient_locks.hold(patient_id):
+                try:
+                    with spans.span("ledger_get"):
+                        latest = await self.fabric.getLatestRecord(patient_id)
+                except Exception:
+                    if must_exist:
+                        raise
+                    latest = None
+                rec = await self._build_record(
+                    patient_id, file_bytes, requester=requester, **self.core._next_version(latest, llm_priority)
+                )
+                spans.set_priority(rec.priority)
+                try:
+                    with spans.span("ledger_write"):
+                        if rec.version == 1:
+                            await self.fabric.createRecord(rec)
+                        else:
+                            await self.fabric.updateRecord(rec, expected_version=latest.version)
+                    self.core._forget_latest(patient_id)
+                    return UploadResult(patient_id=patient_id, priority=rec.priority, threshold=rec.threshold, version=rec.version)
+                except VersionConflictError:
+                    await self.store.delete(rec.encrypted_file_path)
+                    attempt += 1
+                    if attempt >= retry.max_attempts:
+                        raise
+            with spans.span("conflict_backoff"):
+                await asyncio.sleep(retry.backoff_s(attempt))
+
+    async def upload_new_record(
+        self,
+        patient_id: str,
+        file_bytes: bytes,
+        filename: str,
+        requester: str | None = None,
+    ) -> UploadResult:
+        with spans.operation("upload"):
+            with spans.span("triage"):
+                llm_priority = await self._blocking_io(self.core._run_llm, file_bytes, filename)
+            return await self._write_next_version(patient_id, file_bytes, llm_priority, requester, must_exist=False)
+
+    async def update_record(self, patient_id: str, new_file_bytes: bytes, filename: str, requester: str) -> UploadResult:
+        with spans.operation("update"):
+            with spans.span("ledger_get"):
+                await self.fabric.getLatestRecord(patient_id)  # fail fast on unknown patients before calling the LLM
+            with spans.span("triage"):
+                llm_priority = await self._blocking_io(self.core._run_llm, new_file_bytes, filename)
+            return await self._write_next_version(patient_id, new_file_bytes, llm_priority, requester, must_exist=True)
+
+    async def rethreshold(self, patient_id: str, priority: str, requester: str | None = None) -> UploadResult:
+        priority = (priority or "").strip().upper()
+        retry = self.core.write_retry
+        with spans.operation("rethreshold", priority):
+            attempt = 0
+            while True:
+                async with self._patient_locks.hold(patient_id):
+                    with spans.span("ledger_get"):
+                        latest = await self.fabric.getLatestRecord(patient_id)
+                    if not self.core._needs_rethreshold(latest, priority):
+                        return UploadResult(patient_id=patient_id, priority=latest.priority, threshold=latest.threshold, version=latest.version)
+                    pdk, _ = await self._recover_pdk(latest, None)
+                    with spans.span("split"):
+                        shares = await self._cpu(self.core._split_pdk, pdk, priority_to_threshold(priority))
+                    with spans.span("wrap"):
+                        shares_wrapped = await self._wrap_shares(shares, self.core._share_aad(patient_id, latest.version + 1))
+                    rec = self.core._rethreshold_record(latest, priority, shares_wrapped, requester)
+                    try:
+                        with spans.span("ledger_write"):
+                            await self.fabric.updateRecord(rec, expected_version=latest.version)
+                        self.core._forget_latest(patient_id)
+                        return UploadResult(patient_id=patient_id, priority=rec.priority, threshold=rec.threshold, version=rec.version)
+                    except VersionConflictError:
+                        attempt += 1
+                        if attempt >= retry.max_attempts:
+                            raise
+                with spans.span("conflict_backoff"):
+                    await asyncio.sleep(retry.backoff_s(attempt))
+
+    async def reconstruct_latest(self, patient_id: str, requester: str) -> dict[str, Any]:
+        return await self.reconstruct_latest_with_peer_availability(patient_id, requester=requester, available_peer_ids=None)
+
+    async def reconstruct_latest_with_peer_availability(
+        self,
+        patient_id: str,
+        requester: str,
+        available_peer_ids: list[str] | None,
+    ) -> dict[str, Any]:
+        with spans.operation("read"):
+            rec = await self._latest_flight.do(patient_id, lambda: self._timed_get_latest(patient_id))
+            rec = replace(rec, audit_logs=list(rec.audit_logs))
+            spans.set_priority(rec.priority)
+            key = (
+                rec.patient_id,
+                rec.version,
+                rec.encrypted_file_hash,
+                frozenset(available_peer_ids) if available_peer_ids is not None else None,
+            )
+            plaintext, used_peers = await self._open_flight.do(key, lambda: self._open_record(rec, available_peer_ids))
+            used_peers = list(used_peers)
+            audit_entry = self.core._read_audit_entry(rec, requester)
+            with spans.span("audit_write"):
+                await self.fabric.appendAuditLogs([(rec.patient_id, audit_entry)])
+            return self.core._read_response(rec, plaintext, used_peers, audit_entry)
+
+    async def _timed_get_latest(self, patient_id: str) -> FabricRecord:
+        with spans.span("ledger_get"):
+            return await self.fabric.getLatestRecord(patient_id)
+
+    async def _open_record(self, rec: FabricRecord, available_peer_ids: list[str] | None) -> tuple[bytes, list[str]]:
+        pdk, used_peers = await self._recover_pdk(rec, available_peer_ids)
+
+        with spans.span("store_get"):
+            blob = await self.store.get(rec.encrypted_file_path)
+        with spans.span("verify"):
+            if await self.store.hash(blob) != rec.encrypted_file_hash:
+                raise ValueError("encrypted file hash mismatch")
+
+        with spans.span("decrypt"):
+            plaintext = await self._cpu(self.core._decrypt_blob, rec, pdk, blob)
+        return plaintext, used_peers
+
+    async def _recover_pdk(self, rec: FabricRecord, available_peer_ids: list[str] | None) -> tuple[bytes, list[str]]:
+        aad = self.core._share_aad(rec.patient_id, rec.version)
+        health = self.core.peer_health
+        candidates = self.core._unwrap_candidates(rec, available_peer_ids)
+        if len(candidates) < rec.threshold:
+            raise ValueError(
+                f"insufficient shares: need {rec.threshold}, got {len(candidates)} (available={len(available_peer_ids) if available_peer_ids is not None else 'all'})"
+            )
+        with spans.span("unwrap"):
+            if hasattr(self.nmk_store, "unwrap_first_k"):
+                got = await self.nmk_store.unwrap_first_k(candidates, aad=aad, k=rec.threshold, health=health)
+            else:
+                got = await unwrap_first_k_async(self.nmk_store.unwrap_share, candidates, aad, rec.threshold, health)
+            used_peers = [p for p, _ in got]
+            shares = [share for _, share in got]
+
+        with spans.span("reconstruct"):
+            pdk = await self._cpu(reconstruct_secret, list(shares))
+        return pdk, used_peers
+
+    async def get_history(self, patient_id: str) -> list[dict[str, Any]]:
+        with spans.operation("history"), spans.span("ledger_history"):
+            hist = await self.fabric.getHistory(patient_id)
+        return [
+            {
+                "patient_id": r.patient_id,
+                "priority": r.priority,
+                "threshold": r.threshold,
+                "version": r.version,
+                "timestamp": r.timestamp,
+            }
+            for r in hist
+        ]
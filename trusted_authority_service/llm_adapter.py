@@ -4,6 +4,8 @@ import os
 import sys
 from dataclasses import dataclass
 from pathlib import Path
+
+import requests
 from dotenv import load_dotenv
 
 @dataclass(frozen=True)
@@ -21,7 +23,7 @@ def _map_score_to_priority(score: int) -> str:
     return "LOW"
 
 
-def _load_triage_agent_module():
+def _load_backend_module(name: str):
     repo_root = Path(__file__).resolve().parents[1]
     llm_backend_dir = repo_root / "LLM" / "backend"
 
@@ -34,7 +36,29 @@ def _load_triage_agent_module():
     if p not in sys.path:
         sys.path.insert(0, p)
 
-    return importlib.import_module("triage_agent")
+    return importlib.import_module(name)
+
+
+def _analyze_stub_http(file_path: str, filename: str) -> str:
+    base_url = (os.getenv("LLM_STUB_URL") or "http://127.0.0.1:8090").rstrip("/")
+    timeout = float(os.getenv("LLM_HTTP_TIMEOUT_S") or "120")
+    with open(file_path, "rb") as f:
+        r = requests.post(f"{base_url}/analyze", files={"file": (filename, f)}, timeout=timeout)
+    if r.status_code >= 400:
+        raise RuntimeError(f"triage service error {r.status_code}: {r.text}")
+    return r.text
+
+
+def _analyze(file_path: str, filename: str) -> str:
+    # LLM_MODE: gemini (default) | stub (in-process stand-in) | stub_http (LLM/backend/stub_server.py)
+    mode = (os.getenv("LLM_MODE") or "gemini").strip().lower()
+    if mode == "stub":
+        return _load_backend_module("stub_agent").analyze_with_stub(file_path, filename)
+    if mode == "stub_http":
+        return _analyze_stub_http(file_path, filename)
+    if mode != "gemini":
+        raise ValueError(f"invalid LLM_MODE: {mode}")
+    return _load_backend_module("triage_agent").analyze_with_gemini(file_path, filename)
 
 
 def classify_from_file(file_path: str, filename: str) -> LlmTriageResult:
@@ -45,8 +69,7 @@ def classify_from_file(file_path: str, filename: str) -> LlmTriageResult:
             p = "MEDIUM"
         return LlmTriageResult(raw="MOCK", parsed={"mock": True, "filename": filename}, priority=p)
 
-    triage_agent = _load_triage_agent_module()
-    raw = triage_agent.analyze_with_gemini(file_path, filename)
+    raw = _analyze(file_path, filename)
 
     cleaned = (raw or "").strip()
     if cleaned.startswith("```"):
@@ -0,0 +1,55 @@
+import asyncio
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+
+class PatientLocks:
+    # Serializes writers of one patient inside a TA process. Patients hash (crc32) onto a fixed
+    # number of stripes, so two patients can land on the same stripe and wait on each other for
+    # one write; with 64 stripes that stays rare at the write concurrency one process sees.
+    # Writers in other processes are caught by the ledger's compare-and-set on expected_version.
+    def __init__(self, stripes: int = 64):
+        self._locks = [threading.Lock() for _ in range(max(1, int(stripes)))]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    def stripe(self, patient_id: str) -> int:
+        return zlib.crc32(patient_id.encode("utf-8")) % len(self._locks)
+
+    def lock(self, patient_id: str) -> threading.Lock:
+        return self._locks[self.stripe(patient_id)]
+
+
+class AsyncPatientLocks:
+    # The same stripes for coroutines, so the sync and async cores exclude each other per patient.
+    # Coroutines queue on an asyncio.Lock per stripe, so at most one per stripe waits for the
+    # thread lock, on a pool used for nothing else: a waiter never holds a thread the holder needs.
+    def __init__(self, shared: PatientLocks):
+        self.shared = shared
+        self._queues = [asyncio.Lock() for _ in range(len(shared))]
+        self._waiters = ThreadPoolExecutor(max_workers=len(shared), thread_name_prefix="ta_lock")
+
+    @asynccontextmanager
+    async def hold(self, patient_id: str) -> AsyncIterator[None]:
+        stripe = self.shared.stripe(patient_id)
+        lock = self.shared.lock(patient_id)
+        async with self._queues[stripe]:
+            if not lock.acquire(blocking=False):
+                fut = self._waiters.submit(lock.acquire)
+                try:
+                    await asyncio.wrap_future(fut)
+                except asyncio.CancelledError:
+                    # An acquire already running cannot be cancelled; release it once it lands.
+                    fut.add_done_callback(lambda f: f.cancelled() or lock.release())
+                    raise
+            try:
+                yield
+            finally:
+                lock.release()
+
+    def close(self) -> None:
+        self._waiters.shutdown(wait=False)
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+from observability import spans
+from observability.metrics import REGISTRY
+
+T = TypeVar("T")
+
+_COALESCED = REGISTRY.counter(
+    "ta_read_coalesced_total",
+    "Reads that joined an in-flight identical operation instead of repeating it",
+    ("stage",),
+)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    # Concurrent do() calls with the same key share one execution of fn; callers that
+    # arrive after it finished start a new one (nothing is cached).
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            _COALESCED.inc(stage=self.stage)
+            with spans.span(f"{self.stage}_coalesced"):
+                call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def forget(self, key: Hashable) -> None:
+        # Later callers start a fresh call instead of joining the in-flight one (used after writes).
+        with self._lock:
+            self._calls.pop(key, None)
+
+
+class AsyncSingleFlight:
+    # The shared work runs as its own task, so a cancelled caller does not cancel it for the others.
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t, key=key: self._done(key, t))
+            return await asyncio.shield(task)
+        _COALESCED.inc(stage=self.stage)
+        with spans.span(f"{self.stage}_coalesced"):
+            return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every waiter was cancelled
+
+    def forget(self, key: Hashable) -> None:
+        self._calls.pop(key, None)
@@ -1,18 +1,28 @@
 import base64
 import os
+import queue
 import tempfile
+import threading
 import time
-from dataclasses import dataclass
-from typing import Any
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, replace
+from typing import Any, Iterator
 
 from crypto.aes_gcm import decrypt as aes_decrypt
 from crypto.aes_gcm import encrypt as aes_encrypt
 from crypto.shamir import reconstruct_secret, split_secret
-from fabric_adapter.models import FabricRecord
+from fabric_adapter.models import FabricRecord, VersionConflictError
+from observability import spans
+from observability.profiling import Profiler, profiled
+from peer_nodes.peer_health import PeerHealth
 from peer_nodes.peer_nmk import PeerNMKStore
+from peer_nodes.remote_peer import RemotePeerStore
+from resilience.retry import RetryPolicy
 from storage.object_store import LocalObjectStore
-from trusted_authority_service.llm_adapter import classify_from_file
+from trusted_authority_service.patient_locks import PatientLocks
 from trusted_authority_service.policy import priority_to_threshold
+from trusted_authority_service.singleflight import SingleFlight
+from trusted_authority_service.triage_guard import GuardedTriage
 
 
 @dataclass
@@ -23,18 +33,96 @@ class UploadResult:
     version: int
 
 
+@dataclass
+class BatchUploadItem:
+    patient_id: str
+    file_bytes: bytes
+    filename: str
+
+
+@dataclass
+class BatchItemResult:
+    index: int
+    patient_id: str
+    ok: bool
+    priority: str | None = None
+    threshold: int | None = None
+    version: int | None = None
+    error: str | None = None
+
+
+@dataclass
+class BatchUploadResult:
+    items: list[BatchItemResult]
+    stages: dict[str, dict[str, float]]
+    # Sealed but uncommitted records, in commit order (only when upload_many(commit=False)).
+    records: list[FabricRecord] = field(default_factory=list)
+
+
+class _StageStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: dict[str, list[float]] = {}
+
+    def add(self, stage: str, start: float, end: float, items: int = 1) -> None:
+        with self._lock:
+            s = self._stages.get(stage)
+            if s is None:
+                self._stages[stage] = [items, end - start, start, end]
+            else:
+                s[0] += items
+                s[1] += end - start
+                s[2] = min(s[2], start)
+                s[3] = max(s[3], end)
+
+    def summary(self, t0: float, t1: float, items: int) -> dict[str, dict[str, float]]:
+        out: dict[str, dict[str, float]] = {}
+        with self._lock:
+            for stage, (n, busy, first, last) in self._stages.items():
+                wall = max(last - first, 1e-9)
+                out[stage] = {"items": n, "busy_s": busy, "wall_s": wall, "items_per_s": n / wall}
+        wall = max(t1 - t0, 1e-9)
+        out["total"] = {"items": items, "busy_s": wall, "wall_s": wall, "items_per_s": items / wall}
+        return out
+
+
 class TrustedAuthorityCore:
     def __init__(
         self,
         fabric: Any,
         store: LocalObjectStore,
-        nmk_store: PeerNMKStore,
+        nmk_store: PeerNMKStore | RemotePeerStore,
         peer_ids: list[str],
+        triage: GuardedTriage | None = None,
+        write_retry: RetryPolicy | None = None,
+        lock_stripes: int = 64,
+        profiler: Profiler | None = None,
+        peer_health: PeerHealth | None = None,
     ):
         self.fabric = fabric
         self.store = store
         self.nmk_store = nmk_store
         self.peer_ids = peer_ids
+        # Reads go to the k fastest healthy peers first (see peer_nodes/peer_health.py).
+        self.peer_health = peer_health if peer_health is not None else PeerHealth(peer_ids)
+        self.triage = triage if triage is not None else GuardedTriage()
+        self.write_retry = write_retry or RetryPolicy()
+        self.profiler = profiler if profiler is not None else Profiler.from_env_if_enabled()
+        # Striped per-patient write locks, shared with AsyncTrustedAuthorityCore (see patient_locks.py).
+        self._patient_locks = PatientLocks(lock_stripes)
+        # Concurrent reads of one patient share the ledger fetch and, per (patient_id, version),
+        # the unwrap/reconstruct/decrypt; every reader still writes its own READ audit event.
+        self._latest_flight = SingleFlight("latest")
+        self._open_flight = SingleFlight("open")
+        # Flights of cores layered on this one; a write by either core ends all of them.
+        self._latest_flights: list[Any] = [self._latest_flight]
+
+    def _patient_lock(self, patient_id: str) -> threading.Lock:
+        return self._patient_locks.lock(patient_id)
+
+    def _forget_latest(self, patient_id: str) -> None:
+        for flight in self._latest_flights:
+            flight.forget(patient_id)
 
     def _parse_patient_and_condition(self, record_key: str) -> tuple[str, str | None]:
         rk = (record_key or "").strip()
@@ -59,45 +147,53 @@ class TrustedAuthorityCore:
             return 1
         return 0
 
-    def upload_new_record(self, patient_id: str, file_bytes: bytes, filename: str, requester: str | None = None) -> UploadResult:
-        try:
-            latest = self.fabric.getLatestRecord(patient_id)
-            version = latest.version + 1
-            existing_priority = latest.priority
-            existing_audit_logs = list(latest.audit_logs)
-        except Exception:
-            latest = None
-            version = 1
-            existing_priority = None
-            existing_audit_logs = []
-
-        llm_priority = self._run_llm(file_bytes, filename)
+    def _merge_priority(self, llm_priority: str, existing_priority: str | None) -> str:
+        # Triage may escalate a patient's priority but never lowers it.
         if existing_priority is not None and self._priority_rank(llm_priority) < self._priority_rank(existing_priority):
-            priority = existing_priority
-        else:
-            priority = llm_priority
+            return existing_priority
+        return llm_priority
 
-        threshold = priority_to_threshold(priority)
+    # The steps below are pure (no ledger, store or peer I/O) and shared with
+    # AsyncTrustedAuthorityCore, which runs the same sequence with awaited I/O.
 
-        aad = f"{patient_id}:{version}".encode("utf-8")
-        pdk = os.urandom(32)
+    def _share_aad(self, patient_id: str, version: int) -> bytes:
+        return f"{patient_id}:{version}".encode("utf-8")
 
-        enc = aes_encrypt(pdk, file_bytes, aad=aad)
-        blob = enc.nonce + enc.ciphertext
+    def _seal_blob(self, patient_id: str, version: int, file_bytes: bytes) -> tuple[bytes, bytes]:
+        pdk = os.urandom(32)
+        enc = aes_encrypt(pdk, file_bytes, aad=self._share_aad(patient_id, version))
+        return pdk, enc.nonce + enc.ciphertext
 
-        base_patient_id, condition = self._parse_patient_and_condition(patient_id)
-        path, h = self.store.put(base_patient_id, version, blob, condition=condition)
+    def _split_pdk(self, pdk: bytes, threshold: int) -> list[bytes]:
+        return split_secret(pdk, n=len(self.peer_ids), k=threshold)
 
-        shares = split_secret(pdk, n=len(self.peer_ids), k=threshold)
-        shares_wrapped: dict[str, str] = {}
-        for peer_id, share in zip(self.peer_ids, shares, strict=True):
-            wrapped = self.nmk_store.wrap_share(peer_id, share, aad=aad)
-            shares_wrapped[peer_id] = wrapped
+    def _next_version(self, latest: FabricRecord | None, llm_priority: str) -> dict[str, Any]:
+        version = latest.version + 1 if latest is not None else 1
+        return {
+            "version": version,
+            "priority": self._merge_priority(llm_priority, latest.priority if latest is not None else None),
+            "audit_logs": latest.audit_logs if latest is not None else [],
+            "event": "CREATE" if version == 1 else "UPDATE",
+        }
 
-        audit_logs = list(existing_audit_logs)
+    def _sealed_record(
+        self,
+        patient_id: str,
+        *,
+        version: int,
+        priority: str,
+        threshold: int,
+        audit_logs: list[dict[str, Any]],
+        event: str,
+        requester: str | None,
+        path: str,
+        file_hash: str,
+        shares_wrapped: dict[str, str],
+    ) -> FabricRecord:
+        audit_logs = list(audit_logs)
         audit_logs.append(
             {
-                "event": "CREATE" if version == 1 else "UPDATE",
+                "event": event,
                 "timestamp": time.time(),
                 "requester": requester,
                 "priority": priority,
@@ -106,141 +202,522 @@ class TrustedAuthorityCore:
             }
         )
 
-        rec = FabricRecord(
+        return FabricRecord(
             patient_id=patient_id,
             priority=priority,
             threshold=threshold,
             version=version,
             encrypted_file_path=path,
-            encrypted_file_hash=h,
+            encrypted_file_hash=file_hash,
             shares_wrapped=shares_wrapped,
             timestamp=time.time(),
             audit_logs=audit_logs,
         )
 
-        if version == 1:
-            self.fabric.createRecord(rec)
-        else:
-            self.fabric.updateRecord(rec)
-        return UploadResult(patient_id=patient_id, priority=priority, threshold=threshold, version=version)
+    def _unwrap_candidates(self, rec: FabricRecord, available_peer_ids: list[str] | None) -> list[tuple[str, str]]:
+        allowed = set(available_peer_ids) if available_peer_ids is not None else None
+        return [
+            (p, rec.shares_wrapped[p])
+            for p in self.peer_health.rank(self.peer_ids)
+            if (allowed is None or p in allowed) and rec.shares_wrapped.get(p) is not None
+        ]
 
-    def reconstruct_latest(self, patient_id: str, requester: str) -> dict[str, Any]:
-        return self.reconstruct_latest_with_peer_availability(patient_id, requester=requester, available_peer_ids=None)
+    def _decrypt_blob(self, rec: FabricRecord, pdk: bytes, blob: bytes) -> bytes:
+        return aes_decrypt(pdk, blob[:12], blob[12:], aad=self._share_aad(rec.patient_id, rec.blob_aad_version))
 
-    def reconstruct_latest_with_peer_availability(
+    def _build_record(
         self,
         patient_id: str,
-        requester: str,
-        available_peer_ids: list[str] | None,
-    ) -> dict[str, Any]:
-        rec = self.fabric.getLatestRecord(patient_id)
-        aad = f"{patient_id}:{rec.version}".encode("utf-8")
+        file_bytes: bytes,
+        *,
+        version: int,
+        priority: str,
+        audit_logs: list[dict[str, Any]],
+        event: str,
+        requester: str | None,
+        threshold: int | None = None,
+    ) -> FabricRecord:
+        threshold = threshold or priority_to_threshold(priority)
+
+        with spans.span("encrypt"):
+            pdk, blob = self._seal_blob(patient_id, version, file_bytes)
 
-        allowed = set(available_peer_ids) if available_peer_ids is not None else None
-        shares: list[bytes] = []
-        used_peers: list[str] = []
-        for peer_id in self.peer_ids:
-            if allowed is not None and peer_id not in allowed:
-                continue
-            wrapped = rec.shares_wrapped.get(peer_id)
-            if wrapped is None:
-                continue
-            shares.append(self.nmk_store.unwrap_share(peer_id, wrapped, aad=aad))
-            used_peers.append(peer_id)
-            if len(shares) >= rec.threshold:
-                break
+        base_patient_id, condition = self._parse_patient_and_condition(patient_id)
+        with spans.span("store_put"):
+            path, h = self.store.put(base_patient_id, version, blob, condition=condition)
 
-        if len(shares) < rec.threshold:
-            raise ValueError(
-                f"insufficient shares: need {rec.threshold}, got {len(shares)} (available={len(available_peer_ids) if available_peer_ids is not None else 'all'})"
-            )
+        with spans.span("split"):
+            shares = self._split_pdk(pdk, threshold)
+        with spans.span("wrap"):
+            shares_wrapped = self._wrap_shares(shares, self._share_aad(patient_id, version))
 
-        pdk = reconstruct_secret(shares)
+        return self._sealed_record(
+            patient_id,
+            version=version,
+            priority=priority,
+            threshold=threshold,
+            audit_logs=audit_logs,
+            event=event,
+            requester=requester,
+            path=path,
+            file_hash=h,
+            shares_wrapped=shares_wrapped,
+        )
 
-        blob = self.store.get(rec.encrypted_file_path)
-        if self.store.hash(blob) != rec.encrypted_file_hash:
-            raise ValueError("encrypted file hash mismatch")
+    def _wrap_shares(self, shares: list[bytes], aad: bytes) -> dict[str, str]:
+        if hasattr(self.nmk_store, "wrap_many"):
+            return self.nmk_store.wrap_many(list(zip(self.peer_ids, shares, strict=True)), aad=aad)
+        shares_wrapped: dict[str, str] = {}
+        for peer_id, share in zip(self.peer_ids, shares, strict=True):
+            shares_wrapped[peer_id] = self.nmk_store.wrap_share(peer_id, share, aad=aad)
+        return shares_wrapped
 
-        nonce = blob[:12]
-        ciphertext = blob[12:]
-        plaintext = aes_decrypt(pdk, nonce, ciphertext, aad=aad)
+    @profiled("upload")
+    def upload_new_record(self, patient_id: str, file_bytes: bytes, filename: str, requester: str | None = None) -> UploadResult:
+        with spans.operation("upload"):
+            llm_priority = self._run_llm(file_bytes, filename)
+            return self._write_next_version(patient_id, file_bytes, llm_priority, requester, must_exist=False)
 
-        audit_entry = {
-            "event": "READ",
-            "timestamp": time.time(),
-            "requester": requester,
-            "version": rec.version,
-        }
-        if hasattr(self.fabric, "appendAuditLog"):
-            self.fabric.appendAuditLog(patient_id, audit_entry)
-        else:
-            rec.audit_logs.append(audit_entry)
-            self.fabric.updateRecord(rec)
+    def _write_next_version(
+        self,
+        patient_id: str,
+        file_bytes: bytes,
+        llm_priority: str,
+        requester: str | None,
+        *,
+        must_exist: bool,
+    ) -> UploadResult:
+        attempt = 0
+        while True:
+            with self._patient_lock(patient_id):
+                try:
+                    with spans.span("ledger_get"):
+                        latest = self.fabric.getLatestRecord(patient_id)
+                except Exception:
+                    if must_exist:
+                        raise
+                    latest = None
+                rec = self._build_record(patient_id, file_bytes, requester=requester, **self._next_version(latest, llm_priority))
+                spans.set_priority(rec.priority)
+                try:
+                    with spans.span("ledger_write"):
+                        if rec.version == 1:
+                            self.fabric.createRecord(rec)
+                        else:
+                            self.fabric.updateRecord(rec, expected_version=latest.version)
+                    self._forget_latest(patient_id)
+                    return UploadResult(patient_id=patient_id, priority=rec.priority, threshold=rec.threshold, version=rec.version)
+                except VersionConflictError:
+                    self.store.delete(rec.encrypted_file_path)
+                    attempt += 1
+                    if attempt >= self.write_retry.max_attempts:
+                        raise
+            with spans.span("conflict_backoff"):
+                time.sleep(self.write_retry.backoff_s(attempt))
+
+    @profiled("batch_upload")
+    def upload_many(
+        self,
+        items: list[BatchUploadItem],
+        requester: str | None = None,
+        *,
+        max_workers: int = 8,
+        commit_group: int = 32,
+        commit: bool = True,
+    ) -> BatchUploadResult:
+        # Three-stage pipeline: triage fans out over all items, sealing (AES, store, split, wrap)
+        # runs one chain per patient so versions stay ordered, and this thread commits sealed
+        # records to the ledger in groups while the pools keep working. With commit=False the
+        # sealed records are returned instead, for the caller to pass to commit_records().
+        with spans.operation("batch_upload", "mixed"):
+            return self._upload_many(items, requester, max_workers=max_workers, commit_group=commit_group, commit=commit)
+
+    def _upload_many(
+        self,
+        items: list[BatchUploadItem],
+        requester: str | None,
+        *,
+        max_workers: int,
+        commit_group: int,
+        commit: bool,
+    ) -> BatchUploadResult:
+        t0 = time.perf_counter()
+        stats = _StageStats()
+        results: list[BatchItemResult | None] = [None] * len(items)
+        uncommitted: list[FabricRecord] | None = None if commit else []
+
+        chains: dict[str, list[int]] = {}
+        for i, it in enumerate(items):
+            chains.setdefault(it.patient_id, []).append(i)
+
+        with spans.span("ledger_get"):
+            latest = self._get_latest_many(list(chains))
+        sealed: queue.Queue = queue.Queue()
+        workers = max(1, int(max_workers))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch_triage") as triage_pool, ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="batch_seal"
+        ) as seal_pool:
+            timed_triage = spans.bind(self._timed_triage)
+            seal_chain = spans.bind(self._seal_chain)
+            triaged = [triage_pool.submit(timed_triage, stats, it) for it in items]
+            for patient_id, idxs in chains.items():
+                seal_pool.submit(
+                    seal_chain, patient_id, latest.get(patient_id), idxs, items, triaged, requester, stats, sealed
+                )
+            self._commit_sealed(sealed, len(chains), max(1, int(commit_group)), results, stats, uncommitted)
+
+        out = [
+            r if r is not None else BatchItemResult(index=i, patient_id=items[i].patient_id, ok=False, error="not processed")
+            for i, r in enumerate(results)
+        ]
+        return BatchUploadResult(
+            items=out,
+            stages=stats.summary(t0, time.perf_counter(), len(items)),
+            records=uncommitted or [],
+        )
 
-        return {
-            "patient_id": rec.patient_id,
-            "priority": rec.priority,
-            "threshold": rec.threshold,
-            "version": rec.version,
-            "file_b64": base64.b64encode(plaintext).decode("utf-8"),
-            "audit_logs": [*rec.audit_logs, audit_entry],
-            "used_peers": used_peers,
-        }
+    def _timed_triage(self, stats: _StageStats, item: BatchUploadItem) -> str:
+        start = time.perf_counter()
+        try:
+            return self._run_llm(item.file_bytes, item.filename)
+        finally:
+            stats.add("triage", start, time.perf_counter())
 
-    def reconstruct_latest_with_metrics(self, patient_id: str, requester: str) -> dict[str, Any]:
-        t0 = time.perf_counter()
-        rec = self.fabric.getLatestRecord(patient_id)
-        t_fabric = time.perf_counter()
+    def _seal_chain(
+        self,
+        patient_id: str,
+        latest: FabricRecord | None,
+        idxs: list[int],
+        items: list[BatchUploadItem],
+        triaged: list[Future],
+        requester: str | None,
+        stats: _StageStats,
+        sealed: queue.Queue,
+    ) -> None:
+        try:
+            if latest is not None:
+                version = latest.version
+                priority: str | None = latest.priority
+                audit_logs = list(latest.audit_logs)
+            else:
+                version = 0
+                priority = None
+                audit_logs = []
+
+            for n, i in enumerate(idxs):
+                try:
+                    llm_priority = triaged[i].result()
+                    start = time.perf_counter()
+                    rec = self._build_record(
+                        patient_id,
+                        items[i].file_bytes,
+                        version=version + 1,
+                        priority=self._merge_priority(llm_priority, priority),
+                        audit_logs=audit_logs,
+                        event="CREATE" if version == 0 else "UPDATE",
+                        requester=requester,
+                    )
+                    stats.add("seal", start, time.perf_counter())
+                except Exception as e:
+                    # Later items of this patient would be sealed against the wrong version.
+                    sealed.put(("error", i, (patient_id, str(e))))
+                    for j in idxs[n + 1 :]:
+                        sealed.put(("error", j, (patient_id, f"skipped: earlier item {i} for {patient_id} failed")))
+                    return
+                sealed.put(("record", i, rec))
+                version = rec.version
+                priority = rec.priority
+                audit_logs = rec.audit_logs
+        finally:
+            sealed.put(("done", patient_id, None))
 
-        aad = f"{patient_id}:{rec.version}".encode("utf-8")
+    def _commit_sealed(
+        self,
+        sealed: queue.Queue,
+        n_chains: int,
+        commit_group: int,
+        results: list[BatchItemResult | None],
+        stats: _StageStats,
+        uncommitted: list[FabricRecord] | None = None,
+    ) -> None:
+        pending: list[tuple[int, FabricRecord]] = []
+        failed_patients: dict[str, str] = {}
+        done = 0
+
+        def flush() -> None:
+            if not pending:
+                return
+            group = [(i, r) for i, r in pending if r.patient_id not in failed_patients]
+            for i, r in pending:
+                if r.patient_id in failed_patients:
+                    self.store.delete(r.encrypted_file_path)
+                    results[i] = BatchItemResult(
+                        index=i, patient_id=r.patient_id, ok=False, error=f"skipped: {failed_patients[r.patient_id]}"
+                    )
+            pending.clear()
+            if uncommitted is not None:
+                uncommitted.extend(r for _, r in group)
+                errors: list[str | None] = [None] * len(group)
+            else:
+                start = time.perf_counter()
+                errors = self.commit_records([r for _, r in group])
+                stats.add("ledger", start, time.perf_counter(), items=len(group))
+            for (i, r), err in zip(group, errors):
+                if err is not None:
+                    failed_patients.setdefault(r.patient_id, err)
+                    results[i] = BatchItemResult(index=i, patient_id=r.patient_id, ok=False, error=err)
+                else:
+                    results[i] = BatchItemResult(
+                        index=i,
+                        patient_id=r.patient_id,
+                        ok=True,
+                        priority=r.priority,
+                        threshold=r.threshold,
+                        version=r.version,
+                    )
+
+        while done < n_chains:
+            try:
+                kind, key, payload = sealed.get(timeout=0.05 if pending else None)
+            except queue.Empty:
+                flush()
+                continue
+            if kind == "done":
+                done += 1
+            elif kind == "error":
+                results[key] = BatchItemResult(index=key, patient_id=payload[0], ok=False, error=payload[1])
+            else:
+                pending.append((key, payload))
+                if len(pending) >= commit_group:
+                    flush()
+        flush()
+
+    @profiled("commit")
+    def commit_records(self, records: list[FabricRecord]) -> list[str | None]:
+        # Returns one error (or None) per record. Once a record fails, later records of the
+        # same patient are not attempted because their versions build on it.
+        if not records:
+            return []
+        with spans.operation("commit", "mixed"), spans.span("ledger_write"):
+            return self._commit_records(records)
+
+    def _commit_records(self, records: list[FabricRecord]) -> list[str | None]:
+        if hasattr(self.fabric, "commitRecords"):
+            try:
+                self.fabric.commitRecords(records)
+                for r in records:
+                    self._forget_latest(r.patient_id)
+                return [None] * len(records)
+            except VersionConflictError:
+                pass  # the group is all-or-nothing; isolate the conflicting record(s) below
+            except Exception as e:
+                # Not a conflict, so per-record writes would not fare better; the outcome is
+                # unknown, so the sealed blobs are left in place.
+                return [f"group commit failed: {e}"] * len(records)
+
+        # Records may have been sealed a while ago (upload_many(commit=False)), so every
+        # write is a compare-and-set against the version the record was built on.
+        errors: list[str | None] = []
+        failed: set[str] = set()
+        for r in records:
+            if r.patient_id in failed:
+                self.store.delete(r.encrypted_file_path)
+                errors.append(f"skipped: earlier ledger write for {r.patient_id} failed")
+                continue
+            try:
+                if r.version == 1:
+                    self.fabric.createRecord(r)
+                else:
+                    self.fabric.updateRecord(r, expected_version=r.version - 1)
+                self._forget_latest(r.patient_id)
+                errors.append(None)
+            except VersionConflictError as e:
+                self.store.delete(r.encrypted_file_path)
+                msg = str(e)
+                errors.append(msg if "version conflict" in msg else f"version conflict: {msg}")
+                failed.add(r.patient_id)
+            except Exception as e:
+                errors.append(str(e))
+                failed.add(r.patient_id)
+        return errors
 
-        shares: list[bytes] = []
-        used_peers: list[str] = []
-        t_unwrap_start = time.perf_counter()
-        for peer_id in self.peer_ids:
-            wrapped = rec.shares_wrapped.get(peer_id)
-            if wrapped is None:
+    def reconstruct_latest(self, patient_id: str, requester: str) -> dict[str, Any]:
+        return self.reconstruct_latest_with_peer_availability(patient_id, requester=requester, available_peer_ids=None)
+
+    @profiled("read")
+    def reconstruct_latest_with_peer_availability(
+        self,
+        patient_id: str,
+        requester: str,
+        available_peer_ids: list[str] | None,
+    ) -> dict[str, Any]:
+        with spans.operation("read"):
+            rec = self._get_latest_shared(patient_id)
+            spans.set_priority(rec.priority)
+            plaintext, used_peers = self._open_record_shared(rec, available_peer_ids)
+            audit_entry = self._read_audit_entry(rec, requester)
+            with spans.span("audit_write"):
+                self._append_read_audits([(rec, audit_entry)])
+            return self._read_response(rec, plaintext, used_peers, audit_entry)
+
+    def _get_latest_shared(self, patient_id: str) -> FabricRecord:
+        rec = self._latest_flight.do(patient_id, lambda: self._timed_get_latest(patient_id))
+        return replace(rec, audit_logs=list(rec.audit_logs))
+
+    def _timed_get_latest(self, patient_id: str) -> FabricRecord:
+        with spans.span("ledger_get"):
+            return self.fabric.getLatestRecord(patient_id)
+
+    def _open_record_shared(self, rec: FabricRecord, available_peer_ids: list[str] | None) -> tuple[bytes, list[str]]:
+        key = (
+            rec.patient_id,
+            rec.version,
+            rec.encrypted_file_hash,
+            frozenset(available_peer_ids) if available_peer_ids is not None else None,
+        )
+        plaintext, used_peers = self._open_flight.do(key, lambda: self._open_record(rec, available_peer_ids))
+        return plaintext, list(used_peers)
+
+    def reconstruct_many(
+        self,
+        patient_ids: list[str],
+        requester: str,
+        *,
+        max_workers: int = 8,
+    ) -> Iterator[dict[str, Any]]:
+        # Worklist read: one ledger fetch for all keys, parallel unwrap/decrypt, and READ audit
+        # events written in one batch per round of completed records. Records are yielded as
+        # they finish, and only after their audit events are on the ledger.
+        # Stages are observed directly rather than through one operation: a generator must not
+        # hold a context-local span across yields.
+        unique = list(dict.fromkeys(patient_ids))
+        start = time.perf_counter()
+        latest = self._get_latest_many(unique)
+        spans.observe("batch_read", "ledger_get", time.perf_counter() - start, priority="mixed")
+        for pid in unique:
+            if pid not in latest:
+                yield {"patient_id": pid, "ok": False, "error": "patient not found"}
+
+        with ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix="batch_read") as pool:
+            pending = {pool.submit(self._open_record_timed, rec): rec for rec in latest.values()}
+            while pending:
+                finished, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                opened: list[tuple[FabricRecord, bytes, list[str], dict[str, Any]]] = []
+                for fut in finished:
+                    rec = pending.pop(fut)
+                    try:
+                        plaintext, used_peers = fut.result()
+                    except Exception as e:
+                        yield {"patient_id": rec.patient_id, "ok": False, "error": str(e)}
+                        continue
+                    opened.append((rec, plaintext, used_peers, self._read_audit_entry(rec, requester)))
+                if not opened:
+                    continue
+                try:
+                    start = time.perf_counter()
+                    self._append_read_audits([(rec, entry) for rec, _, _, entry in opened])
+                    spans.observe("batch_read", "audit_write", time.perf_counter() - start, priority="mixed")
+                except Exception as e:
+                    for rec, _, _, _ in opened:
+                        yield {"patient_id": rec.patient_id, "ok": False, "error": f"audit write failed: {e}"}
+                    continue
+                for rec, plaintext, used_peers, entry in opened:
+                    yield {"ok": True, **self._read_response(rec, plaintext, used_peers, entry)}
+
+    def _open_record_timed(self, rec: FabricRecord) -> tuple[bytes, list[str]]:
+        with spans.operation("batch_read", rec.priority):
+            return self._open_record_shared(rec, None)
+
+    def _get_latest_many(self, patient_ids: list[str]) -> dict[str, FabricRecord]:
+        if hasattr(self.fabric, "getLatestRecords"):
+            return self.fabric.getLatestRecords(patient_ids)
+        out: dict[str, FabricRecord] = {}
+        for pid in patient_ids:
+            try:
+                out[pid] = self.fabric.getLatestRecord(pid)
+            except Exception:
                 continue
-            shares.append(self.nmk_store.unwrap_share(peer_id, wrapped, aad=aad))
-            used_peers.append(peer_id)
-            if len(shares) >= rec.threshold:
-                break
-        t_unwrap_end = time.perf_counter()
+        return out
 
-        if len(shares) < rec.threshold:
-            raise ValueError(f"insufficient shares: need {rec.threshold}, got {len(shares)}")
+    def _open_record(self, rec: FabricRecord, available_peer_ids: list[str] | None) -> tuple[bytes, list[str]]:
+        pdk, used_peers = self._recover_pdk(rec, available_peer_ids)
 
-        t_reconstruct_start = time.perf_counter()
-        pdk = reconstruct_secret(shares)
-        t_reconstruct_end = time.perf_counter()
+        with spans.span("store_get"):
+            blob = self.store.get(rec.encrypted_file_path)
+        with spans.span("verify"):
+            if self.store.hash(blob) != rec.encrypted_file_hash:
+                raise ValueError("encrypted file hash mismatch")
 
-        t_store_start = time.perf_counter()
-        blob = self.store.get(rec.encrypted_file_path)
-        t_store_end = time.perf_counter()
+        with spans.span("decrypt"):
+            plaintext = self._decrypt_blob(rec, pdk, blob)
+        return plaintext, used_peers
 
-        if self.store.hash(blob) != rec.encrypted_file_hash:
-            raise ValueError("encrypted file hash mismatch")
+    def _recover_pdk(self, rec: FabricRecord, available_peer_ids: list[str] | None) -> tuple[bytes, list[str]]:
+        aad = self._share_aad(rec.patient_id, rec.version)
+        candidates = self._unwrap_candidates(rec, available_peer_ids)
+        shares: list[bytes] = []
+        used_peers: list[str] = []
+        errors: list[str] = []
+        with spans.span("unwrap"):
+            if hasattr(self.nmk_store, "unwrap_first_k"):
+                # Remote peers: k requests in parallel, hedged past the latency percentile.
+                if len(candidates) >= rec.threshold:
+                    for peer_id, share in self.nmk_store.unwrap_first_k(
+                        candidates, aad=aad, k=rec.threshold, health=self.peer_health
+                    ):
+                        shares.append(share)
+                        used_peers.append(peer_id)
+            else:
+                for peer_id, wrapped in candidates:
+                    start = time.perf_counter()
+                    try:
+                        share = self.nmk_store.unwrap_share(peer_id, wrapped, aad=aad)
+                    except Exception as e:
+                        self.peer_health.record(peer_id, time.perf_counter() - start, ok=False)
+                        errors.append(f"{peer_id}: {type(e).__name__}")
+                        continue
+                    self.peer_health.record(peer_id, time.perf_counter() - start, ok=True)
+                    shares.append(share)
+                    used_peers.append(peer_id)
+                    if len(shares) >= rec.threshold:
+                        break
 
-        nonce = blob[:12]
-        ciphertext = blob[12:]
+        if len(shares) < rec.threshold:
+            raise ValueError(
+                f"insufficient shares: need {rec.threshold}, got {len(shares)} (available={len(available_peer_ids) if available_peer_ids is not None else 'all'})"
+                + (f" ({'; '.join(errors)})" if errors else "")
+            )
 
-        t_decrypt_start = time.perf_counter()
-        plaintext = aes_decrypt(pdk, nonce, ciphertext, aad=aad)
-        t_decrypt_end = time.perf_counter()
+        with spans.span("reconstruct"):
+            pdk = reconstruct_secret(shares)
+        return pdk, used_peers
 
-        audit_entry = {
+    def _read_audit_entry(self, rec: FabricRecord, requester: str) -> dict[str, Any]:
+        return {
             "event": "READ",
             "timestamp": time.time(),
             "requester": requester,
             "version": rec.version,
         }
-        if hasattr(self.fabric, "appendAuditLog"):
-            self.fabric.appendAuditLog(patient_id, audit_entry)
-        else:
-            rec.audit_logs.append(audit_entry)
-            self.fabric.updateRecord(rec)
 
-        t_end = time.perf_counter()
+    def _append_read_audits(self, entries: list[tuple[FabricRecord, dict[str, Any]]]) -> None:
+        if hasattr(self.fabric, "appendAuditLogs"):
+            self.fabric.appendAuditLogs([(rec.patient_id, entry) for rec, entry in entries])
+            return
+        for rec, entry in entries:
+            if hasattr(self.fabric, "appendAuditLog"):
+                self.fabric.appendAuditLog(rec.patient_id, entry)
+            else:
+                rec.audit_logs.append(entry)
+                self.fabric.updateRecord(rec, expected_version=rec.version)
+
+    def _read_response(
+        self,
+        rec: FabricRecord,
+        plaintext: bytes,
+        used_peers: list[str],
+        audit_entry: dict[str, Any],
+    ) -> dict[str, Any]:
         return {
             "patient_id": rec.patient_id,
             "priority": rec.priority,
@@ -249,69 +726,84 @@ class TrustedAuthorityCore:
             "file_b64": base64.b64encode(plaintext).decode("utf-8"),
             "audit_logs": [*rec.audit_logs, audit_entry],
             "used_peers": used_peers,
-            "timings": {
-                "fabric_get_latest_s": t_fabric - t0,
-                "unwrap_shares_s": t_unwrap_end - t_unwrap_start,
-                "reconstruct_secret_s": t_reconstruct_end - t_reconstruct_start,
-                "object_store_get_s": t_store_end - t_store_start,
-                "decrypt_s": t_decrypt_end - t_decrypt_start,
-                "total_s": t_end - t0,
-            },
+            "peer_scores": self.peer_health.snapshot(used_peers),
         }
 
+    @profiled("update")
     def update_record(self, patient_id: str, new_file_bytes: bytes, filename: str, requester: str) -> UploadResult:
-        latest = self.fabric.getLatestRecord(patient_id)
-        version = latest.version + 1
-
-        llm_priority = self._run_llm(new_file_bytes, filename)
-        if self._priority_rank(llm_priority) < self._priority_rank(latest.priority):
-            priority = latest.priority
-        else:
-            priority = llm_priority
+        with spans.operation("update"):
+            with spans.span("ledger_get"):
+                self.fabric.getLatestRecord(patient_id)  # fail fast on unknown patients before calling the LLM
+            llm_priority = self._run_llm(new_file_bytes, filename)
+            return self._write_next_version(patient_id, new_file_bytes, llm_priority, requester, must_exist=True)
+
+    def _needs_rethreshold(self, latest: FabricRecord, priority: str) -> bool:
+        # Same rule as triage: a priority may be escalated, never lowered.
         threshold = priority_to_threshold(priority)
+        if self._priority_rank(priority) < self._priority_rank(latest.priority):
+            raise ValueError(f"priority downgrade not allowed: {latest.priority} -> {priority}")
+        return priority != latest.priority or threshold != latest.threshold
 
-        aad = f"{patient_id}:{version}".encode("utf-8")
-        pdk = os.urandom(32)
-
-        enc = aes_encrypt(pdk, new_file_bytes, aad=aad)
-        blob = enc.nonce + enc.ciphertext
-        base_patient_id, condition = self._parse_patient_and_condition(patient_id)
-        path, h = self.store.put(base_patient_id, version, blob, condition=condition)
-
-        shares = split_secret(pdk, n=len(self.peer_ids), k=threshold)
-        shares_wrapped: dict[str, str] = {}
-        for peer_id, share in zip(self.peer_ids, shares, strict=True):
-            wrapped = self.nmk_store.wrap_share(peer_id, share, aad=aad)
-            shares_wrapped[peer_id] = wrapped
-
-        audit_logs = list(latest.audit_logs)
-        audit_logs.append(
-            {
-                "event": "UPDATE",
-                "timestamp": time.time(),
-                "requester": requester,
-                "priority": priority,
-                "threshold": threshold,
-                "version": version,
-            }
-        )
-
-        rec = FabricRecord(
-            patient_id=patient_id,
+    def _rethreshold_record(
+        self, latest: FabricRecord, priority: str, shares_wrapped: dict[str, str], requester: str | None
+    ) -> FabricRecord:
+        threshold = priority_to_threshold(priority)
+        version = latest.version + 1
+        audit_entry = {
+            "event": "RETHRESHOLD",
+            "timestamp": time.time(),
+            "requester": requester,
+            "priority": priority,
+            "threshold": threshold,
+            "previous_threshold": latest.threshold,
+            "version": version,
+        }
+        return replace(
+            latest,
             priority=priority,
             threshold=threshold,
             version=version,
-            encrypted_file_path=path,
-            encrypted_file_hash=h,
             shares_wrapped=shares_wrapped,
             timestamp=time.time(),
-            audit_logs=audit_logs,
+            audit_logs=[*latest.audit_logs, audit_entry],
+            blob_version=latest.blob_aad_version,
         )
-        self.fabric.updateRecord(rec)
-        return UploadResult(patient_id=patient_id, priority=priority, threshold=threshold, version=version)
 
+    @profiled("rethreshold")
+    def rethreshold(self, patient_id: str, priority: str, requester: str | None = None) -> UploadResult:
+        # Re-splits the record's PDK for the new priority's threshold and writes a version that
+        # points at the same ciphertext: no blob read or write, no triage call.
+        priority = (priority or "").strip().upper()
+        with spans.operation("rethreshold", priority):
+            attempt = 0
+            while True:
+                with self._patient_lock(patient_id):
+                    with spans.span("ledger_get"):
+                        latest = self.fabric.getLatestRecord(patient_id)
+                    if not self._needs_rethreshold(latest, priority):
+                        return UploadResult(patient_id=patient_id, priority=latest.priority, threshold=latest.threshold, version=latest.version)
+                    pdk, _ = self._recover_pdk(latest, None)
+                    with spans.span("split"):
+                        shares = self._split_pdk(pdk, priority_to_threshold(priority))
+                    with spans.span("wrap"):
+                        shares_wrapped = self._wrap_shares(shares, self._share_aad(patient_id, latest.version + 1))
+                    rec = self._rethreshold_record(latest, priority, shares_wrapped, requester)
+                    try:
+                        with spans.span("ledger_write"):
+                            self.fabric.updateRecord(rec, expected_version=latest.version)
+                        self._forget_latest(patient_id)
+                        return UploadResult(patient_id=patient_id, priority=rec.priority, threshold=rec.threshold, version=rec.version)
+                    except VersionConflictError:
+                        attempt += 1
+                        if attempt >= self.write_retry.max_attempts:
+                            raise
+                with spans.span("conflict_backoff"):
+                    time.sleep(self.write_retry.backoff_s(attempt))
+
+    @profiled("history")
     def get_history(self, patient_id: str) -> list[dict[str, Any]]:
-        hist = self.fabric.getHistory(patient_id)
+        with spans.operation("history"), spans.span("ledger_history"):
+            hist = self.fabric.getHistory(patient_id)
         return [
             {
                 "patient_id": r.patient_id,
@@ -329,7 +821,8 @@ class TrustedAuthorityCore:
         try:
             with open(path, "wb") as f:
                 f.write(file_bytes)
-            res = classify_from_file(path, filename)
+            with spans.span("triage"):
+                res = self.triage.classify(path, filename)
             return res.priority
         finally:
             try:
@@ -0,0 +1,151 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from typing import Callable
+
+from observability.metrics import REGISTRY
+from patient_data import get_default_disease_dataset
+from resilience.breaker import CircuitBreaker
+from resilience.retry import RetryBudget
+from trusted_authority_service.llm_adapter import LlmTriageResult, classify_from_file
+
+_TRIAGE_LATENCY = REGISTRY.histogram(
+    "ta_triage_latency_seconds",
+    "End-to-end triage latency including retries and fallback",
+    ("outcome",),
+)
+_TRIAGE_REQUESTS = REGISTRY.counter("ta_triage_requests_total", "Triage calls by outcome", ("outcome",))
+_TRIAGE_FALLBACKS = REGISTRY.counter("ta_triage_fallbacks_total", "Triage fallbacks by reason", ("reason", "source"))
+_TRIAGE_ATTEMPT_FAILURES = REGISTRY.counter("ta_triage_attempt_failures_total", "Failed LLM attempts", ("reason",))
+_TRIAGE_RETRIES = REGISTRY.counter("ta_triage_retries_total", "LLM retries granted by the retry budget")
+_TRIAGE_BREAKER = REGISTRY.gauge("ta_triage_breaker_state", "Triage circuit breaker state (0=closed, 1=half_open, 2=open)")
+
+_SERIOUS_TERMS: dict[str, list[str]] = {
+    "HIGH": ["critical", "emergency", "life-threatening", "unconscious", "cardiac", "hemorrhage", "haemorrhage"],
+    "MEDIUM": ["urgent", "chronic", "infection", "fracture"],
+}
+
+
+@dataclass(frozen=True)
+class TriageGuardConfig:
+    deadline_s: float = 20.0
+    attempt_timeout_s: float = 10.0
+    max_retries: int = 1
+    retry_budget_ratio: float = 0.2
+    failure_threshold: int = 5
+    reset_timeout_s: float = 30.0
+    fallback: str = "local"  # local | conservative
+    fallback_priority: str = "MEDIUM"
+    max_workers: int = 16
+
+    @classmethod
+    def from_env(cls) -> "TriageGuardConfig":
+        return cls(
+            deadline_s=float(os.getenv("LLM_DEADLINE_S") or cls.deadline_s),
+            attempt_timeout_s=float(os.getenv("LLM_ATTEMPT_TIMEOUT_S") or cls.attempt_timeout_s),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES") or cls.max_retries),
+            retry_budget_ratio=float(os.getenv("LLM_RETRY_BUDGET_RATIO") or cls.retry_budget_ratio),
+            failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES") or cls.failure_threshold),
+            reset_timeout_s=float(os.getenv("LLM_BREAKER_RESET_S") or cls.reset_timeout_s),
+            fallback=(os.getenv("LLM_FALLBACK") or cls.fallback).strip().lower(),
+            fallback_priority=(os.getenv("LLM_FALLBACK_PRIORITY") or cls.fallback_priority).strip().upper(),
+            max_workers=int(os.getenv("LLM_MAX_WORKERS") or cls.max_workers),
+        )
+
+
+def classify_locally(content: bytes) -> str | None:
+    text = content.decode("utf-8", errors="ignore").lower()
+    if not text:
+        return None
+    terms = {p: list(ds) for p, ds in get_default_disease_dataset().items()}
+    for p, extra in _SERIOUS_TERMS.items():
+        terms.setdefault(p, []).extend(extra)
+    for p in ("HIGH", "MEDIUM", "LOW"):
+        if any(t in text for t in terms.get(p, [])):
+            return p
+    return None
+
+
+class GuardedTriage:
+    def __init__(
+        self,
+        config: TriageGuardConfig | None = None,
+        classify: Callable[[str, str], LlmTriageResult] = classify_from_file,
+    ):
+        self.config = config or TriageGuardConfig.from_env()
+        self._classify = classify
+        self.breaker = CircuitBreaker(
+            "llm_triage",
+            failure_threshold=self.config.failure_threshold,
+            reset_timeout_s=self.config.reset_timeout_s,
+        )
+        self.budget = RetryBudget(ratio=self.config.retry_budget_ratio)
+        # Bounded: a hung LLM can pin at most max_workers threads; callers stop waiting at their deadline.
+        self._executor = ThreadPoolExecutor(max_workers=self.config.max_workers, thread_name_prefix="triage")
+        _TRIAGE_BREAKER.set_function(self.breaker.state_code)
+
+    def classify(self, file_path: str, filename: str) -> LlmTriageResult:
+        start = time.monotonic()
+        deadline = start + self.config.deadline_s
+        self.budget.deposit()
+
+        reason = "error"
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                reason = "circuit_open"
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                reason = "deadline"
+                break
+            fut = self._executor.submit(self._classify, file_path, filename)
+            try:
+                res = fut.result(timeout=min(self.config.attempt_timeout_s, remaining))
+            except FutureTimeout:
+                fut.cancel()
+                reason = "timeout"
+                self.breaker.record_failure()
+            except Exception:
+                reason = "error"
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+                _TRIAGE_REQUESTS.inc(outcome="ok")
+                _TRIAGE_LATENCY.observe(time.monotonic() - start, outcome="ok")
+                return res
+            _TRIAGE_ATTEMPT_FAILURES.inc(reason=reason)
+
+            attempt += 1
+            if attempt > self.config.max_retries or not self.budget.withdraw():
+                break
+            _TRIAGE_RETRIES.inc()
+
+        res = self._fallback(file_path, filename, reason)
+        _TRIAGE_REQUESTS.inc(outcome="fallback")
+        _TRIAGE_LATENCY.observe(time.monotonic() - start, outcome="fallback")
+        return res
+
+    def _fallback(self, file_path: str, filename: str, reason: str) -> LlmTriageResult:
+        priority = None
+        source = "conservative"
+        if self.config.fallback == "local":
+            try:
+                with open(file_path, "rb") as f:
+                    priority = classify_locally(f.read())
+            except OSError:
+                priority = None
+            if priority is not None:
+                source = "local"
+        if priority is None:
+            priority = self.config.fallback_priority
+            if priority not in {"HIGH", "MEDIUM", "LOW"}:
+                priority = "MEDIUM"
+        _TRIAGE_FALLBACKS.inc(reason=reason, source=source)
+        return LlmTriageResult(
+            raw="FALLBACK",
+            parsed={"fallback": True, "reason": reason, "source": source, "filename": filename},
+            priority=priority,
+        )